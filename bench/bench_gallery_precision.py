@@ -0,0 +1,97 @@
+# bench/bench_gallery_precision.py
+#
+# Accuracy / memory / speed parity of MemberGallery storage precisions.
+#
+# Builds a synthetic gallery of ArcFace-like 512-d embeddings, scores noisy
+# probes (genuine) and unrelated faces (impostors) against it with each
+# GALLERY_DTYPE, and compares every result with the float32 gallery:
+# top-1 agreement, match-decision agreement at the Hailo / InsightFace
+# thresholds and the worst absolute similarity error.
+#
+# Usage (from the repo root):
+#   python bench/bench_gallery_precision.py [--members 5000] [--probes 500]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from member_gallery import MemberGallery, STORAGE_DTYPES, normalize_rows  # noqa: E402
+
+THRESHOLDS = (0.25, 0.35)   # FACE_THRESHOLD_HAILO, FACE_RECOG_THRESHOLD defaults
+
+
+def make_members(rng, count, dim):
+    embeddings = rng.standard_normal((count, dim)).astype(np.float32)
+    # Un-normalized like raw InsightFace output (pre_norm ~ 20)
+    embeddings *= rng.uniform(15, 25, size=(count, 1)).astype(np.float32) / np.sqrt(dim)
+    return [{'reservationCode': f'R{i // 4}', 'memberNo': i % 4, 'fullName': f'member-{i}',
+             'faceEmbedding': embeddings[i]} for i in range(count)], embeddings
+
+
+def make_probes(rng, embeddings, count):
+    dim = embeddings.shape[1]
+    identities = rng.integers(0, embeddings.shape[0], size=count)
+    unit, _ = normalize_rows(embeddings[identities])
+    # Noise chosen so genuine cosine similarity lands around 0.2-0.6
+    noise_level = rng.uniform(1.2, 4.0, size=(count, 1)).astype(np.float32)
+    genuine = unit + noise_level * rng.standard_normal((count, dim)).astype(np.float32) / np.sqrt(dim)
+    impostors = rng.standard_normal((count, dim)).astype(np.float32)
+    probes, _ = normalize_rows(np.vstack([genuine, impostors]).astype(np.float32))
+    return probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--members', type=int, default=5000)
+    parser.add_argument('--probes', type=int, default=500)
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    members, embeddings = make_members(rng, args.members, args.dim)
+    probes = make_probes(rng, embeddings, args.probes)
+
+    results = {}
+    for dtype in STORAGE_DTYPES:
+        gallery = MemberGallery(dim=args.dim, name=dtype, dtype=dtype)
+        gallery.sync(members)
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            scores = gallery.scores(probes)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / args.repeat
+
+        results[dtype] = (scores, gallery.nbytes, elapsed_ms)
+
+    reference, reference_bytes, _ = results['float32']
+    reference_top1 = reference.argmax(axis=1)
+    reference_best = reference.max(axis=1)
+
+    print(f"gallery: {args.members} x {args.dim}, probes: {probes.shape[0]} "
+          f"({args.probes} genuine + {args.probes} impostor)")
+    # Impostor top-1 is a near-tie among unrelated members, so report genuine probes separately
+    header = f"{'dtype':>8} {'MB':>8} {'ms/batch':>9} {'top1 agree':>11} {'genuine top1':>13} {'max |dsim|':>11}"
+    header += ''.join(f" {'decision@' + format(t, 'g'):>13}" for t in THRESHOLDS)
+    print(header)
+    for dtype, (scores, nbytes, elapsed_ms) in results.items():
+        top1_match = scores.argmax(axis=1) == reference_top1
+        max_err = float(np.abs(scores - reference).max())
+        row = (f"{dtype:>8} {nbytes / 1e6:>8.2f} {elapsed_ms:>9.2f} "
+               f"{100 * top1_match.mean():>10.2f}% {100 * top1_match[:args.probes].mean():>12.2f}% {max_err:>11.5f}")
+        for threshold in THRESHOLDS:
+            agree = np.mean((scores.max(axis=1) >= threshold) == (reference_best >= threshold))
+            row += f" {100 * agree:>12.2f}%"
+        print(row)
+    print(f"memory vs float32: " + ', '.join(
+        f"{dtype} {results[dtype][1] / reference_bytes:.2f}x" for dtype in STORAGE_DTYPES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# bench/bench_hailo_cpu_reference.py
+#
+# Profile the Hailo backend without a Hailo-8, on the hailo_cpu_reference
+# stand-in (HAILO_CPU_REFERENCE=true).
+#
+# Runs frames through HailoUC8App.get() and FaceRecognition.process_frame()
+# against a synthetic gallery, then prints per-frame wall time, the
+# per-stage latency histograms (latency_metrics) and the per-model job
+# telemetry (hailo_telemetry). Inference comes from <hef stem>.npz replays,
+# <hef stem>.onnx models or synthetic outputs in --models-dir, so the
+# numbers isolate host-side pre/post-processing unless ONNX models are used.
+#
+# --cameras N feeds N cameras from one thread each; with --devices and
+# --device-mode vdevice/shard this shows how HAILO_DEVICE_MODE spreads them.
+#
+# Usage (from the repo root):
+#   python bench/bench_hailo_cpu_reference.py [--frames 300] [--image face.jpg]
+#       [--models-dir models/] [--members 1000] [--cascade person] [--zoom]
+#       [--cameras 4 --devices 2 --device-mode shard]
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--image', help='BGR frame to use instead of noise (any format cv2 reads)')
+    parser.add_argument('--models-dir', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models'),
+                        help='Directory of <hef stem>.npz / .onnx sources (HAILO_CPU_REFERENCE_DIR)')
+    parser.add_argument('--yolo-hef', default='yolov8n.hef')
+    parser.add_argument('--det-hef', default='scrfd_2.5g.hef')
+    parser.add_argument('--rec-hef', default='arcface_r50.hef')
+    parser.add_argument('--members', type=int, default=1000, help='Synthetic ACTIVE gallery size (0: get() only)')
+    parser.add_argument('--cascade', choices=('off', 'person', 'roi'), default='off')
+    parser.add_argument('--zoom', action='store_true')
+    parser.add_argument('--cameras', type=int, default=1, help='Cameras fed concurrently, one thread each')
+    parser.add_argument('--devices', type=int, default=1, help='Simulated Hailo devices')
+    parser.add_argument('--device-mode', choices=('single', 'vdevice', 'shard'), default='single')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Configuration is read when the modules are imported
+    os.environ['HAILO_CPU_REFERENCE'] = 'true'
+    os.environ['HAILO_CPU_REFERENCE_DIR'] = args.models_dir
+    os.environ['HAILO_FACE_CASCADE'] = args.cascade
+    os.environ['HAILO_FACE_ZOOM'] = 'true' if args.zoom else 'false'
+    os.environ['HAILO_TELEMETRY_LOG_SEC'] = '0'
+    os.environ['GALLERY_CACHE_PATH'] = ''
+    os.environ['HAILO_CPU_REFERENCE_DEVICES'] = str(args.devices)
+    os.environ['HAILO_DEVICE_MODE'] = args.device_mode
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    import cv2
+    import hailo_telemetry
+    import latency_metrics
+    import face_recognition_hailo as fdm
+
+    rng = np.random.default_rng(args.seed)
+    if args.image:
+        frame = cv2.imread(args.image)
+        if frame is None:
+            sys.exit(f"cannot read {args.image}")
+    else:
+        frame = rng.integers(0, 256, size=(args.height, args.width, 3), dtype=np.uint8)
+
+    app = fdm.create_hailo_app(
+        yolo_hef_path=os.path.join(args.models_dir, args.yolo_hef),
+        det_hef_path=os.path.join(args.models_dir, args.det_hef),
+        rec_hef_path=os.path.join(args.models_dir, args.rec_hef),
+    )
+
+    detector = None
+    if args.members > 0:
+        embeddings = rng.standard_normal((args.members, 512)).astype(np.float32)
+        members = [{'reservationCode': f'R{i // 4}', 'memberNo': i % 4, 'fullName': f'member-{i}',
+                    'faceEmbedding': embeddings[i]} for i in range(args.members)]
+        detector = fdm.FaceRecognition(app, members, None, None)
+
+    cam_ips = [f'bench{index}' for index in range(args.cameras)]
+
+    def run_frame(cam_ip, index):
+        if detector is not None:
+            return detector.process_frame(frame, {'cam_ip': cam_ip}, index + 1, 0.0)
+        return app.get(frame, cam_ip=cam_ip)
+
+    for index in range(args.warmup):
+        run_frame(cam_ips[0], index)
+    latency_metrics.reset()
+    hailo_telemetry.reset()
+
+    durations = np.empty((args.cameras, args.frames))
+    faces = [0] * args.cameras
+
+    def run_camera(camera):
+        for index in range(args.frames):
+            started = time.perf_counter()
+            result = run_frame(cam_ips[camera], index)
+            durations[camera, index] = time.perf_counter() - started
+            faces[camera] += len(result['matched']) + len(result['unmatched']) if detector is not None else len(result[0])
+
+    threads = [threading.Thread(target=run_camera, args=(camera,)) for camera in range(args.cameras)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = args.frames * args.cameras
+    ms = durations.reshape(-1) * 1000
+    print(f"frames: {args.frames} x {args.cameras} camera(s) ({frame.shape[1]}x{frame.shape[0]}), "
+          f"devices={args.devices} ({args.device_mode}), cascade={args.cascade}, zoom={args.zoom}, "
+          f"members={args.members}, faces/frame={sum(faces) / total:.2f}")
+    print(f"frame ms: mean={ms.mean():.2f} p50={np.percentile(ms, 50):.2f} p99={np.percentile(ms, 99):.2f} "
+          f"-> {total / elapsed:.1f} fps")
+
+    print(f"\n{'stage':<16} {'count':>6} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for stage, summary in latency_metrics.snapshot()['latency'].get(cam_ips[0], {}).items():
+        print(f"{stage:<16} {summary['count']:>6} {summary['mean_ms']:>8.2f} "
+              f"{summary['p50_ms']:>8.2f} {summary['p99_ms']:>8.2f}")
+
+    stats = hailo_telemetry.stats()
+    print(f"\n{'model':<16} {'jobs':>6} {'mean ms':>8} {'p50 ms':>8} {'p99 ms':>8} {'max inflight':>13}")
+    for model in sorted(key[:-len('_completed')] for key in stats if key.endswith('_completed')):
+        print(f"{model:<16} {stats[f'{model}_completed']:>6} {stats.get(f'{model}_mean_ms', 0):>8.2f} "
+              f"{stats.get(f'{model}_p50_ms', 0):>8.2f} {stats.get(f'{model}_p99_ms', 0):>8.2f} "
+              f"{stats[f'{model}_max_in_flight']:>13}")
+
+    if isinstance(app, fdm.HailoShardedApp):
+        print(f"\nshards: {app.shard_stats()}")
+    app.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+# detection_scheduler.py
+#
+# Priority/deadline-ordered replacement for the detector's cam_queue.
+#
+# All cameras share one detector thread. With a FIFO queue, a P2 camera with a
+# clicked lock (someone standing at a keypad door) waits behind frames from
+# every triggered P1 surveillance camera. DetectionQueue keeps the Queue API
+# used by StreamCapture and FaceRecognitionBase (put/get/empty/full, mutex,
+# .queue.clear()) but orders frames by:
+#
+#   1. scheduling class: P2 unlock session (non-empty specific_locks)
+#                        → P2 surveillance → P1 surveillance
+#   2. deadline: earliest trigger_started_at first
+#   3. frame_time, then arrival order
+#
+# A SESSION_END marker is keyed on the session it ends with its enqueue time
+# as frame_time, so it follows every frame of that session. Once a later
+# session of the same camera queues a frame with a better key, the ended
+# session's remaining items are moved up to that key's class and deadline, so
+# the end marker still runs before the new session's frames.
+#
+# P1 frames are shed once the queue is deeper than DETECTION_QUEUE_SHED_DEPTH,
+# so unlock latency stays flat when several surveillance cameras trigger at
+# the same time.
+
+import heapq
+import itertools
+import logging
+import os
+import sys
+import time
+from queue import Queue
+
+import gstreamer_threading as gst
+import runtime_config
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# Scheduling classes (lower runs first)
+CLASS_UNLOCK = 0   # P2 session with clicked lock(s)
+CLASS_P2 = 1       # P2 camera without a clicked lock (ONVIF / force trigger)
+CLASS_P1 = 2       # P1 surveillance camera (no locks) — sheddable
+
+CLASS_NAMES = {CLASS_UNLOCK: 'unlock', CLASS_P2: 'p2', CLASS_P1: 'p1'}
+
+# Session registrations older than this are pruned (sessions last seconds)
+SESSION_TTL_SEC = 3600
+
+
+class DetectionQueue(Queue):
+    """Priority queue of (cmd, raw_img, cam_info) items for the detector thread.
+
+    Capacity is enforced here rather than by Queue.maxsize, so put() never
+    blocks or raises Full: when the queue is at capacity the lowest-priority
+    frame (the new one or a queued one) is dropped instead.
+    """
+
+    def __init__(self, maxsize=500):
+        self.capacity = maxsize
+        super().__init__(maxsize=0)
+
+    # ------------------------------------------------------------------
+    # Queue hooks (called with self.mutex held)
+    # ------------------------------------------------------------------
+    def _init(self, maxsize):
+        self.queue = []          # heap of [key, seq, item]
+        self._seq = itertools.count()
+        self._sessions = {}      # (cam_ip, detecting_txn) -> (sched_class, trigger_started_at)
+        self._ended = {}         # cam_ip -> {detecting_txn} with a queued SESSION_END
+        self.class_counts = {CLASS_UNLOCK: 0, CLASS_P2: 0, CLASS_P1: 0}
+        self.shed_count = 0
+        self.dropped_count = 0
+
+    def _qsize(self):
+        return len(self.queue)
+
+    def _put(self, item):
+        cmd, _, cam_info = item
+        key = self._priority_key(cmd, cam_info)
+        sched_class = key[0]
+        is_frame = cmd != gst.StreamCommands.SESSION_END
+
+        if is_frame and sched_class == CLASS_P1:
+            shed_depth = runtime_config.current().detection_queue_shed_depth
+            if shed_depth > 0 and len(self.queue) >= shed_depth:
+                self.shed_count += 1
+                logger.debug(f"{cam_info.get('cam_ip')} DetectionQueue shed P1 frame "
+                             f"(depth={len(self.queue)}, shed_total={self.shed_count})")
+                return
+
+        if is_frame and self.capacity > 0 and len(self.queue) >= self.capacity:
+            worst = max(range(len(self.queue)), key=lambda i: self.queue[i][0])
+            if self.queue[worst][0] <= key:
+                self.dropped_count += 1
+                return
+            self._discard(worst)
+
+        if is_frame and self._promote_ended_sessions(cam_info.get('cam_ip'), cam_info.get('detecting_txn'), key):
+            heapq.heapify(self.queue)
+        heapq.heappush(self.queue, [key, next(self._seq), item])
+        self.class_counts[sched_class] += 1
+        if not is_frame:
+            self._ended.setdefault(cam_info.get('cam_ip'), set()).add(cam_info.get('detecting_txn'))
+
+    def _get(self):
+        key, _, item = heapq.heappop(self.queue)
+        self.class_counts[key[0]] -= 1
+        cmd, _, cam_info = item
+        if cmd == gst.StreamCommands.SESSION_END:
+            ended = self._ended.get(cam_info.get('cam_ip'))
+            if ended is not None:
+                ended.discard(cam_info.get('detecting_txn'))
+                if not ended:
+                    del self._ended[cam_info.get('cam_ip')]
+        return item
+
+    # ------------------------------------------------------------------
+    # Session priority (called from py_handler as trigger context changes)
+    # ------------------------------------------------------------------
+    def set_session_priority(self, cam_ip, detecting_txn, specific_locks, trigger_started_at):
+        """Register or update the scheduling priority of a detection session.
+
+        Frames of this session that are already queued are re-keyed, so a
+        session upgraded from surveillance to unlock mode (keypad clicked
+        after an ONVIF trigger) jumps ahead immediately.
+
+        Args:
+            cam_ip: Camera IP
+            detecting_txn: Session id from StreamCapture.feed_detecting
+            specific_locks: Clicked lock ids for the session (may be empty)
+            trigger_started_at: Session trigger time (epoch seconds)
+        """
+        with self.mutex:
+            # Drop registrations whose session end was never seen
+            stale_before = time.time() - SESSION_TTL_SEC
+            for key in [k for k, v in self._sessions.items() if v[1] < stale_before]:
+                del self._sessions[key]
+
+            session_key = (cam_ip, detecting_txn)
+            previous = self._sessions.get(session_key)
+            sched_class = CLASS_UNLOCK if specific_locks else None
+            self._sessions[session_key] = (sched_class, trigger_started_at)
+
+            if previous == self._sessions[session_key]:
+                return
+
+            best_key = None
+            for entry in self.queue:
+                cmd, _, cam_info = entry[2]
+                if (cam_info.get('cam_ip'), cam_info.get('detecting_txn')) == session_key:
+                    old_class = entry[0][0]
+                    ended_at = entry[0][2] if cmd == gst.StreamCommands.SESSION_END else None
+                    entry[0] = self._priority_key(cmd, cam_info, ended_at)
+                    self.class_counts[old_class] -= 1
+                    self.class_counts[entry[0][0]] += 1
+                    if ended_at is None and (best_key is None or entry[0] < best_key):
+                        best_key = entry[0]
+            if best_key is not None:
+                self._promote_ended_sessions(cam_ip, detecting_txn, best_key)
+                heapq.heapify(self.queue)
+
+    def clear_session(self, cam_ip, detecting_txn):
+        """Forget a finished session's priority."""
+        with self.mutex:
+            self._sessions.pop((cam_ip, detecting_txn), None)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _priority_key(self, cmd, cam_info, ended_at=None):
+        """Return (class, deadline, frame_time) sort key for a queue item.
+
+        Args:
+            cmd: StreamCommands value of the item
+            cam_info: Item metadata (cam_ip, detecting_txn, locks, frame_time)
+            ended_at: Enqueue time of a SESSION_END being re-keyed (default: now)
+        """
+        session = self._sessions.get((cam_info.get('cam_ip'), cam_info.get('detecting_txn')))
+        if session and session[0] is not None:
+            sched_class = session[0]
+        else:
+            sched_class = CLASS_P2 if cam_info.get('locks') else CLASS_P1
+
+        if cmd == gst.StreamCommands.SESSION_END:
+            # Enqueued after every frame of its own session: sorts after them
+            frame_time = time.time() if ended_at is None else ended_at
+            deadline = session[1] if session else frame_time
+        else:
+            frame_time = float(cam_info['frame_time'])
+            deadline = session[1] if session else frame_time
+
+        return (sched_class, deadline, frame_time)
+
+    def _promote_ended_sessions(self, cam_ip, detecting_txn, key):
+        """Move items of this camera's ended sessions up to key's class and deadline.
+
+        Their frame_time (older frames, then the end marker's enqueue time)
+        keeps them ahead of the new session's frames at that key.
+
+        Returns:
+            True if an entry was re-keyed (caller re-heapifies)
+        """
+        ended = self._ended.get(cam_ip)
+        if not ended or ended == {detecting_txn}:
+            return False
+
+        promoted = False
+        queued = set()
+        for entry in self.queue:
+            _, _, cam_info = entry[2]
+            txn = cam_info.get('detecting_txn')
+            if cam_info.get('cam_ip') != cam_ip or txn not in ended or txn == detecting_txn:
+                continue
+            queued.add(txn)
+            if entry[0][:2] > key[:2]:
+                self.class_counts[entry[0][0]] -= 1
+                entry[0] = (key[0], key[1], entry[0][2])
+                self.class_counts[key[0]] += 1
+                promoted = True
+        # Markers removed behind our back (queue.clear()) are forgotten
+        ended.intersection_update(queued | {detecting_txn})
+        if not ended:
+            del self._ended[cam_ip]
+        return promoted
+
+    def _discard(self, index):
+        """Remove the heap entry at index (used when evicting at capacity)."""
+        key = self.queue[index][0]
+        self.queue[index] = self.queue[-1]
+        self.queue.pop()
+        if index < len(self.queue):
+            heapq.heapify(self.queue)
+        self.class_counts[key[0]] -= 1
+        self.dropped_count += 1
+
+    def stats(self):
+        """Return queue depth per class plus shed/drop counters."""
+        with self.mutex:
+            stats = {CLASS_NAMES[c]: n for c, n in self.class_counts.items()}
+            stats['shed'] = self.shed_count
+            stats['dropped'] = self.dropped_count
+            return stats
@@ -13,6 +13,8 @@ else:
     logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+import runtime_config
+import latency_metrics
 from face_recognition_base import FaceRecognitionBase
 
 
@@ -23,6 +25,8 @@ class FaceRecognition(FaceRecognitionBase):
         current_time = time.time()
         faces = self.face_app.get(raw_img)
         duration = time.time() - current_time
+        # FaceAnalysis.get runs detection and recognition in one call
+        latency_metrics.record(latency_metrics.STAGE_DETECTION, duration, cam_info['cam_ip'])
         logger.debug(f"{cam_info['cam_ip']} detection frame #{detected} - age: {age:.3f} duration: {duration:.3f} face(s): {len(faces)}")
 
         # Skip face recognition if no active members
@@ -31,16 +35,23 @@ class FaceRecognition(FaceRecognitionBase):
                 logger.debug(f"{cam_info['cam_ip']} No active members - skipping face recognition")
             return []
 
+        threshold = runtime_config.current().for_camera(cam_info['cam_ip']).face_recog_threshold
+
+        if not faces:
+            return []
+
+        # All faces of the frame in one BLAS call
+        match_started_at = time.time()
+        matches = self.find_matches(np.stack([face.embedding.ravel() for face in faces]), threshold)
+        latency_metrics.record(latency_metrics.STAGE_MATCHING, time.time() - match_started_at, cam_info['cam_ip'])
+
         matched_faces = []
-        for face in faces:
+        for face, (active_member, sim, best_name) in zip(faces, matches):
             # Log embedding stats for comparison with Hailo
             emb = face.embedding
             emb_norm = np.linalg.norm(emb)
             logger.debug(f"InsightFace embedding: pre_norm={emb_norm:.4f}, mean={emb.mean():.4f}, std={emb.std():.4f}")
 
-            threshold = float(os.environ.get('FACE_RECOG_THRESHOLD', '0.35'))
-            active_member, sim, best_name = self.find_match(face.embedding, threshold)
-
             if active_member is None:
                 logger.info(f"{cam_info['cam_ip']} detected: {detected} age: {age:.3f} best_match: {best_name} best_sim: {sim:.4f} (no match)")
                 continue
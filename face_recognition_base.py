@@ -10,6 +10,11 @@ from abc import abstractmethod
 import numpy as np
 
 import gstreamer_threading as gst
+import runtime_config
+import latency_metrics
+from member_gallery import (MemberGallery, CATEGORY_PRIORITY, CATEGORY_CODES,
+                            category_member_key, category_code)
+from gallery_index import GalleryIndex
 
 from match_handler import MatchEvent
 
@@ -37,19 +42,21 @@ class FaceRecognitionBase(threading.Thread):
 
         self.face_app = face_app
         self.fdm = fdm_backend
-        self._active_members = None
-        # Initialize embeddings to empty array - will be populated by property setter
-        self.member_embeddings = np.empty((0, 512), dtype=np.float32)
-        self.member_norms = np.empty(0, dtype=np.float32)
 
-        # Pre-compute embeddings matrix for vectorized comparison
-        # (triggered automatically by the property setter)
+        # Keyed embedding gallery, updated incrementally by the property setter.
+        # _gallery_update_lock serializes setters with rebuild_galleries(), so an
+        # update is never applied to a gallery that is about to be swapped out
+        self._gallery_update_lock = threading.RLock()
+        gallery_dtype = runtime_config.current().gallery_dtype
+        self._active_gallery = MemberGallery(name='ACTIVE', dtype=gallery_dtype)
+        self._active_index = GalleryIndex(name='ACTIVE')
         self.active_members = active_members
 
         # Multi-category member support (Hailo path: ACTIVE, INACTIVE, STAFF, BLOCKLIST)
-        self._members_by_category = {}   # category -> list of member dicts
-        self.category_embeddings = {}    # category -> np.ndarray (N, 512)
-        self.category_norms = {}         # category -> np.ndarray (N,)
+        # One combined gallery; each row carries its category's priority rank
+        self._category_gallery = MemberGallery(name='CATEGORIES', key_fn=category_member_key,
+                                               code_fn=category_code, dtype=gallery_dtype)
+        self._category_index = GalleryIndex(name='CATEGORIES')
 
         self.cam_detection_his = {}
 
@@ -66,6 +73,21 @@ class FaceRecognitionBase(threading.Thread):
                     if cmd == gst.StreamCommands.SESSION_END:
                         session_cam_ip = cam_info.get('cam_ip')
                         detecting_txn = cam_info.get('detecting_txn')
+                        if hasattr(self.cam_queue, 'clear_session'):
+                            self.cam_queue.clear_session(session_cam_ip, detecting_txn)
+
+                        # The priority queue may run a newer session of this camera ahead of
+                        # the previous session's end marker — leave the newer session's state alone
+                        his = self.cam_detection_his.get(session_cam_ip)
+                        if his is not None and his.get('detecting_txn') != detecting_txn:
+                            logger.debug(f"{session_cam_ip} SESSION END for superseded session {detecting_txn}")
+                            try:
+                                from match_handler import on_session_end
+                                on_session_end(session_cam_ip, detecting_txn, self.match_handler)
+                            except Exception as e:
+                                logger.error(f"{session_cam_ip} Error in session end handler: {e}")
+                            continue
+
                         if session_cam_ip and session_cam_ip in self.cam_detection_his:
                             his = self.cam_detection_his[session_cam_ip]
                             detected = his.get('detected', 0)
@@ -110,8 +132,10 @@ class FaceRecognitionBase(threading.Thread):
 
                     current_time = time.time()
                     age = current_time - float(cam_info['frame_time'])
+                    if 'enqueued_at' in cam_info:
+                        latency_metrics.record(latency_metrics.STAGE_QUEUE_WAIT, current_time - cam_info['enqueued_at'], cam_info['cam_ip'])
 
-                    if age > float(os.environ['AGE_DETECTING_SEC']):
+                    if age > runtime_config.current().for_camera(cam_info['cam_ip']).age_detecting_sec:
                         logger.debug(f"{cam_info['cam_ip']} age: {age}")
                         continue
                     else:
@@ -153,13 +177,15 @@ class FaceRecognitionBase(threading.Thread):
                         )
 
                         # Call on_match for matched faces, on_no_match for unmatched only
+                        handler_started_at = time.time()
                         if matched_faces:
                             self.match_handler.on_match(match_event)
                         elif unmatched_faces:
                             self.match_handler.on_no_match(match_event)
+                        latency_metrics.record(latency_metrics.STAGE_HANDLER, time.time() - handler_started_at, cam_info['cam_ip'])
 
                 else:
-                    time.sleep(float(os.environ['DETECTING_SLEEP_SEC']))
+                    time.sleep(runtime_config.current().detecting_sleep_sec)
 
             except Exception as e:
                 logger.error(f"Caught {self.name} runtime exception!")
@@ -193,54 +219,100 @@ class FaceRecognitionBase(threading.Thread):
 
     @property
     def active_members(self):
-        return self._active_members
+        return self._active_gallery.members
 
     @active_members.setter
     def active_members(self, value):
-        def get_member_hash(members):
-            """Create a hash of member IDs and their embedding checksums."""
-            if not members:
-                return set()
-            result = set()
-            for m in members:
-                key = (m.get('memberNo'), m.get('reservationCode'))
-                emb = m.get('faceEmbedding', [])
-                emb_sig = tuple(emb[:4]) if len(emb) > 0 else ()
-                result.add((key, emb_sig))
-            return result
-
-        old_hash = get_member_hash(self._active_members)
-        new_hash = get_member_hash(value)
-
-        self._active_members = value
-
-        if old_hash != new_hash:
-            logger.info(f"active_members changed: {len(old_hash)} -> {len(new_hash)} members, rebuilding embeddings")
-            self._build_member_embeddings()
+        with self._gallery_update_lock:
+            gallery = self._active_gallery
+            with gallery.lock:
+                delta = gallery.sync(value)
+            if delta.changed:
+                self._active_index.refresh(gallery)
+        if delta.changed:
+            logger.info(f"active_members changed: {delta} -> {len(gallery)} members, "
+                        f"{gallery.template_count} templates")
         else:
-            logger.debug(f"active_members unchanged ({len(new_hash)} members), skipping embedding rebuild")
+            logger.debug(f"active_members unchanged ({len(self._active_gallery)} members), skipping embedding update")
 
-    def _build_member_embeddings(self):
-        """Pre-compute embeddings matrix and norms for vectorized comparison."""
-        if not self.active_members:
-            self.member_embeddings = np.empty((0, 512), dtype=np.float32)
-            self.member_norms = np.empty(0, dtype=np.float32)
-            logger.info("No active members - embeddings matrix empty")
-            return
+    @property
+    def member_embeddings(self):
+        return self._active_gallery.embeddings
+
+    @property
+    def member_norms(self):
+        return self._active_gallery.norms
 
-        embeddings_list = []
-        for member in self.active_members:
-            emb = np.array(member['faceEmbedding'], dtype=np.float32).ravel()
-            embeddings_list.append(emb)
+    def rebuild_galleries(self):
+        """Re-encode the galleries with the current GALLERY_DTYPE and rebuild their indexes.
+
+        New galleries and indexes are built off to the side and swapped in,
+        index first: until the gallery follows, the new index sees a version
+        mismatch and falls back to exact search on the old gallery. Member
+        updates wait on _gallery_update_lock meanwhile, so none is applied
+        to a gallery that is being replaced.
+        """
+        gallery_dtype = runtime_config.current().gallery_dtype
+        with self._gallery_update_lock:
+            for gallery_attr, index_attr in (('_active_gallery', '_active_index'),
+                                             ('_category_gallery', '_category_index')):
+                old = getattr(self, gallery_attr)
+                gallery = old
+                if old.dtype != gallery_dtype:
+                    gallery = MemberGallery(name=old.name, key_fn=old.key_fn, code_fn=old.code_fn,
+                                            dtype=gallery_dtype)
+                    with old.lock:
+                        members = list(old.members)
+                    gallery.sync(members)
+                    logger.info(f"Gallery [{old.name}] re-encoded {old.dtype} -> {gallery_dtype}: "
+                                f"{len(gallery)} members, {old.nbytes} -> {gallery.nbytes} bytes")
+
+                index = GalleryIndex(name=old.name)
+                index.refresh(gallery)
+                setattr(self, index_attr, index)
+                setattr(self, gallery_attr, gallery)
+
+    @staticmethod
+    def _face_matrix(face_embeddings):
+        """Stack face embeddings into an (F, D) float32 matrix plus (F,) norms."""
+        if isinstance(face_embeddings, np.ndarray) and face_embeddings.ndim == 2:
+            faces = np.asarray(face_embeddings, dtype=np.float32)
+        else:
+            faces = np.array([np.asarray(emb, dtype=np.float32).ravel() for emb in face_embeddings],
+                             dtype=np.float32).reshape(len(face_embeddings), -1)
+        return faces, np.linalg.norm(faces, axis=1)
 
-        self.member_embeddings = np.array(embeddings_list, dtype=np.float32)
-        self.member_norms = np.linalg.norm(self.member_embeddings, axis=1)
+    def find_matches(self, face_embeddings, threshold):
+        """Batched ACTIVE matching of every face in a frame with one BLAS call.
 
-        logger.info(f"Built embeddings matrix: {self.member_embeddings.shape[0]} members, {self.member_embeddings.shape[1]} dimensions")
+        Args:
+            face_embeddings: (F, 512) array, or a list of F embeddings
+            threshold: Match threshold
 
-        for i, member in enumerate(self.active_members):
-            emb = self.member_embeddings[i]
-            logger.debug(f"Stored embedding [{member.get('fullName', '?')}]: norm={self.member_norms[i]:.4f}, mean={emb.mean():.4f}, std={emb.std():.4f}")
+        Returns:
+            List of F (matched_member, similarity, best_name) tuples, each
+            (None, 0.0, None) when there is nothing to compare
+        """
+        faces, face_norms = self._face_matrix(face_embeddings)
+        results = [(None, 0.0, None)] * faces.shape[0]
+        valid = np.flatnonzero(face_norms > 0)
+        if valid.size == 0:
+            return results
+
+        gallery = self._active_gallery
+        with gallery.lock:
+            if len(gallery) == 0:
+                return results
+
+            similarities = self._active_index.search(gallery, faces[valid] / face_norms[valid, None], threshold)
+            max_idx = similarities.argmax(axis=1)
+            max_sim = similarities[np.arange(valid.size), max_idx]
+            best = [gallery.members[i] for i in max_idx]
+
+        for face_row, member, sim in zip(valid, best, max_sim):
+            sim = float(sim)
+            results[face_row] = (member if sim >= threshold else None, sim, member.get('fullName', '?'))
+        return results
 
     def find_match(self, face_embedding, threshold):
         """Vectorized face matching - find best matching member above threshold.
@@ -248,25 +320,7 @@ class FaceRecognitionBase(threading.Thread):
         Returns:
             Tuple of (matched_member, similarity, best_name) or (None, 0.0, None)
         """
-        if self.member_embeddings.shape[0] == 0:
-            return None, 0.0, None
-
-        face_emb = np.array(face_embedding, dtype=np.float32).ravel()
-        face_norm = np.linalg.norm(face_emb)
-
-        if face_norm == 0:
-            return None, 0.0, None
-
-        similarities = np.dot(self.member_embeddings, face_emb) / (self.member_norms * face_norm)
-
-        max_idx = np.argmax(similarities)
-        max_sim = similarities[max_idx]
-        best_name = self.active_members[max_idx].get('fullName', '?')
-
-        if max_sim >= threshold:
-            return self.active_members[max_idx], float(max_sim), best_name
-
-        return None, float(max_sim), best_name
+        return self.find_matches([face_embedding], threshold)[0]
 
     def compute_sim(self, feat1, feat2):
         """Legacy method for single pairwise comparison (kept for compatibility)."""
@@ -281,84 +335,129 @@ class FaceRecognitionBase(threading.Thread):
 
     @property
     def all_members_by_category(self):
-        return self._members_by_category
+        gallery = self._category_gallery
+        with gallery.lock:
+            by_category = {category: [] for category in CATEGORY_PRIORITY}
+            for member in gallery.members:
+                by_category[member['category']].append(dict(member))
+        return by_category
 
     @all_members_by_category.setter
     def all_members_by_category(self, value):
-        """Set all category member lists and rebuild per-category embedding matrices.
+        """Apply per-category member lists to the combined gallery incrementally.
+
+        The gallery stores a copy of each member dict with its 'category'
+        added; the caller's dicts are left untouched.
 
         Args:
             value: dict {category: list_of_member_dicts}
                    Expected categories: 'ACTIVE', 'INACTIVE', 'STAFF', 'BLOCKLIST'
         """
-        self._members_by_category = value or {}
-        self._build_category_embeddings()
-
-    def _build_category_embeddings(self):
-        """Pre-compute per-category embedding matrices and norms."""
-        self.category_embeddings = {}
-        self.category_norms = {}
-
-        for category, members in self._members_by_category.items():
-            if not members:
-                self.category_embeddings[category] = np.empty((0, 512), dtype=np.float32)
-                self.category_norms[category] = np.empty(0, dtype=np.float32)
+        members = []
+        for category, category_members in (value or {}).items():
+            if category not in CATEGORY_CODES:
+                logger.warning(f"all_members_by_category: unknown category {category} ignored "
+                               f"({len(category_members or [])} members)")
                 continue
-
-            embeddings_list = [
-                np.array(m['faceEmbedding'], dtype=np.float32).ravel()
-                for m in members
-            ]
-            emb_matrix = np.array(embeddings_list, dtype=np.float32)
-            self.category_embeddings[category] = emb_matrix
-            self.category_norms[category] = np.linalg.norm(emb_matrix, axis=1)
-            logger.info(f"Built category embeddings [{category}]: {emb_matrix.shape[0]} members")
+            for member in category_members or []:
+                members.append(dict(member, category=category))
+
+        with self._gallery_update_lock:
+            gallery = self._category_gallery
+            with gallery.lock:
+                delta = gallery.sync(members)
+            if delta.changed:
+                self._category_index.refresh(gallery)
+        if delta.changed:
+            logger.info(f"Category gallery: {delta} -> {len(gallery)} members, "
+                        f"{gallery.template_count} templates")
 
     def has_any_members(self):
         """Return True if any category has at least one member."""
-        return any(len(members) > 0 for members in self._members_by_category.values())
+        return len(self._category_gallery) > 0
 
-    def find_match_with_category(self, face_embedding, threshold):
-        """Priority-based face matching across all loaded categories.
+    def _resolve_category_matches(self, similarities, codes, threshold):
+        """Resolve per-face category priority from a (F, N) similarity matrix.
 
-        Search order (highest to lowest priority):
-            BLOCKLIST → ACTIVE → INACTIVE → STAFF
+        Per face: the highest-priority category whose best similarity reaches
+        threshold wins; otherwise the best similarity over all categories is
+        reported (floored at 0.0, as the per-category loop did).
+
+        Args:
+            similarities: (F, N) cosine similarities against the combined gallery
+            codes: (N,) category rank of each gallery row
+            threshold: Match threshold
 
         Returns:
-            Tuple of (member_dict_with_category, similarity, best_name, category)
-            or (None, best_sim_overall, best_name_overall, None) if no match above threshold.
+            Tuple of (best_idx, best_sim, hit_rank, overall_rank):
+            best_idx / best_sim are (F, K) per-category argmax rows and maxima;
+            hit_rank / overall_rank are (F,) category ranks, -1 when absent
         """
-        PRIORITY_ORDER = ['BLOCKLIST', 'ACTIVE', 'INACTIVE', 'STAFF']
+        num_categories = len(CATEGORY_PRIORITY)
+        masks = codes[None, :] == np.arange(num_categories, dtype=codes.dtype)[:, None]   # (K, N)
+        per_category = np.where(masks[None, :, :], similarities[:, None, :], -np.inf)       # (F, K, N)
+        best_idx = per_category.argmax(axis=2)                                              # (F, K)
+        best_sim = np.take_along_axis(per_category, best_idx[:, :, None], axis=2)[:, :, 0]  # (F, K)
 
-        face_emb = np.array(face_embedding, dtype=np.float32).ravel()
-        face_norm = np.linalg.norm(face_emb)
+        hits = best_sim >= threshold
+        hit_rank = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+        overall_rank = best_sim.argmax(axis=1)
+        overall_rank = np.where(best_sim[np.arange(len(best_sim)), overall_rank] > 0.0, overall_rank, -1)
+        return best_idx, best_sim, hit_rank, overall_rank
 
-        if face_norm == 0:
-            return None, 0.0, None, None
+    def find_matches_with_category(self, face_embeddings, threshold):
+        """Batched priority-based matching of every face in a frame.
 
-        best_sim_overall = 0.0
-        best_name_overall = None
+        All faces are scored against the combined category gallery with one
+        matrix-matrix product; priority (BLOCKLIST → ACTIVE → INACTIVE → STAFF)
+        is resolved per face on the per-category maxima.
 
-        for category in PRIORITY_ORDER:
-            members = self._members_by_category.get(category, [])
-            emb_matrix = self.category_embeddings.get(category)
-            norms = self.category_norms.get(category)
-
-            if emb_matrix is None or emb_matrix.shape[0] == 0:
-                continue
+        Args:
+            face_embeddings: (F, 512) array, or a list of F embeddings
+            threshold: Match threshold
 
-            similarities = np.dot(emb_matrix, face_emb) / (norms * face_norm)
-            max_idx = int(np.argmax(similarities))
-            max_sim = float(similarities[max_idx])
-            name = members[max_idx].get('fullName', '?')
+        Returns:
+            List of F (member_dict_with_category, similarity, best_name, category)
+            tuples; (None, best_sim_overall, best_name_overall, None) for faces
+            with no match above threshold. Matched members are copies.
+        """
+        faces, face_norms = self._face_matrix(face_embeddings)
+        results = [(None, 0.0, None, None)] * faces.shape[0]
+        valid = np.flatnonzero(face_norms > 0)
+        if valid.size == 0:
+            return results
+
+        gallery = self._category_gallery
+        with gallery.lock:
+            if len(gallery) == 0:
+                return results
+
+            similarities = self._category_index.search(gallery, faces[valid] / face_norms[valid, None], threshold)
+            best_idx, best_sim, hit_rank, overall_rank = self._resolve_category_matches(
+                similarities, gallery.codes, threshold)
+
+            for i, face_row in enumerate(valid):
+                rank = int(hit_rank[i])
+                if rank >= 0:
+                    member = dict(gallery.members[best_idx[i, rank]])
+                    results[face_row] = (member, float(best_sim[i, rank]), member.get('fullName', '?'),
+                                         CATEGORY_PRIORITY[rank])
+                    continue
+
+                rank = int(overall_rank[i])
+                if rank >= 0:
+                    best = gallery.members[best_idx[i, rank]]
+                    results[face_row] = (None, float(best_sim[i, rank]), best.get('fullName', '?'), None)
+        return results
 
-            if max_sim > best_sim_overall:
-                best_sim_overall = max_sim
-                best_name_overall = name
+    def find_match_with_category(self, face_embedding, threshold):
+        """Priority-based face matching across all loaded categories.
 
-            if max_sim >= threshold:
-                member = dict(members[max_idx])
-                member['category'] = category
-                return member, max_sim, name, category
+        Search order (highest to lowest priority):
+            BLOCKLIST → ACTIVE → INACTIVE → STAFF
 
-        return None, best_sim_overall, best_name_overall, None
+        Returns:
+            Tuple of (member_dict_with_category, similarity, best_name, category)
+            or (None, best_sim_overall, best_name_overall, None) if no match above threshold.
+        """
+        return self.find_matches_with_category([face_embedding], threshold)[0]
@@ -8,14 +8,36 @@
 #
 # Reference: Seeed-Solution/face-recognition-api (MIT License)
 #   - SCRFD postprocessing (anchor decode, NMS)
-#   - ArcFace alignment (5-point SimilarityTransform)
+#   - ArcFace alignment (5-point similarity transform, closed-form Umeyama in numpy)
 #   - Embedding dequantization and L2 normalization
 #
 # UC8: Human Body Detection with YOLOv8n
 #   - Gate check: YOLOv8n on 10 frames before SCRFD+ArcFace session
 #   - Continuous: YOLOv8n on every frame during session
 #   - Extend: Dual-signal (motion + person) at timer expiry
-
+#   - Zoom (HAILO_FACE_ZOOM): SCRFD also runs on full-resolution head crops
+#     of person boxes, so distant faces are not shrunk with the whole frame
+#   - Cascade (HAILO_FACE_CASCADE): SCRFD+ArcFace only on frames where
+#     YOLOv8n saw a person (optionally inside DOOR_ROI), plus a keep-alive
+#     frame every HAILO_CASCADE_KEEPALIVE_FRAMES skipped frames
+#
+# Model hot-swap: HailoUC8App.swap_models() loads a new SCRFD/ArcFace HEF set
+# on the shared VDevice in the background, warms it up and switches over;
+# per-model settings travel with its ModelDescriptor
+#
+# Watchdog: consecutive failed or timed-out jobs (HAILO_WATCHDOG_MAX_FAILURES)
+# make HailoUC8App tear down and recreate the VDevice and all models in the
+# background; frames arriving meanwhile are dropped and counted
+#
+# Multiple Hailo devices (HAILO_DEVICE_MODE, see create_hailo_app()):
+#   - single:  one VDevice on one device (default)
+#   - vdevice: one VDevice over all devices; the HailoRT scheduler spreads
+#              the jobs of every model across them
+#   - shard:   HailoShardedApp runs a HailoUC8App (own VDevice, models and
+#              watchdog) per device and pins each camera to the least
+#              loaded one for the length of its session
+
+import gc
 import logging
 import time
 from datetime import datetime, timezone, timedelta
@@ -23,13 +45,17 @@ import sys
 import os
 import threading
 import traceback
+import queue
 from collections import deque
+from contextlib import contextmanager, ExitStack
+from dataclasses import dataclass
 import numpy as np
 import cv2
 
 import gstreamer_threading as gst
-
-from skimage.transform import SimilarityTransform
+import runtime_config
+import latency_metrics
+import hailo_telemetry
 
 if 'LOG_LEVEL' in os.environ:
     logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
@@ -38,14 +64,23 @@ else:
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# HailoRT imports
+# HailoRT imports (HAILO_CPU_REFERENCE: CPU stand-in, see hailo_cpu_reference.py)
 # ---------------------------------------------------------------------------
 try:
-    from hailo_platform import (
-        VDevice,
-        HailoSchedulingAlgorithm,
-        FormatType,
-    )
+    if runtime_config.current().hailo_cpu_reference:
+        from hailo_cpu_reference import (
+            Device,
+            VDevice,
+            HailoSchedulingAlgorithm,
+            FormatType,
+        )
+    else:
+        from hailo_platform import (
+            Device,
+            VDevice,
+            HailoSchedulingAlgorithm,
+            FormatType,
+        )
     HAILO_AVAILABLE = True
 except ImportError:
     HAILO_AVAILABLE = False
@@ -89,7 +124,7 @@ def is_uc8_enabled(cam_ip):
         True if UC8 continuous person detection should run
     """
     # Check environment variable override for testing (bypasses toggle system)
-    if os.environ.get('UC8_ALWAYS_ENABLED', '').lower() == 'true':
+    if runtime_config.current().uc8_always_enabled:
         return True
 
     toggles = _uc_toggle_cache.get(cam_ip, {})
@@ -97,6 +132,511 @@ def is_uc8_enabled(cam_ip):
     return toggles.get('uc8_standalone_enabled', True) or toggles.get('uc4_uc8_enabled', True)
 
 
+# ---------------------------------------------------------------------------
+# ModelDescriptor — identity and per-model settings of a SCRFD/ArcFace HEF set
+# ---------------------------------------------------------------------------
+# ArcFace HEFs by pre_norm threshold family (matched against the file name)
+MOBILEFACENET_MARKERS = ('mobilefacenet', 'mbf')
+
+
+@dataclass(frozen=True)
+class ModelDescriptor:
+    """A loaded SCRFD + ArcFace HEF pair.
+
+    Resolved once when the models are loaded, so hot paths do not inspect
+    HEF file names per frame.
+    """
+    det_hef_path: str
+    rec_hef_path: str
+    rec_family: str     # 'mobilefacenet' or 'r50' — selects the pre_norm threshold
+
+    @classmethod
+    def from_paths(cls, det_hef_path, rec_hef_path):
+        rec_name = os.path.basename(rec_hef_path).lower()
+        family = 'mobilefacenet' if any(m in rec_name for m in MOBILEFACENET_MARKERS) else 'r50'
+        return cls(det_hef_path, rec_hef_path, family)
+
+    @property
+    def embedding_space(self):
+        """Identifier of the embeddings this ArcFace HEF produces (gallery cache key)."""
+        return f"hailo:{os.path.basename(self.rec_hef_path)}"
+
+    def pre_norm_threshold(self, config):
+        """Pre-norm threshold for this model from a (per-camera) config snapshot."""
+        if self.rec_family == 'mobilefacenet':
+            return config.hailo_pre_norm_threshold_mobilefacenet
+        return config.hailo_pre_norm_threshold_r50
+
+
+# ---------------------------------------------------------------------------
+# BindingPool — pre-created bindings with pinned input/output buffers
+# ---------------------------------------------------------------------------
+BINDING_POOL_SIZE = 2       # detector thread + /recognise can infer concurrently
+REC_BATCH_SIZE = 4          # ArcFace jobs in flight per recognition wave
+JOB_TIMEOUT_MS = 10000
+DISCARD_TIMEOUT_MS = 1000   # wait for the rest of a wave after one of its jobs failed
+
+
+def _pool_name(device_label, name):
+    """Telemetry name of a BindingPool: '<label>_<model>' in shard mode."""
+    return f'{device_label}_{name}' if device_label else name
+
+
+class BindingSlot:
+    """One reusable set of bindings and the numpy buffers bound to it.
+
+    ``in_flight`` is set from submit() until a successful wait(); a slot
+    released while it is still set may have a job writing into its buffers.
+    """
+    def __init__(self, configured, infer_model, input_dtype, output_dtype=np.float32):
+        self.in_flight = False
+        self.input = np.empty(tuple(int(d) for d in infer_model.input().shape), dtype=input_dtype)
+        self.outputs = {
+            info.name: np.empty(info.shape, dtype=output_dtype)
+            for info in infer_model.outputs
+        }
+        self.bindings = configured.create_bindings(output_buffers=self.outputs)
+        self.bindings.input().set_buffer(self.input)
+
+
+class BindingPool:
+    """Fixed pool of BindingSlots for one configured model.
+
+    Bindings and buffers are created once; callers preprocess straight into
+    ``slot.input``, run the job, and read ``slot.outputs`` before the slot is
+    released (the buffers are overwritten by the next inference).
+
+    A slot whose job failed to submit, timed out or was never awaited is
+    retired instead of recycled: the device may still write into its buffers,
+    so they are kept referenced (never reused or freed) and a fresh slot takes
+    its place.
+
+    Args:
+        configured: ConfiguredInferModel
+        infer_model: InferModel the configuration came from
+        size: Number of slots (concurrent inferences)
+        input_dtype: numpy dtype of the input buffer (matches the input format type)
+        name: Label used in log lines
+        output_dtype: numpy dtype of the output buffers (matches the output format type)
+        watchdog: Optional InferenceWatchdog told about every job outcome
+    """
+
+    def __init__(self, configured, infer_model, size=BINDING_POOL_SIZE, input_dtype=np.uint8, name='',
+                 output_dtype=np.float32, watchdog=None):
+        self.configured = configured
+        self.infer_model = infer_model
+        self.input_dtype = input_dtype
+        self.output_dtype = output_dtype
+        self.name = name
+        self.size = size
+        self.watchdog = watchdog
+        self._free = queue.Queue()
+        self._retired = []
+        for _ in range(size):
+            self._free.put(self._new_slot())
+        logger.info(f"BindingPool[{name}] {size} slots, input={infer_model.input().shape}")
+
+    def _new_slot(self):
+        return BindingSlot(self.configured, self.infer_model, self.input_dtype, self.output_dtype)
+
+    @contextmanager
+    def slot(self):
+        """Borrow a slot for one preprocess → run → read cycle."""
+        slot = self._free.get()
+        if slot is None:
+            # Replacement for a retired slot, built on first use
+            try:
+                slot = self._new_slot()
+            except Exception:
+                self._free.put(None)
+                raise
+        try:
+            yield slot
+        finally:
+            if slot.in_flight:
+                # Buffers may still be written by the device: park them for good
+                self._retired.append(slot)
+                logger.warning(f"BindingPool[{self.name}] retired a slot with an unfinished job "
+                               f"({len(self._retired)} retired)")
+                self._free.put(None)
+            else:
+                self._free.put(slot)
+
+    def submit(self, slot):
+        """Start one inference on a slot's bindings without waiting.
+
+        Jobs of different models submitted back to back are interleaved by
+        the VDevice scheduler. Submission and completion are recorded in
+        hailo_telemetry under the pool name.
+
+        Returns:
+            The async job handle (pass to wait())
+        """
+        name = self.name
+        submitted_at = hailo_telemetry.job_submitted(name)
+
+        def on_done(completion_info=None, **kwargs):
+            hailo_telemetry.job_completed(name, submitted_at, getattr(completion_info, 'exception', None))
+
+        slot.in_flight = True
+        try:
+            return self.configured.run_async([slot.bindings], on_done)
+        except Exception as e:
+            hailo_telemetry.job_completed(name, submitted_at, e)
+            if self.watchdog is not None:
+                self.watchdog.failure(name, e)
+            raise
+
+    def wait(self, slot, job, timeout_ms=JOB_TIMEOUT_MS):
+        """Wait for a submitted job.
+
+        Returns:
+            slot.outputs, filled by the device
+        """
+        try:
+            job.wait(timeout_ms)
+        except Exception as e:
+            if isinstance(e, TimeoutError) or 'timeout' in type(e).__name__.lower():
+                hailo_telemetry.job_timeout(self.name)
+            if self.watchdog is not None:
+                self.watchdog.failure(self.name, e)
+            raise
+        slot.in_flight = False
+        if self.watchdog is not None:
+            self.watchdog.success()
+        return slot.outputs
+
+    def discard(self, pending, timeout_ms=DISCARD_TIMEOUT_MS):
+        """Wait out submitted jobs whose results are no longer needed.
+
+        Called when an earlier job of the same wave failed, before the slots
+        are released. Jobs that finish in time free their slot for reuse; the
+        rest keep it in flight, so slot() retires it. Errors are ignored (the
+        failure that aborted the wave has already been reported).
+
+        Args:
+            pending: (slot, job) pairs from submit()
+        """
+        for slot, job in pending:
+            try:
+                job.wait(timeout_ms)
+                slot.in_flight = False
+            except Exception as e:
+                logger.debug(f"BindingPool[{self.name}] discarded job did not finish: {e}")
+
+    def run(self, slot, timeout_ms=JOB_TIMEOUT_MS):
+        """Run one inference on a slot's bindings and wait for it.
+
+        Returns:
+            slot.outputs, filled by the device
+        """
+        return self.wait(slot, self.submit(slot), timeout_ms)
+
+
+# ---------------------------------------------------------------------------
+# InferenceWatchdog — consecutive job failures trigger device re-initialization
+# ---------------------------------------------------------------------------
+WATCHDOG_RETRY_SEC = 5          # first retry delay of a failed re-initialization
+WATCHDOG_RETRY_MAX_SEC = 60     # retry delay cap (doubles per attempt)
+
+
+class InferenceWatchdog:
+    """Counts consecutive failed or timed-out jobs across all pools of a VDevice.
+
+    A completed job resets the count. Reaching HAILO_WATCHDOG_MAX_FAILURES
+    calls on_trip once; it is re-armed by reset() after recovery.
+
+    Args:
+        on_trip: Callable run (in the failing job's thread) when the limit is hit
+    """
+
+    def __init__(self, on_trip):
+        self.on_trip = on_trip
+        self.consecutive_failures = 0
+        self.tripped = False
+        self._lock = threading.Lock()
+
+    def success(self):
+        self.consecutive_failures = 0
+
+    def failure(self, name, error):
+        max_failures = runtime_config.current().hailo_watchdog_max_failures
+        with self._lock:
+            self.consecutive_failures += 1
+            count = self.consecutive_failures
+            trip = max_failures > 0 and count >= max_failures and not self.tripped
+            if trip:
+                self.tripped = True
+        logger.warning(f"Hailo watchdog: {name} job failed ({count} consecutive): {error}")
+        if trip:
+            logger.error(f"Hailo watchdog: {count} consecutive failures, re-initializing the device")
+            self.on_trip()
+
+    def reset(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.tripped = False
+
+
+# ---------------------------------------------------------------------------
+# FramePreprocessContext — per-frame preprocessing shared by YOLO and SCRFD
+# ---------------------------------------------------------------------------
+YOLO_PAD_VALUE = 114
+SCRFD_PAD_VALUE = 0
+
+
+class FramePreprocessContext:
+    """One camera frame, converted and resized at most once for all models.
+
+    HailoUC8App.get() runs YOLOv8n and SCRFD on the same frame. The context
+    converts BGR→RGB once and caches the aspect-preserving resize per
+    target size, so when both models share an input size only the border
+    fill (114 for YOLO, 0 for SCRFD) differs between their inputs. Scale and
+    pad parameters come from the same geometry and are therefore identical.
+
+    Args:
+        bgr: BGR numpy array (H, W, 3) uint8
+        consumers: Number of models that will letterbox this frame; with a
+                   single consumer the resize goes straight into its buffer
+                   and nothing is cached
+    """
+
+    def __init__(self, bgr, consumers=1):
+        self.bgr = bgr
+        self.shape = bgr.shape
+        self.consumers = consumers
+        self._rgb = None
+        self._resized = {}    # (new_w, new_h) -> resized RGB
+
+    @classmethod
+    def from_rgb(cls, rgb):
+        """Context over an image that is already RGB (e.g. a crop of frame.rgb)."""
+        context = cls(rgb)
+        context._rgb = rgb if rgb.flags['C_CONTIGUOUS'] else np.ascontiguousarray(rgb)
+        return context
+
+    @property
+    def rgb(self):
+        """Contiguous RGB copy of the frame (Hailo HEF models expect RGB)."""
+        if self._rgb is None:
+            rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+            if not rgb.flags['C_CONTIGUOUS']:
+                rgb = np.ascontiguousarray(rgb)
+            self._rgb = rgb
+        return self._rgb
+
+    def letterbox_into(self, out, fill):
+        """Resize with aspect ratio into the centre of out, padding with fill.
+
+        Only the border strips are painted; the resized frame is written
+        straight into the destination view, or copied from the cache when
+        another model already produced it.
+
+        Args:
+            out: (model_h, model_w, 3) uint8 destination (e.g. a bound input buffer)
+            fill: Padding value
+
+        Returns:
+            (scale, pad_left, pad_top)
+        """
+        model_h, model_w = out.shape[:2]
+        h, w = self.shape[:2]
+        scale = min(model_w / w, model_h / h)
+        new_w, new_h = int(w * scale), int(h * scale)
+        top = (model_h - new_h) // 2
+        left = (model_w - new_w) // 2
+
+        out[:top] = fill
+        out[top + new_h:] = fill
+        out[top:top + new_h, :left] = fill
+        out[top:top + new_h, left + new_w:] = fill
+
+        view = out[top:top + new_h, left:left + new_w]
+        resized = self._resized.get((new_w, new_h))
+        if resized is not None:
+            view[...] = resized
+        else:
+            cv2.resize(self.rgb, (new_w, new_h), dst=view)
+            if self.consumers > 1:
+                self._resized[(new_w, new_h)] = view.copy()
+
+        return scale, left, top
+
+
+def as_frame_context(img):
+    """Wrap a BGR frame in a FramePreprocessContext unless it already is one."""
+    return img if isinstance(img, FramePreprocessContext) else FramePreprocessContext(img)
+
+
+# ---------------------------------------------------------------------------
+# Face alignment — batched similarity transform (Umeyama 1991)
+# ---------------------------------------------------------------------------
+def umeyama_similarity(src, dst):
+    """Least-squares similarity transforms mapping each src point set onto dst.
+
+    Closed-form Umeyama solution, vectorized over K point sets: one batched
+    2x2 SVD instead of a SimilarityTransform.estimate() call per face.
+
+    Args:
+        src: (K, N, 2) source points (e.g. SCRFD landmarks per face)
+        dst: (N, 2) destination points (e.g. ArcFace template)
+
+    Returns:
+        (K, 2, 3) float64 affine matrices for cv2.warpAffine; NaN for
+        degenerate point sets (all points coincide)
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    num = src.shape[1]
+
+    src_mean = src.mean(axis=1)                                  # (K, 2)
+    dst_mean = dst.mean(axis=0)                                  # (2,)
+    src_demean = src - src_mean[:, None, :]
+    dst_demean = dst - dst_mean
+
+    cov = np.einsum('ni,knj->kij', dst_demean, src_demean) / num  # (K, 2, 2)
+    u, sigma, vt = np.linalg.svd(cov)
+    d = np.ones((src.shape[0], 2))
+    d[np.linalg.det(cov) < 0, 1] = -1.0                          # reflection → rotation
+
+    rotation = np.einsum('kij,kj,kjl->kil', u, d, vt)
+    src_var = (src_demean ** 2).sum(axis=(1, 2)) / num
+    degenerate = src_var <= 0
+    scale = (sigma * d).sum(axis=1) / np.where(degenerate, 1.0, src_var)
+    translation = dst_mean - scale[:, None] * np.einsum('kij,kj->ki', rotation, src_mean)
+
+    matrices = np.concatenate([scale[:, None, None] * rotation, translation[:, :, None]], axis=2)
+    matrices[degenerate] = np.nan
+    return matrices
+
+
+# ---------------------------------------------------------------------------
+# YOLOv8 on-chip NMS output decoding
+# ---------------------------------------------------------------------------
+# One row per detection; bbox is x1, y1, x2, y2 in original image pixels
+DETECTION_DTYPE = np.dtype([
+    ('class_id', np.int16),
+    ('confidence', np.float32),
+    ('bbox', np.float32, (4,)),
+])
+
+
+def decode_yolo_nms(raw, class_ids, min_score, input_size, scale, pad_left, pad_top, orig_shape):
+    """Decode the requested classes of a Hailo NMS-by-class output buffer.
+
+    The buffer is [num_dets, (y1, x1, y2, x2, score) * num_dets] per class,
+    classes in order. Only the per-class counts up to the highest requested
+    class are walked to find segment offsets; each wanted segment is then
+    decoded in one vectorized pass.
+
+    Args:
+        raw: Flat float32 NMS output
+        class_ids: Iterable of class ids to decode
+        min_score: Minimum score kept
+        input_size: (input_h, input_w) of the model
+        scale, pad_left, pad_top: Letterbox parameters used for the frame
+        orig_shape: Original frame shape (h, w, ...)
+
+    Returns:
+        Structured array of DETECTION_DTYPE
+    """
+    raw = np.asarray(raw, dtype=np.float32).reshape(-1)
+    wanted = set(class_ids)
+    segments = []
+    offset = 0
+    for class_id in range(max(wanted) + 1 if wanted else 0):
+        if offset >= raw.size:
+            break
+        start = offset + 1
+        offset = start + 5 * int(raw[offset])
+        if class_id in wanted and offset > start:
+            boxes = raw[start:min(offset, raw.size)]
+            boxes = boxes[:boxes.size - boxes.size % 5].reshape(-1, 5)
+            segments.append((class_id, boxes))
+
+    if not segments:
+        return np.empty(0, dtype=DETECTION_DTYPE)
+
+    rows = np.concatenate([boxes for _, boxes in segments])
+    classes = np.concatenate([np.full(boxes.shape[0], class_id, dtype=np.int16) for class_id, boxes in segments])
+    keep = rows[:, 4] >= min_score
+    rows = rows[keep]
+
+    input_h, input_w = input_size
+    h_orig, w_orig = orig_shape[:2]
+    detections = np.empty(rows.shape[0], dtype=DETECTION_DTYPE)
+    detections['class_id'] = classes[keep]
+    detections['confidence'] = rows[:, 4]
+    bbox = detections['bbox']
+    # Map back to original image coordinates: columns are y1, x1, y2, x2
+    bbox[:, 0::2] = np.clip((rows[:, [1, 3]] * input_w - pad_left) / scale, 0, w_orig - 1)
+    bbox[:, 1::2] = np.clip((rows[:, [0, 2]] * input_h - pad_top) / scale, 0, h_orig - 1)
+    return detections
+
+
+# Person-box zoom (HAILO_FACE_ZOOM)
+ZOOM_HEAD_FRACTION = 0.4     # head crop side >= this fraction of the person box height
+ZOOM_MARGIN = 0.1            # crop enlarged by this fraction of its side on each edge
+ZOOM_MIN_GAIN = 2.0          # skip crops not magnified at least this much vs the full frame
+
+
+def head_crops(person_boxes, frame_shape, model_shape, max_crops):
+    """Square head-region crops at the top of person boxes.
+
+    Each crop is as wide as the person box (at least ZOOM_HEAD_FRACTION of
+    its height), starts just above it, and is clipped to the frame. Crops
+    that SCRFD would not see magnified by ZOOM_MIN_GAIN compared with the
+    full-frame letterbox are dropped, since they add nothing.
+
+    Args:
+        person_boxes: (K, 4) x1, y1, x2, y2 in frame pixels, best first
+        frame_shape: (h, w, ...) of the full-resolution frame
+        model_shape: (model_h, model_w) of SCRFD
+        max_crops: Maximum number of crops returned
+
+    Returns:
+        List of (x0, y0, x1, y1) integer crop rectangles
+    """
+    h, w = frame_shape[:2]
+    model_h, model_w = model_shape
+    frame_scale = min(model_w / w, model_h / h)
+
+    crops = []
+    for x1, y1, x2, y2 in np.asarray(person_boxes, dtype=np.float32).reshape(-1, 4):
+        side = max(x2 - x1, ZOOM_HEAD_FRACTION * (y2 - y1))
+        side *= 1.0 + 2 * ZOOM_MARGIN
+        cx = (x1 + x2) / 2
+        top = y1 - ZOOM_MARGIN * side
+        x0, y0 = int(max(0, cx - side / 2)), int(max(0, top))
+        x1c, y1c = int(min(w, cx + side / 2)), int(min(h, top + side))
+        if x1c - x0 < 8 or y1c - y0 < 8:
+            continue
+        crop_scale = min(model_w / (x1c - x0), model_h / (y1c - y0))
+        if crop_scale < ZOOM_MIN_GAIN * frame_scale:
+            continue
+        crops.append((x0, y0, x1c, y1c))
+        if len(crops) >= max_crops:
+            break
+    return crops
+
+
+def persons_in_roi(persons, roi, frame_shape):
+    """Return True if any person box overlaps the ROI.
+
+    Args:
+        persons: Structured array of DETECTION_DTYPE
+        roi: (x1, y1, x2, y2) as fractions of the frame
+        frame_shape: (h, w, ...) of the frame the boxes are in
+    """
+    if len(persons) == 0:
+        return False
+    h, w = frame_shape[:2]
+    bbox = persons['bbox']
+    overlap_w = np.minimum(bbox[:, 2], roi[2] * w) - np.maximum(bbox[:, 0], roi[0] * w)
+    overlap_h = np.minimum(bbox[:, 3], roi[3] * h) - np.maximum(bbox[:, 1], roi[1] * h)
+    return bool(np.any((overlap_w > 0) & (overlap_h > 0)))
+
+
 # ---------------------------------------------------------------------------
 # HailoYoloApp — YOLOv8n person detection (UC8)
 # ---------------------------------------------------------------------------
@@ -110,7 +650,7 @@ class HailoYoloApp:
 
     PERSON_CLASS_ID = 0
 
-    def __init__(self, vdevice, hef_path, score_threshold=0.5):
+    def __init__(self, vdevice, hef_path, score_threshold=0.5, watchdog=None, device_label=''):
         """
         Initialize YOLOv8n person detector.
 
@@ -118,6 +658,8 @@ class HailoYoloApp:
             vdevice: Shared Hailo VDevice
             hef_path: Path to YOLOv8n HEF model
             score_threshold: Minimum confidence for person detection
+            watchdog: Optional InferenceWatchdog of the VDevice
+            device_label: Device label prefixed to the telemetry name (shard mode)
         """
         self.hef_path = hef_path
         self.score_threshold = score_threshold
@@ -127,6 +669,8 @@ class HailoYoloApp:
         for output_info in self.infer_model.hef.get_output_vstream_infos():
             self.infer_model.output(output_info.name).set_format_type(FormatType.FLOAT32)
         self.configured = self.infer_model.configure()
+        self.bindings = BindingPool(self.configured, self.infer_model, name=_pool_name(device_label, 'yolo'),
+                                    watchdog=watchdog)
 
         inp = self.infer_model.input()
         self.input_h = int(inp.shape[0])
@@ -138,26 +682,38 @@ class HailoYoloApp:
         logger.info(f"YOLOv8n initialized: {self.input_h}x{self.input_w}, "
                     f"outputs={len(self.output_names)}")
 
+    def detect(self, img, class_ids=(PERSON_CLASS_ID,), threshold=None):
+        """
+        Detect objects of the given COCO classes in BGR image.
+
+        Args:
+            img: BGR numpy array (H, W, 3) uint8, or a FramePreprocessContext
+            class_ids: COCO class ids to decode (default: person only)
+            threshold: Optional override for score_threshold
+
+        Returns:
+            Structured array of DETECTION_DTYPE (class_id, confidence, bbox)
+        """
+        # A lower override never admits boxes under score_threshold
+        min_score = max(self.score_threshold, threshold) if threshold is not None else self.score_threshold
+        frame = as_frame_context(img)
+        with self.bindings.slot() as slot:
+            scale, pad_left, pad_top = self._preprocess(frame, slot.input)
+            outputs = self._run_inference(slot)
+            return self._decode_hailo_nms(outputs, scale, pad_left, pad_top, frame.shape, class_ids, min_score)
+
     def detect_persons(self, img, threshold=None):
         """
         Detect persons in BGR image.
 
         Args:
-            img: BGR numpy array (H, W, 3) uint8
+            img: BGR numpy array (H, W, 3) uint8, or a FramePreprocessContext
             threshold: Optional override for score_threshold
 
         Returns:
-            List of person detections with bbox, confidence
+            Structured array of DETECTION_DTYPE person detections
         """
-        thresh = threshold if threshold is not None else self.score_threshold
-        rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        if not rgb.flags['C_CONTIGUOUS']:
-            rgb = np.ascontiguousarray(rgb)
-        preprocessed, scale, pad_left, pad_top = self._preprocess(rgb)
-        outputs = self._run_inference(preprocessed)
-        detections = self._decode_hailo_nms(outputs, scale, pad_left, pad_top, img.shape)
-        return [d for d in detections if d['class_id'] == self.PERSON_CLASS_ID
-                and d['confidence'] >= thresh]
+        return self.detect(img, (self.PERSON_CLASS_ID,), threshold)
 
     def count_persons(self, img, threshold=None):
         """
@@ -173,78 +729,28 @@ class HailoYoloApp:
         persons = self.detect_persons(img, threshold)
         return len(persons)
 
-    def _preprocess(self, image):
-        """Resize with aspect ratio, pad to model input size (letterbox)."""
-        h, w = image.shape[:2]
-        scale = min(self.input_w / w, self.input_h / h)
-        new_w, new_h = int(w * scale), int(h * scale)
-
-        resized = cv2.resize(image, (new_w, new_h))
-        padded = np.full((self.input_h, self.input_w, 3), 114, dtype=np.uint8)
-        top = (self.input_h - new_h) // 2
-        left = (self.input_w - new_w) // 2
-        padded[top:top + new_h, left:left + new_w] = resized
+    def _preprocess(self, frame, out):
+        """Letterbox into the bound input buffer (pad value 114)."""
+        return frame.letterbox_into(out, YOLO_PAD_VALUE)
 
-        return padded, scale, left, top
+    def _run_inference(self, slot, job=None):
+        """Run YOLOv8n inference on Hailo-8, or finish a job already submitted on slot."""
+        if job is None:
+            return self.bindings.run(slot)
+        return self.bindings.wait(slot, job)
 
-    def _run_inference(self, preprocessed):
-        """Run YOLOv8n inference on Hailo-8."""
-        output_buffers = {
-            info.name: np.empty(info.shape, dtype=np.float32)
-            for info in self.infer_model.outputs
-        }
-        bindings = self.configured.create_bindings(output_buffers=output_buffers)
-        bindings.input().set_buffer(preprocessed)
-        job = self.configured.run_async([bindings], lambda *args, **kwargs: None)
-        job.wait(10000)
-        return output_buffers
-
-    def _decode_hailo_nms(self, outputs, scale, pad_left, pad_top, orig_shape):
+    def _decode_hailo_nms(self, outputs, scale, pad_left, pad_top, orig_shape,
+                          class_ids=(PERSON_CLASS_ID,), min_score=None):
         """
         Decode YOLOv8n NMS output format.
 
         YOLOv8n with on-chip NMS outputs:
         [num_dets, [y1, x1, y2, x2, score] * num_dets] per class
         """
-        output_name = self.output_names[0]
-        raw = outputs[output_name].flatten().astype(np.float32)
-        detections = []
-        offset = 0
-
-        for class_id in range(self.num_classes):
-            if offset >= len(raw):
-                break
-            num_dets = int(raw[offset])
-            offset += 1
-
-            for _ in range(num_dets):
-                if offset + 5 > len(raw):
-                    break
-                y_min, x_min, y_max, x_max, score = raw[offset:offset + 5]
-                offset += 5
-
-                if score < self.score_threshold:
-                    continue
-
-                # Map back to original image coordinates
-                x1 = (x_min * self.input_w - pad_left) / scale
-                y1 = (y_min * self.input_h - pad_top) / scale
-                x2 = (x_max * self.input_w - pad_left) / scale
-                y2 = (y_max * self.input_h - pad_top) / scale
-
-                h_orig, w_orig = orig_shape[:2]
-                x1 = max(0, min(x1, w_orig - 1))
-                y1 = max(0, min(y1, h_orig - 1))
-                x2 = max(0, min(x2, w_orig - 1))
-                y2 = max(0, min(y2, h_orig - 1))
-
-                detections.append({
-                    'class_id': class_id,
-                    'confidence': float(score),
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)],
-                })
-
-        return detections
+        return decode_yolo_nms(
+            outputs[self.output_names[0]], class_ids,
+            self.score_threshold if min_score is None else min_score,
+            (self.input_h, self.input_w), scale, pad_left, pad_top, orig_shape)
 
 
 # ---------------------------------------------------------------------------
@@ -278,6 +784,8 @@ class HailoUC8App:
     - get(): Detect faces and extract embeddings (same as HailoFaceApp)
     - count_persons(): Count persons in frame (UC8 continuous)
     - Session state: max_simultaneous_persons tracking
+    - Watchdog: re-initializes the VDevice and models after repeated job
+      failures, dropping frames meanwhile
     """
 
     def __init__(self,
@@ -286,7 +794,9 @@ class HailoUC8App:
                  rec_hef_path: str = None,
                  yolo_threshold: float = 0.5,
                  face_threshold: float = 0.5,
-                 nms_threshold: float = 0.4):
+                 nms_threshold: float = 0.4,
+                 device_ids=None,
+                 device_label: str = ''):
         """
         Initialize combined UC8 + face recognition app.
 
@@ -297,30 +807,35 @@ class HailoUC8App:
             yolo_threshold: YOLOv8n confidence threshold
             face_threshold: SCRFD confidence threshold
             nms_threshold: NMS IoU threshold
+            device_ids: Physical device IDs the VDevice spans (None: HailoRT default, one device)
+            device_label: Label of this device in shard mode (telemetry and log prefix)
         """
         if not HAILO_AVAILABLE:
             raise RuntimeError("hailo_platform not installed")
 
         # Default HEF paths
         default_model_dir = '/etc/hailo/models' if sys.platform == 'linux' else os.path.join(os.path.dirname(__file__), 'models')
-        self.yolo_hef_path = yolo_hef_path or os.environ.get('HAILO_YOLO_HEF') or os.path.join(default_model_dir, 'yolov8n.hef')
-        self.det_hef_path = det_hef_path or os.environ.get('HAILO_DET_HEF') or os.path.join(default_model_dir, 'scrfd_2.5g.hef')
-        self.rec_hef_path = rec_hef_path or os.environ.get('HAILO_REC_HEF') or os.path.join(default_model_dir, 'arcface_r50.hef')
+        config = runtime_config.current()
+        self.yolo_hef_path = yolo_hef_path or config.hailo_yolo_hef or os.path.join(default_model_dir, 'yolov8n.hef')
+        self.det_hef_path = det_hef_path or config.hailo_det_hef or os.path.join(default_model_dir, 'scrfd_2.5g.hef')
+        self.rec_hef_path = rec_hef_path or config.hailo_rec_hef or os.path.join(default_model_dir, 'arcface_r50.hef')
 
-        logger.info(f"Loading Hailo models: yolo={self.yolo_hef_path}, det={self.det_hef_path}, rec={self.rec_hef_path}")
-        self._init_device()
+        self.yolo_threshold = yolo_threshold
+        self.face_threshold = face_threshold
+        self.nms_threshold = nms_threshold
+        self.device_ids = list(device_ids) if device_ids else None
+        self.device_label = device_label
 
-        # Initialize YOLOv8n
-        self.yolo_app = HailoYoloApp(self.vdevice, self.yolo_hef_path, score_threshold=yolo_threshold)
+        # Watchdog state: frames using the device, and whether it is being re-initialized
+        self.watchdog = InferenceWatchdog(self._start_recovery)
+        self._frames_cond = threading.Condition()
+        self._active_frames = 0
+        self._recovering = False
 
-        # Initialize SCRFD + ArcFace (sharing VDevice)
-        self.face_app = HailoFaceApp(
-            det_hef_path=det_hef_path,
-            rec_hef_path=rec_hef_path,
-            score_threshold=face_threshold,
-            nms_threshold=nms_threshold,
-            vdevice=self.vdevice
-        )
+        logger.info(f"Loading Hailo models: yolo={self.yolo_hef_path}, det={self.det_hef_path}, rec={self.rec_hef_path}")
+        self._load_models()
+        self._swap_lock = threading.Lock()
+        self._swap_thread = None
 
         # Session state for UC8
         self.session_state = {}  # cam_ip -> session state
@@ -329,11 +844,223 @@ class HailoUC8App:
                     f"det={os.path.basename(self.det_hef_path)}, rec={os.path.basename(self.rec_hef_path)}")
 
     def _init_device(self):
-        """Create shared Hailo VDevice."""
+        """Create shared Hailo VDevice (over self.device_ids if given)."""
         params = VDevice.create_params()
         params.scheduling_algorithm = HailoSchedulingAlgorithm.ROUND_ROBIN
-        self.vdevice = VDevice(params)
-        logger.info("Created shared VDevice for UC8 + face recognition")
+        if self.device_ids:
+            params.device_count = len(self.device_ids)
+            self.vdevice = VDevice(params, device_ids=self.device_ids)
+        else:
+            self.vdevice = VDevice(params)
+        hailo_telemetry.set_vdevice(self.vdevice, self.device_label)
+        logger.info(f"Created shared VDevice for UC8 + face recognition"
+                    f"{' on ' + ', '.join(self.device_ids) if self.device_ids else ''}")
+
+    def _load_models(self):
+        """Create the VDevice and configure YOLOv8n, SCRFD and ArcFace on it."""
+        self._init_device()
+
+        # Initialize YOLOv8n
+        self.yolo_app = HailoYoloApp(self.vdevice, self.yolo_hef_path, score_threshold=self.yolo_threshold,
+                                     watchdog=self.watchdog, device_label=self.device_label)
+
+        # Initialize SCRFD + ArcFace (sharing VDevice)
+        self.face_app = HailoFaceApp(
+            det_hef_path=self.det_hef_path,
+            rec_hef_path=self.rec_hef_path,
+            score_threshold=self.face_threshold,
+            nms_threshold=self.nms_threshold,
+            vdevice=self.vdevice,
+            watchdog=self.watchdog,
+            device_label=self.device_label
+        )
+
+    def _release_device(self):
+        """Drop the models and the VDevice so a new VDevice can open the device."""
+        vdevice = self.vdevice
+        self.yolo_app = None
+        self.face_app = None
+        self.vdevice = None
+        hailo_telemetry.set_vdevice(None, self.device_label)
+        gc.collect()
+        release = getattr(vdevice, 'release', None)
+        if release is not None:
+            try:
+                release()
+            except Exception as e:
+                logger.warning(f"Hailo VDevice release failed: {e}")
+
+    # -----------------------------------------------------------------------
+    # Watchdog recovery
+    # -----------------------------------------------------------------------
+    @property
+    def recovering(self):
+        """True while the device is being re-initialized (frames are dropped)."""
+        return self._recovering
+
+    @property
+    def active_frames(self):
+        """Frames currently using the device (HailoShardedApp load metric)."""
+        return self._active_frames
+
+    @contextmanager
+    def _device_frame(self):
+        """Hold the device for one frame; yields False while recovering.
+
+        Recovery waits for frames inside this block to finish before it
+        tears the device down.
+        """
+        with self._frames_cond:
+            available = not self._recovering
+            if available:
+                self._active_frames += 1
+        try:
+            yield available
+        finally:
+            if available:
+                with self._frames_cond:
+                    self._active_frames -= 1
+                    self._frames_cond.notify_all()
+
+    def _start_recovery(self):
+        """InferenceWatchdog trip: re-initialize the device in the background."""
+        with self._frames_cond:
+            if self._recovering:
+                return
+            self._recovering = True
+        hailo_telemetry.recovery_started()
+        threading.Thread(target=self._recover, name="Thread-HailoRecovery", daemon=True).start()
+
+    def _recover(self):
+        started_at = time.time()
+        with self._frames_cond:
+            drained = self._frames_cond.wait_for(lambda: self._active_frames == 0,
+                                                 timeout=2 * JOB_TIMEOUT_MS / 1000)
+        if not drained:
+            logger.warning(f"Hailo recovery: {self._active_frames} frame(s) still on the device, re-initializing anyway")
+        # swap_models() checks _recovering under _swap_lock, so no swap can
+        # start after this; one already running abandons its switch
+        with self._swap_lock:
+            swap_thread = self._swap_thread
+        if swap_thread is not None:
+            swap_thread.join()
+
+        delay = WATCHDOG_RETRY_SEC
+        attempt = 0
+        while True:
+            attempt += 1
+            self._release_device()
+            try:
+                self._load_models()
+                self.face_app.warm_up()
+                break
+            except Exception as e:
+                logger.error(f"Hailo recovery attempt {attempt} failed, retrying in {delay}s: {e}")
+                time.sleep(delay)
+                delay = min(2 * delay, WATCHDOG_RETRY_MAX_SEC)
+
+        self.watchdog.reset()
+        with self._frames_cond:
+            self._recovering = False
+        duration = time.time() - started_at
+        hailo_telemetry.recovery_finished(duration, self.device_label)
+        logger.info(f"Hailo recovery done in {duration:.1f}s after {attempt} attempt(s)")
+
+    def _dropped_frame_result(self, cam_ip):
+        """get() result for a frame dropped during recovery or after a failed job (person history untouched)."""
+        hailo_telemetry.frame_dropped()
+        state = self.session_state.get(cam_ip) if cam_ip else None
+        return [], 0, state['max_simultaneous_persons'] if state else 0
+
+    @property
+    def model(self):
+        """ModelDescriptor of the SCRFD/ArcFace set currently serving frames."""
+        face_app = self.face_app
+        if face_app is None:    # being re-initialized
+            return ModelDescriptor.from_paths(self.det_hef_path, self.rec_hef_path)
+        return face_app.model
+
+    def swap_models(self, det_hef_path=None, rec_hef_path=None, prepare=None):
+        """Load a new SCRFD/ArcFace HEF set in the background and switch to it.
+
+        The new models are configured on the shared VDevice next to the
+        running ones, warmed up, and then replace self.face_app in one
+        assignment; frames already in flight finish on the old models.
+        YOLOv8n is not affected.
+
+        Args:
+            det_hef_path: SCRFD HEF (None keeps the current one)
+            rec_hef_path: ArcFace HEF (None keeps the current one)
+            prepare: Optional callable(old_model, new_face_app), run after
+                     warm-up and before the switch (e.g. gallery re-encode).
+                     It may return a callable that is run right after the
+                     switch; if it raises, the swap is abandoned.
+
+        Returns:
+            True if the swap was started, False if one is already running
+        """
+        with self._swap_lock:
+            if self._swap_thread is not None and self._swap_thread.is_alive():
+                logger.warning("Hailo model swap already in progress, ignoring request")
+                return False
+            if self._recovering:
+                logger.warning("Hailo device is being re-initialized, ignoring model swap request")
+                return False
+            self._swap_thread = threading.Thread(
+                target=self._swap_models,
+                args=(det_hef_path or self.det_hef_path, rec_hef_path or self.rec_hef_path, prepare),
+                name="Thread-HailoModelSwap", daemon=True)
+            self._swap_thread.start()
+            return True
+
+    def _swap_models(self, det_hef_path, rec_hef_path, prepare):
+        old_model = self.model
+        logger.info(f"Hailo model swap: det={os.path.basename(det_hef_path)}, rec={os.path.basename(rec_hef_path)}")
+        started_at = time.time()
+        try:
+            new_app = self._build_face_app(det_hef_path, rec_hef_path)
+            commit = prepare(old_model, new_app) if prepare is not None else None
+        except Exception as e:
+            logger.error(f"Hailo model swap failed, keeping {os.path.basename(old_model.rec_hef_path)}: {e}")
+            traceback.print_exc()
+            return
+
+        with self._frames_cond:
+            # A recovery started meanwhile reloads the old set; never switch to
+            # models configured on the VDevice it is about to tear down
+            switched = not self._recovering
+            if switched:
+                self._switch_face_app(new_app)
+        if not switched:
+            logger.warning(f"Hailo model swap abandoned, device is being re-initialized with "
+                           f"{os.path.basename(old_model.rec_hef_path)}")
+            return
+        logger.info(f"Hailo model swap done in {time.time() - started_at:.1f}s: "
+                    f"{old_model.embedding_space} -> {new_app.model.embedding_space}")
+        if commit is not None:
+            try:
+                commit()
+            except Exception as e:
+                logger.error(f"Hailo model swap: post-switch step failed: {e}")
+
+    def _build_face_app(self, det_hef_path, rec_hef_path):
+        """Configure and warm up a SCRFD/ArcFace set next to the running one."""
+        new_app = HailoFaceApp(
+            det_hef_path=det_hef_path,
+            rec_hef_path=rec_hef_path,
+            score_threshold=self.face_threshold,
+            nms_threshold=self.nms_threshold,
+            vdevice=self.vdevice,
+            watchdog=self.watchdog,
+            device_label=self.device_label
+        )
+        new_app.warm_up()
+        return new_app
+
+    def _switch_face_app(self, new_app):
+        """Serve new frames from new_app; frames in flight finish on the old one."""
+        self.face_app = new_app
+        self.det_hef_path, self.rec_hef_path = new_app.det_hef_path, new_app.rec_hef_path
 
     def _get_session_state(self, cam_ip):
         """Get or create session state for a camera."""
@@ -342,6 +1069,8 @@ class HailoUC8App:
                 'max_simultaneous_persons': 0,
                 'person_count_history': deque(maxlen=100),  # Last 100 frames
                 'frame_count': 0,
+                'cascade_skipped_run': 0,     # consecutive frames without face models
+                'cascade_skipped_total': 0,
             }
         return self.session_state[cam_ip]
 
@@ -361,10 +1090,15 @@ class HailoUC8App:
         frames_to_check = frames[:gate_frames]
         person_detections = 0
 
-        for frame in frames_to_check:
-            persons = self.yolo_app.detect_persons(frame)
-            if len(persons) > 0:
-                person_detections += 1
+        with self._device_frame() as available:
+            if not available:
+                # Fail open: do not block a session on a device that is recovering
+                logger.warning("UC8 Gate check skipped: Hailo device re-initializing → PASSED")
+                return True
+            for frame in frames_to_check:
+                persons = self.yolo_app.detect_persons(frame)
+                if len(persons) > 0:
+                    person_detections += 1
 
         passed = person_detections >= min_detections
         logger.info(f"UC8 Gate check: {person_detections}/{len(frames_to_check)} frames with person, "
@@ -376,16 +1110,24 @@ class HailoUC8App:
         UC8 Role 2: Count persons in frame and update session state.
 
         Args:
-            img: BGR numpy array
+            img: BGR numpy array, or a FramePreprocessContext
             cam_ip: Camera IP for session state tracking
 
         Returns:
             Tuple of (person_count, max_simultaneous_persons)
         """
-        persons = self.yolo_app.detect_persons(img)
-        person_count = len(persons)
-
-        # Update session state
+        with self._device_frame() as available:
+            if not available:
+                return self._dropped_frame_result(cam_ip)[1:]
+            try:
+                persons = self.yolo_app.detect_persons(img)
+            except Exception as e:
+                logger.error(f"{cam_ip} Hailo inference failed, dropping frame: {e}")
+                return self._dropped_frame_result(cam_ip)[1:]
+        return self._record_person_count(len(persons), cam_ip)
+
+    def _record_person_count(self, person_count, cam_ip):
+        """Update UC8 session state with one frame's person count."""
         if cam_ip:
             state = self._get_session_state(cam_ip)
             state['frame_count'] += 1
@@ -408,16 +1150,105 @@ class HailoUC8App:
             det_size: Detection input size (ignored, uses HEF model size)
 
         Returns:
-            Tuple of (faces, person_count, max_simultaneous_persons)
+            Tuple of (faces, person_count, max_simultaneous_persons); while the
+            watchdog re-initializes the device, or if an inference job fails,
+            the frame is dropped ([], 0, max)
         """
-        # Count persons first (UC8 Role 2)
-        person_count, max_simultaneous = self.count_persons(img, cam_ip)
+        with self._device_frame() as available:
+            if not available:
+                return self._dropped_frame_result(cam_ip)
+            try:
+                return self._get(img, cam_ip, max_num, det_size)
+            except Exception as e:
+                logger.error(f"{cam_ip} Hailo inference failed, dropping frame: {e}")
+                return self._dropped_frame_result(cam_ip)
+
+    def _get(self, img, cam_ip, max_num, det_size):
+        yolo_app, face_app = self.yolo_app, self.face_app
+        t0 = time.time()
+
+        # One RGB conversion and (for equal input sizes) one resize for both models
+        frame = FramePreprocessContext(img, consumers=2)
+
+        config = runtime_config.current().for_camera(cam_ip)
+        # Only camera frames are gated; a registration photo (/recognise,
+        # cam_ip None) always runs the face models
+        if config.hailo_face_cascade != 'off' and cam_ip is not None:
+            return self._get_cascade(frame, config, cam_ip, max_num, det_size)
+
+        # Submit YOLOv8n (UC8 Role 2) and SCRFD (UC1/3/4/5) back to back so the
+        # ROUND_ROBIN scheduler interleaves them; SCRFD preprocessing overlaps
+        # with YOLOv8n inference
+        with yolo_app.bindings.slot() as yolo_slot, face_app.det_bindings.slot() as det_slot:
+            yolo_scale, yolo_left, yolo_top = yolo_app._preprocess(frame, yolo_slot.input)
+            yolo_job = yolo_app.bindings.submit(yolo_slot)
+            det_scale, (det_left, det_top) = face_app._preprocess_detection(frame, det_slot.input)
+            det_job = face_app._submit_detection(det_slot)
+            t1 = time.time()
+
+            persons = yolo_app._decode_hailo_nms(yolo_app._run_inference(yolo_slot, yolo_job),
+                                                 yolo_scale, yolo_left, yolo_top, frame.shape)
+            det_results = face_app._run_detection(det_slot, det_job)
+            boxes, scores, landmarks = face_app._postprocess_detection(det_results, det_scale, det_left, det_top,
+                                                                       frame.shape)
+        boxes, scores, landmarks = self._add_zoomed_faces(frame, persons, (boxes, scores, landmarks), config)
+        t2 = time.time()
+
+        logger.debug(f"HailoUC8App.get timing: preprocess={1000*(t1-t0):.1f}ms, "
+                     f"yolo+scrfd={1000*(t2-t1):.1f}ms, persons={len(persons)}, boxes={len(boxes)}")
+        latency_metrics.record(latency_metrics.STAGE_PREPROCESS, t1 - t0, cam_ip)
+        latency_metrics.record(latency_metrics.STAGE_DETECTION, t2 - t1, cam_ip)
+
+        person_count, max_simultaneous = self._record_person_count(len(persons), cam_ip)
+        faces = face_app.recognize(frame, boxes, scores, landmarks, max_num=max_num, cam_ip=cam_ip)
+
+        return faces, person_count, max_simultaneous
+
+    def _get_cascade(self, frame, config, cam_ip, max_num, det_size):
+        """get() with face models gated on YOLOv8n (HAILO_FACE_CASCADE person/roi).
 
-        # Detect faces (UC1/3/4/5)
-        faces = self.face_app.get(img, max_num=max_num, det_size=det_size)
+        YOLOv8n runs first; SCRFD+ArcFace run only if a person is present
+        (in 'roi' mode: a person box overlaps DOOR_ROI), or as a keep-alive
+        after HAILO_CASCADE_KEEPALIVE_FRAMES consecutive skipped frames.
+        Camera frames only (cam_ip set).
+        """
+        persons = self.yolo_app.detect_persons(frame)
+        person_count, max_simultaneous = self._record_person_count(len(persons), cam_ip)
 
+        if config.hailo_face_cascade == 'roi' and config.door_roi is not None:
+            admitted = persons_in_roi(persons, config.door_roi, frame.shape)
+        else:
+            admitted = person_count > 0
+
+        state = self._get_session_state(cam_ip) if cam_ip else None
+        if not admitted:
+            keepalive = config.hailo_cascade_keepalive_frames
+            skipped = state['cascade_skipped_run'] + 1 if state else 0
+            if not (keepalive > 0 and skipped > keepalive):
+                if state:
+                    state['cascade_skipped_run'] = skipped
+                    state['cascade_skipped_total'] += 1
+                return [], person_count, max_simultaneous
+            logger.debug(f"UC8 cascade keep-alive for {cam_ip} after {skipped - 1} skipped frames")
+
+        if state:
+            state['cascade_skipped_run'] = 0
+        face_app = self.face_app
+        detections = self._add_zoomed_faces(frame, persons, face_app.detect(frame, cam_ip=cam_ip), config)
+        faces = face_app.recognize(frame, *detections, max_num=max_num, cam_ip=cam_ip)
         return faces, person_count, max_simultaneous
 
+    def _add_zoomed_faces(self, frame, persons, detections, config):
+        """Merge SCRFD results on person head crops into the full-frame ones (HAILO_FACE_ZOOM)."""
+        if not config.hailo_face_zoom or len(persons) == 0:
+            return detections
+        person_boxes = persons['bbox'][np.argsort(-persons['confidence'])]
+        zoomed = self.face_app.detect_zoomed(frame, person_boxes, config.hailo_zoom_max_crops)
+        if len(zoomed[0]) == 0:
+            return detections
+        logger.debug(f"UC8 zoom: {len(zoomed[0])} faces in head crops, {len(detections[0])} in full frame")
+        return self.face_app.merge_detections(detections, zoomed)
+
     def get_extend_check(self, cam_ip, min_detections=3, lookback_frames=10):
         """
         UC8 Role 3: Extend check - query person detection history.
@@ -456,6 +1287,7 @@ class HailoUC8App:
         return {
             'max_simultaneous_persons': state['max_simultaneous_persons'],
             'frame_count': state['frame_count'],
+            'cascade_skipped_frames': state['cascade_skipped_total'],
             'avg_person_count': np.mean(state['person_count_history']) if state['person_count_history'] else 0,
         }
 
@@ -464,7 +1296,8 @@ class HailoUC8App:
         if cam_ip in self.session_state:
             state = self.session_state[cam_ip]
             logger.info(f"UC8 Session end for {cam_ip}: max_simultaneous={state['max_simultaneous_persons']}, "
-                        f"frames={state['frame_count']}, avg_persons={np.mean(state['person_count_history']) if state['person_count_history'] else 0:.2f}")
+                        f"frames={state['frame_count']}, avg_persons={np.mean(state['person_count_history']) if state['person_count_history'] else 0:.2f}, "
+                        f"cascade_skipped={state['cascade_skipped_total']}")
             del self.session_state[cam_ip]
 
     def cleanup(self):
@@ -473,6 +1306,235 @@ class HailoUC8App:
             del self.vdevice
 
 
+# ---------------------------------------------------------------------------
+# Multiple Hailo devices — HAILO_DEVICE_MODE single / vdevice / shard
+# ---------------------------------------------------------------------------
+def hailo_device_ids():
+    """Physical Hailo devices to use: HAILO_DEVICE_IDS, or all devices found."""
+    configured = runtime_config.current().hailo_device_ids
+    if configured:
+        return list(configured)
+    try:
+        return [str(device_id) for device_id in Device.scan()]
+    except Exception as e:
+        logger.error(f"Hailo device scan failed: {e}")
+        return []
+
+
+def create_hailo_app(**kwargs):
+    """Create the Hailo app for HAILO_DEVICE_MODE.
+
+    Args:
+        **kwargs: HailoUC8App arguments (HEF paths, thresholds)
+
+    Returns:
+        HailoUC8App ('single', or 'vdevice' over all devices) or
+        HailoShardedApp ('shard'); both fall back to one device
+    """
+    mode = runtime_config.current().hailo_device_mode
+    device_ids = hailo_device_ids() if mode != 'single' else []
+    if mode == 'single' or len(device_ids) < 2:
+        if mode != 'single':
+            logger.warning(f"HAILO_DEVICE_MODE={mode} but {len(device_ids)} Hailo device(s) found, using one")
+        return HailoUC8App(device_ids=device_ids[:1] or None, **kwargs)
+
+    logger.info(f"HAILO_DEVICE_MODE={mode}: {len(device_ids)} Hailo devices ({', '.join(device_ids)})")
+    if mode == 'vdevice':
+        return HailoUC8App(device_ids=device_ids, **kwargs)
+    return HailoShardedApp(device_ids, **kwargs)
+
+
+class HailoShardedApp:
+    """
+    One HailoUC8App per physical Hailo device, cameras sharded between them.
+
+    Each shard has its own VDevice, YOLOv8n/SCRFD/ArcFace set and watchdog,
+    so a core can serve more cameras than one NPU sustains (and a failing
+    module only re-initializes itself). A camera is pinned to a shard on its
+    first frame and stays there until reset_session() (end of its session),
+    so UC8 person history stays on one device; new cameras go to the shard
+    with the fewest pinned cameras, then the fewest frames in flight. A
+    camera whose shard is recovering is moved to a healthy one.
+
+    Exposes the HailoUC8App interface; requests without cam_ip (gate check,
+    HTTP face API, gallery re-encode) go to the least busy shard.
+    """
+
+    def __init__(self, device_ids, **kwargs):
+        """
+        Args:
+            device_ids: Physical device IDs, one shard each
+            **kwargs: HailoUC8App arguments (HEF paths, thresholds)
+
+        Raises:
+            RuntimeError: if no device could be opened
+        """
+        self.shards = []
+        for index, device_id in enumerate(device_ids):
+            try:
+                self.shards.append(HailoUC8App(device_ids=[device_id], device_label=f'dev{index}', **kwargs))
+            except Exception as e:
+                logger.error(f"Hailo shard dev{index} ({device_id}) unavailable: {e}")
+                traceback.print_exc()
+        if not self.shards:
+            raise RuntimeError("no Hailo device could be opened")
+
+        self._assignments = {}   # cam_ip -> shard
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._swap_thread = None
+        logger.info(f"HailoShardedApp initialized with {len(self.shards)} shard(s): "
+                    f"{', '.join(shard.device_label for shard in self.shards)}")
+
+    def _shard(self, cam_ip=None):
+        """Shard serving cam_ip, pinning the camera on first use."""
+        with self._lock:
+            healthy = [s for s in self.shards if not s.recovering] or self.shards
+            shard = self._assignments.get(cam_ip) if cam_ip else None
+            if shard in healthy:
+                return shard
+
+            cameras = {s: 0 for s in self.shards}
+            for assigned in self._assignments.values():
+                cameras[assigned] += 1
+            if not cam_ip:
+                return min(healthy, key=lambda s: (s.active_frames, cameras[s]))
+
+            chosen = min(healthy, key=lambda s: (cameras[s], s.active_frames))
+            if shard is not None:
+                logger.warning(f"Hailo shard {shard.device_label} recovering, moving {cam_ip} to {chosen.device_label}")
+            else:
+                logger.info(f"Hailo shard {chosen.device_label} assigned to {cam_ip}")
+            self._assignments[cam_ip] = chosen
+            return chosen
+
+    def _assigned(self, cam_ip):
+        with self._lock:
+            return self._assignments.get(cam_ip)
+
+    @property
+    def recovering(self):
+        """True while every shard is being re-initialized."""
+        return all(shard.recovering for shard in self.shards)
+
+    @property
+    def model(self):
+        """ModelDescriptor of the SCRFD/ArcFace set (the same on every shard)."""
+        return self.shards[0].model
+
+    def get(self, img, cam_ip=None, max_num=0, det_size=(640, 640)):
+        """HailoUC8App.get() on the camera's shard."""
+        return self._shard(cam_ip).get(img, cam_ip=cam_ip, max_num=max_num, det_size=det_size)
+
+    def count_persons(self, img, cam_ip=None):
+        """HailoUC8App.count_persons() on the camera's shard."""
+        return self._shard(cam_ip).count_persons(img, cam_ip=cam_ip)
+
+    def gate_check(self, frames, min_detections=3, gate_frames=10):
+        """HailoUC8App.gate_check() on the least busy shard."""
+        return self._shard().gate_check(frames, min_detections=min_detections, gate_frames=gate_frames)
+
+    def get_extend_check(self, cam_ip, min_detections=3, lookback_frames=10):
+        shard = self._assigned(cam_ip)
+        if shard is None:
+            return False
+        return shard.get_extend_check(cam_ip, min_detections=min_detections, lookback_frames=lookback_frames)
+
+    def get_session_stats(self, cam_ip):
+        shard = self._assigned(cam_ip)
+        if shard is None:
+            return {'max_simultaneous_persons': 0, 'frame_count': 0}
+        return shard.get_session_stats(cam_ip)
+
+    def reset_session(self, cam_ip):
+        """End the camera's session and unpin it, so its next session is placed by load."""
+        with self._lock:
+            shard = self._assignments.pop(cam_ip, None)
+        for s in self.shards:
+            if s is shard or cam_ip in s.session_state:
+                s.reset_session(cam_ip)
+
+    def swap_models(self, det_hef_path=None, rec_hef_path=None, prepare=None):
+        """HailoUC8App.swap_models() across all shards.
+
+        The new set is loaded and warmed up on every shard first; prepare
+        runs once (with the first shard's new app) and the shards then
+        switch together, so no camera sees the old gallery with the new
+        model or the other way round.
+
+        Returns:
+            True if the swap was started, False if one is already running
+        """
+        with self._swap_lock, ExitStack() as stack:
+            # Shard recoveries read their _swap_thread under the shard's lock
+            for shard in self.shards:
+                stack.enter_context(shard._swap_lock)
+            if self._swap_thread is not None and self._swap_thread.is_alive():
+                logger.warning("Hailo model swap already in progress, ignoring request")
+                return False
+            if any(shard.recovering for shard in self.shards):
+                logger.warning("A Hailo device is being re-initialized, ignoring model swap request")
+                return False
+            first = self.shards[0]
+            self._swap_thread = threading.Thread(
+                target=self._swap_models,
+                args=(det_hef_path or first.det_hef_path, rec_hef_path or first.rec_hef_path, prepare),
+                name="Thread-HailoModelSwap", daemon=True)
+            for shard in self.shards:
+                shard._swap_thread = self._swap_thread   # recovery waits for the swap
+            self._swap_thread.start()
+            return True
+
+    def _swap_models(self, det_hef_path, rec_hef_path, prepare):
+        old_model = self.model
+        logger.info(f"Hailo model swap on {len(self.shards)} shards: det={os.path.basename(det_hef_path)}, "
+                    f"rec={os.path.basename(rec_hef_path)}")
+        started_at = time.time()
+        try:
+            new_apps = [shard._build_face_app(det_hef_path, rec_hef_path) for shard in self.shards]
+            commit = prepare(old_model, new_apps[0]) if prepare is not None else None
+        except Exception as e:
+            logger.error(f"Hailo model swap failed, keeping {os.path.basename(old_model.rec_hef_path)}: {e}")
+            traceback.print_exc()
+            return
+
+        with ExitStack() as stack:
+            for shard in self.shards:
+                stack.enter_context(shard._frames_cond)
+            # All shards switch or none does (see HailoUC8App._swap_models)
+            switched = not any(shard.recovering for shard in self.shards)
+            if switched:
+                for shard, new_app in zip(self.shards, new_apps):
+                    shard._switch_face_app(new_app)
+        if not switched:
+            logger.warning(f"Hailo model swap abandoned, a device is being re-initialized with "
+                           f"{os.path.basename(old_model.rec_hef_path)}")
+            return
+        logger.info(f"Hailo model swap done in {time.time() - started_at:.1f}s: "
+                    f"{old_model.embedding_space} -> {new_apps[0].model.embedding_space}")
+        if commit is not None:
+            try:
+                commit()
+            except Exception as e:
+                logger.error(f"Hailo model swap: post-switch step failed: {e}")
+
+    def shard_stats(self):
+        """Flat {key: number} per-shard load for latency_metrics.register_gauges()."""
+        with self._lock:
+            assigned = list(self._assignments.values())
+        stats = {'shards': len(self.shards)}
+        for shard in self.shards:
+            stats[f'{shard.device_label}_cameras'] = sum(1 for s in assigned if s is shard)
+            stats[f'{shard.device_label}_active_frames'] = shard.active_frames
+            stats[f'{shard.device_label}_recovering'] = int(shard.recovering)
+        return stats
+
+    def cleanup(self):
+        """Clean up every shard's VDevice."""
+        for shard in self.shards:
+            shard.cleanup()
+
+
 # ---------------------------------------------------------------------------
 # HailoFaceApp — SCRFD + ArcFace on Hailo-8
 # ---------------------------------------------------------------------------
@@ -487,6 +1549,9 @@ class HailoFaceApp:
     Each returned face has .bbox (ndarray) and .embedding (ndarray 512-dim).
     """
 
+    # SCRFD candidates kept (by score) before NMS
+    PRE_NMS_TOPK = 200
+
     # ArcFace canonical destination landmarks (112x112 coordinate space)
     DEST_LANDMARKS = np.array([
         [38.2946, 51.6963],
@@ -501,7 +1566,9 @@ class HailoFaceApp:
                  rec_hef_path: str = None,
                  score_threshold: float = 0.5,
                  nms_threshold: float = 0.4,
-                 vdevice=None):
+                 vdevice=None,
+                 watchdog=None,
+                 device_label=''):
         """
         Args:
             det_hef_path: Path to SCRFD HEF (default: env HAILO_DET_HEF or models/scrfd_10g.hef)
@@ -509,6 +1576,8 @@ class HailoFaceApp:
             score_threshold: Minimum detection confidence
             nms_threshold: NMS IoU threshold
             vdevice: Optional shared VDevice (if None, creates new one)
+            watchdog: Optional InferenceWatchdog of the shared VDevice
+            device_label: Device label prefixed to the telemetry names (shard mode)
         """
         if not HAILO_AVAILABLE:
             raise RuntimeError("hailo_platform not installed")
@@ -517,15 +1586,18 @@ class HailoFaceApp:
         # Available detection models: scrfd_10g.hef, scrfd_2.5g.hef
         # Available recognition models: arcface_r50.hef, arcface_mobilefacenet.hef
         default_model_dir = '/etc/hailo/models' if sys.platform == 'linux' else os.path.join(os.path.dirname(__file__), 'models')
-        self.det_hef_path = det_hef_path or os.environ.get(
-            'HAILO_DET_HEF') or os.path.join(default_model_dir, 'scrfd_2.5g.hef')
-        self.rec_hef_path = rec_hef_path or os.environ.get(
-            'HAILO_REC_HEF') or os.path.join(default_model_dir, 'arcface_r50.hef')
+        config = runtime_config.current()
+        self.det_hef_path = det_hef_path or config.hailo_det_hef or os.path.join(default_model_dir, 'scrfd_2.5g.hef')
+        self.rec_hef_path = rec_hef_path or config.hailo_rec_hef or os.path.join(default_model_dir, 'arcface_r50.hef')
 
         self.score_threshold = score_threshold
         self.nms_threshold = nms_threshold
+        self.watchdog = watchdog
+        self.device_label = device_label
         self.strides = [8, 16, 32]
         self.num_anchors = 2
+        self._zoom_lock = threading.Lock()
+        self._rec_batch_lock = threading.Lock()
 
         logger.info(f"Loading Hailo models: det={self.det_hef_path}, rec={self.rec_hef_path}")
         self._init_device(vdevice)
@@ -545,19 +1617,34 @@ class HailoFaceApp:
             params = VDevice.create_params()
             params.scheduling_algorithm = HailoSchedulingAlgorithm.ROUND_ROBIN
             self.vdevice = VDevice(params)
+            hailo_telemetry.set_vdevice(self.vdevice)
             logger.info("Created new VDevice")
 
-        # Detection model — FLOAT32 output so HailoRT auto-dequantizes (scrfd HEF uses UINT8 input)
+        # Detection model — FLOAT32 output so HailoRT auto-dequantizes (scrfd HEF uses UINT8 input).
+        # HAILO_DET_QUANTIZED_OUTPUTS keeps the raw UINT8 outputs instead: scores are thresholded
+        # in the quantized domain and only surviving anchors are dequantized (_postprocess_detection).
+        # Off by default — host-side dequantization of the landmarks was the cause of Bug #10.
+        self.det_quantized_outputs = runtime_config.current().hailo_det_quantized_outputs
+        det_format, self.det_output_dtype = ((FormatType.UINT8, np.uint8) if self.det_quantized_outputs
+                                             else (FormatType.FLOAT32, np.float32))
         self.det_infer_model = self.vdevice.create_infer_model(self.det_hef_path)
         for output_info in self.det_infer_model.hef.get_output_vstream_infos():
-            self.det_infer_model.output(output_info.name).set_format_type(FormatType.FLOAT32)
+            self.det_infer_model.output(output_info.name).set_format_type(det_format)
         self.det_configured = self.det_infer_model.configure()
+        self.det_bindings = BindingPool(self.det_configured, self.det_infer_model,
+                                        name=_pool_name(self.device_label, 'scrfd'),
+                                        output_dtype=self.det_output_dtype, watchdog=self.watchdog)
+        self._zoom_bindings = None   # created on first zoom use, sized by HAILO_ZOOM_MAX_CROPS
 
         # Recognition model — UINT8 input (matches HEF compiled type), FLOAT32 output (auto-dequantize)
         self.rec_infer_model = self.vdevice.create_infer_model(self.rec_hef_path)
         self.rec_infer_model.input().set_format_type(FormatType.UINT8)
         self.rec_infer_model.output().set_format_type(FormatType.FLOAT32)
         self.rec_configured = self.rec_infer_model.configure()
+        self.rec_bindings = BindingPool(self.rec_configured, self.rec_infer_model,
+                                        size=max(BINDING_POOL_SIZE, REC_BATCH_SIZE),
+                                        name=_pool_name(self.device_label, 'arcface'),
+                                        watchdog=self.watchdog)
 
         # Cache detection input shape
         det_input = self.det_infer_model.input()
@@ -575,6 +1662,8 @@ class HailoFaceApp:
             info.name: (info.quant_info.qp_scale, info.quant_info.qp_zp)
             for info in det_vstream_infos
         }
+        if self.det_quantized_outputs:
+            logger.info("SCRFD outputs kept quantized (UINT8), dequantizing surviving anchors only")
 
         # Extract quantization parameters for recognition outputs
         rec_vstream_infos = self.rec_infer_model.hef.get_output_vstream_infos()
@@ -589,6 +1678,8 @@ class HailoFaceApp:
         # Pre-generate anchors
         self.anchors = self._generate_anchors(self.det_input_shape, self.strides, self.num_anchors)
 
+        self.model = ModelDescriptor.from_paths(self.det_hef_path, self.rec_hef_path)
+
         logger.info(f"HailoFaceApp initialized: det={os.path.basename(self.det_hef_path)}, "
                      f"rec={os.path.basename(self.rec_hef_path)}")
 
@@ -681,41 +1772,146 @@ class HailoFaceApp:
     # ------------------------------------------------------------------
     # Public interface: .get(img, max_num=0, det_size=(640,640))
     # ------------------------------------------------------------------
-    def get(self, img, max_num=0, det_size=(640, 640)):
+    def get(self, img, max_num=0, det_size=(640, 640), cam_ip=None):
         """
         Detect faces and extract embeddings.
 
         Args:
-            img: BGR numpy array (H, W, 3) uint8 — OpenCV format, converted to RGB internally
+            img: BGR numpy array (H, W, 3) uint8 — OpenCV format, converted to RGB internally —
+                 or a FramePreprocessContext shared with YOLOv8n
             max_num: Maximum faces to return (0 = all)
             det_size: Detection input size (ignored, uses HEF model size)
+            cam_ip: Camera IP used to label latency metrics (None for /recognise)
 
         Returns:
             List of HailoFace objects with .bbox, .embedding, .kps, .det_score
         """
-        # --- Detection ---
+        # Hailo HEF models (SCRFD, ArcFace) expect RGB input; the context converts
+        # BGR→RGB once, matching InsightFace which also converts internally
+        frame = as_frame_context(img)
+        boxes, scores, landmarks = self.detect(frame, cam_ip=cam_ip)
+        return self.recognize(frame, boxes, scores, landmarks, max_num=max_num, cam_ip=cam_ip)
+
+    def warm_up(self):
+        """Run SCRFD and ArcFace once on a blank frame before serving.
+
+        The first jobs of a freshly configured model pay for scheduler setup
+        and buffer mapping; doing that here keeps it off the detector thread.
+        """
         t0 = time.time()
+        h, w = self.det_input_shape
+        frame = FramePreprocessContext(np.zeros((h, w, 3), dtype=np.uint8))
+        self.detect(frame)
+        self._extract_embeddings(frame.rgb, [None])
+        logger.info(f"HailoFaceApp warm-up ({self.model.embedding_space}) in {1000 * (time.time() - t0):.0f}ms")
 
-        # Convert BGR to RGB — Hailo HEF models (SCRFD, ArcFace) expect RGB input
-        # This matches InsightFace behavior which also converts BGR→RGB internally
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-        # Ensure input is contiguous (Hailo may require this)
-        if not img.flags['C_CONTIGUOUS']:
-            img = np.ascontiguousarray(img)
-            logger.debug("HailoFaceApp.get: made input array contiguous")
-        preprocessed, scale, (pad_left, pad_top) = self._preprocess_detection(img)
-        t1 = time.time()
-        det_results = self._run_detection(preprocessed)
-        t2 = time.time()
-        boxes, scores, landmarks = self._postprocess_detection(det_results, scale, pad_left, pad_top, img.shape)
+    def detect(self, frame, cam_ip=None):
+        """
+        Run SCRFD on the whole (letterboxed) frame.
+
+        Args:
+            frame: FramePreprocessContext
+            cam_ip: Camera IP used to label latency metrics
+
+        Returns:
+            (boxes (N, 4), scores (N,), landmarks (N, 10)) in original image coords
+        """
+        t0 = time.time()
+        with self.det_bindings.slot() as slot:
+            scale, (pad_left, pad_top) = self._preprocess_detection(frame, slot.input)
+            t1 = time.time()
+            det_results = self._run_detection(slot)
+            t2 = time.time()
+            boxes, scores, landmarks = self._postprocess_detection(det_results, scale, pad_left, pad_top, frame.shape)
         t3 = time.time()
 
         logger.debug(f"HailoFaceApp.get timing: preprocess={1000*(t1-t0):.1f}ms, inference={1000*(t2-t1):.1f}ms, postprocess={1000*(t3-t2):.1f}ms, boxes={len(boxes)}")
+        latency_metrics.record(latency_metrics.STAGE_PREPROCESS, t1 - t0, cam_ip)
+        latency_metrics.record(latency_metrics.STAGE_DETECTION, t3 - t1, cam_ip)
+
+        return boxes, scores, landmarks
+
+    def detect_zoomed(self, frame, person_boxes, max_crops):
+        """
+        Run SCRFD on full-resolution head crops of YOLOv8n person boxes.
+
+        Crops are cut from the original frame, so distant faces reach SCRFD
+        magnified instead of shrunk with the whole frame. All crops are
+        submitted before any is awaited, so they run back to back on the
+        device.
+
+        Args:
+            frame: FramePreprocessContext of the full frame
+            person_boxes: (K, 4) person boxes in frame pixels, best first
+            max_crops: Maximum number of crops (HAILO_ZOOM_MAX_CROPS)
+
+        Returns:
+            (boxes, scores, landmarks) in original image coords
+        """
+        crops = head_crops(person_boxes, frame.shape, self.det_input_shape, max_crops)
+        if not crops:
+            return np.empty((0, 4)), np.empty(0), np.empty((0, 10))
 
+        rgb = frame.rgb
+        results = []
+        with self._zoom_lock:
+            if self._zoom_bindings is None or self._zoom_bindings.size < len(crops):
+                self._zoom_bindings = BindingPool(self.det_configured, self.det_infer_model,
+                                                  size=max(max_crops, len(crops)),
+                                                  name=_pool_name(self.device_label, 'scrfd-zoom'),
+                                                  output_dtype=self.det_output_dtype, watchdog=self.watchdog)
+            pool = self._zoom_bindings
+            with ExitStack() as stack:
+                pending = []
+                try:
+                    for x0, y0, x1, y1 in crops:
+                        slot = stack.enter_context(pool.slot())
+                        crop = FramePreprocessContext.from_rgb(rgb[y0:y1, x0:x1])
+                        scale, (pad_left, pad_top) = self._preprocess_detection(crop, slot.input)
+                        pending.append((slot, pool.submit(slot), scale, pad_left, pad_top, crop.shape, x0, y0))
+
+                    for slot, job, scale, pad_left, pad_top, crop_shape, x0, y0 in pending:
+                        outputs = pool.wait(slot, job)
+                        boxes, scores, kps = self._postprocess_detection(outputs, scale, pad_left, pad_top, crop_shape)
+                        boxes[:, [0, 2]] += x0
+                        boxes[:, [1, 3]] += y0
+                        kps[:, 0::2] += x0
+                        kps[:, 1::2] += y0
+                        results.append((boxes, scores, kps))
+                except Exception:
+                    # Wait out the rest of the wave before its slots are released
+                    pool.discard([(slot, job) for slot, job, *_ in pending if slot.in_flight])
+                    raise
+
+        return tuple(np.concatenate(parts, axis=0) for parts in zip(*results))
+
+    def merge_detections(self, *detections):
+        """Merge (boxes, scores, landmarks) sets in frame coords with NMS."""
+        boxes, scores, landmarks = (np.concatenate(parts, axis=0) for parts in zip(*detections))
+        if len(boxes) == 0:
+            return boxes, scores, landmarks
+        keep = self._nms(boxes, scores, self.nms_threshold)
+        return boxes[keep], scores[keep], landmarks[keep]
+
+    def recognize(self, frame, boxes, scores, landmarks, max_num=0, cam_ip=None):
+        """
+        Extract embeddings for detected faces.
+
+        Args:
+            frame: FramePreprocessContext the faces were detected in
+            boxes, scores, landmarks: SCRFD results in original image coords
+            max_num: Maximum faces to return (0 = all), highest score first
+            cam_ip: Camera IP used to label latency metrics
+
+        Returns:
+            List of HailoFace objects with .bbox, .embedding, .kps, .det_score
+        """
         if len(boxes) == 0:
             return []
 
+        started_at = time.time()
+        img = frame.rgb
+
         # Sort by score descending
         order = scores.argsort()[::-1]
         boxes = boxes[order]
@@ -728,116 +1924,108 @@ class HailoFaceApp:
             landmarks = landmarks[:max_num]
 
         # --- Recognition ---
+        kps = np.asarray(landmarks, dtype=np.float32).reshape(-1, 5, 2)
+        matrices = umeyama_similarity(kps, self.DEST_LANDMARKS)
+        embeddings = self._extract_embeddings(img, matrices)
+
         faces = []
-        for i in range(len(boxes)):
-            kps = landmarks[i].reshape(5, 2) if landmarks[i] is not None else None
-            embedding, pre_norm = self._extract_embedding(img, kps)
+        for i, (embedding, pre_norm) in enumerate(embeddings):
             faces.append(HailoFace(
                 bbox=boxes[i],
                 embedding=embedding,
-                kps=kps,
+                kps=kps[i],
                 det_score=float(scores[i]),
                 pre_norm=pre_norm,
             ))
+        latency_metrics.record(latency_metrics.STAGE_RECOGNITION, time.time() - started_at, cam_ip)
 
         return faces
 
     # ------------------------------------------------------------------
     # Detection: preprocess → infer → postprocess
     # ------------------------------------------------------------------
-    def _preprocess_detection(self, image):
-        """Resize with aspect ratio, pad to model input size."""
-        model_h, model_w = self.det_input_shape
-        h, w = image.shape[:2]
-        scale = min(model_w / w, model_h / h)
-        new_w, new_h = int(w * scale), int(h * scale)
+    def _preprocess_detection(self, frame, out):
+        """Letterbox into the bound input buffer (pad value 0)."""
+        scale, left, top = frame.letterbox_into(out, SCRFD_PAD_VALUE)
+        return scale, (left, top)
 
-        resized = cv2.resize(image, (new_w, new_h))
-        padded = np.zeros((model_h, model_w, 3), dtype=np.uint8)
-        top = (model_h - new_h) // 2
-        left = (model_w - new_w) // 2
-        padded[top:top + new_h, left:left + new_w] = resized
+    def _submit_detection(self, slot):
+        """Start SCRFD inference on slot without waiting; submission errors propagate."""
+        return self.det_bindings.submit(slot)
 
-        return padded, scale, (left, top)
+    def _run_detection(self, slot, job=None):
+        """Run SCRFD inference on Hailo-8, or finish a job already submitted on slot.
 
-    def _run_detection(self, preprocessed):
-        """Run SCRFD inference on Hailo-8."""
-        try:
-            output_buffers = {
-                info.name: np.empty(info.shape, dtype=np.float32)
-                for info in self.det_infer_model.outputs
-            }
-            bindings = self.det_configured.create_bindings(output_buffers=output_buffers)
-            bindings.input().set_buffer(preprocessed)
-            job = self.det_configured.run_async([bindings], lambda *args, **kwargs: None)
-            status = job.wait(10000)
-            logger.debug(f"Hailo detection job completed with status: {status}")
-            return output_buffers
-        except Exception as e:
-            logger.error(f"Hailo _run_detection error: {e}")
-            # Return empty buffers on error
-            return {
-                info.name: np.zeros(info.shape, dtype=np.float32)
-                for info in self.det_infer_model.outputs
-            }
+        Failures (already counted by the watchdog) propagate, so the caller
+        drops the frame instead of decoding empty buffers.
+        """
+        if job is None:
+            return self.det_bindings.run(slot)
+        return self.det_bindings.wait(slot, job)
+
+    def _score_cutoff(self, name):
+        """Score threshold in the units of output `name` (raw quantized levels if UINT8).
+
+        score > t  <=>  (q - zp) * scale > t  <=>  q > floor(t / scale + zp)
+        for integer q and scale > 0.
+        """
+        if not self.det_quantized_outputs:
+            return self.score_threshold
+        qp_scale, qp_zp = self.det_quant_infos[name]
+        return np.floor(self.score_threshold / qp_scale + qp_zp)
+
+    def _output_rows(self, outputs, name, idx, width):
+        """Rows idx of output `name` reshaped to (-1, width), as float32."""
+        rows = outputs[name].reshape(-1, width)[idx]
+        if not self.det_quantized_outputs:
+            return rows
+        qp_scale, qp_zp = self.det_quant_infos[name]
+        return (rows.astype(np.float32) - np.float32(qp_zp)) * np.float32(qp_scale)
 
     def _postprocess_detection(self, outputs, scale, pad_left, pad_top, orig_shape):
-        """Decode SCRFD outputs into boxes, scores, landmarks in original image coords."""
+        """Decode SCRFD outputs into boxes, scores, landmarks in original image coords.
+
+        Per stride only anchors above score_threshold are decoded, in one
+        vectorized step against the precomputed anchor centers. The
+        survivors are cut to the PRE_NMS_TOPK best before NMS, so the cost
+        stays flat in crowded frames.
+
+        With quantized (UINT8) outputs the threshold is applied to the raw
+        score tensor and only the selected score/bbox/kps rows are
+        dequantized.
+        """
         all_boxes = []
         all_scores = []
         all_kps = []
 
         for stride in self.strides:
-            if stride not in self.stride_outputs:
+            layer_names = self.stride_outputs.get(stride)
+            if layer_names is None:
                 continue
 
-            layer_names = self.stride_outputs[stride]
-            current_anchors = self.anchors[stride]
-
-            # Scores — already dequantized by HailoRT (FormatType.FLOAT32)
+            # Scores — dequantized by HailoRT (FormatType.FLOAT32) unless kept quantized
             score_name = layer_names['score']
-            raw_scores = outputs[score_name].flatten().astype(np.float32)
-
-            # Filter by threshold
-            mask = raw_scores > self.score_threshold
-            if not np.any(mask):
+            raw_scores = outputs[score_name].reshape(-1)
+            idx = np.flatnonzero(raw_scores > self._score_cutoff(score_name))
+            if idx.size == 0:
                 continue
 
-            filtered_scores = raw_scores[mask]
-            filtered_anchors = current_anchors[mask]
-
-            # Bbox — already dequantized by HailoRT
-            bbox_name = layer_names['bbox']
-            raw_bbox = outputs[bbox_name].reshape(-1, 4).astype(np.float32)
-            filtered_bbox = raw_bbox[mask]
-
-            # Decode boxes
-            anchor_cx = filtered_anchors[:, 0]
-            anchor_cy = filtered_anchors[:, 1]
+            centers = self.anchors[stride][idx, :2]
             s = float(stride)
 
-            x1 = anchor_cx - filtered_bbox[:, 0] * s
-            y1 = anchor_cy - filtered_bbox[:, 1] * s
-            x2 = anchor_cx + filtered_bbox[:, 2] * s
-            y2 = anchor_cy + filtered_bbox[:, 3] * s
-            decoded_boxes = np.stack([x1, y1, x2, y2], axis=-1)
+            # Bbox distances (left, top, right, bottom) in stride units
+            dist = self._output_rows(outputs, layer_names['bbox'], idx, 4) * s
+            all_boxes.append(np.concatenate([centers - dist[:, :2], centers + dist[:, 2:]], axis=1))
 
-            # Landmarks — already dequantized by HailoRT
+            # Landmarks — 5 (dx, dy) offsets from the anchor center
             kps_name = layer_names.get('kps')
             if kps_name is not None:
-                raw_kps = outputs[kps_name].reshape(-1, 10).astype(np.float32)
-                filtered_kps = raw_kps[mask]
-
-                decoded_kps = np.zeros_like(filtered_kps)
-                for k in range(5):
-                    decoded_kps[:, k * 2] = anchor_cx + filtered_kps[:, k * 2] * s
-                    decoded_kps[:, k * 2 + 1] = anchor_cy + filtered_kps[:, k * 2 + 1] * s
+                kps = self._output_rows(outputs, kps_name, idx, 10).reshape(-1, 5, 2) * s + centers[:, None, :]
+                all_kps.append(kps.reshape(-1, 10))
             else:
-                decoded_kps = np.zeros((len(filtered_scores), 10))
+                all_kps.append(np.zeros((idx.size, 10)))
 
-            all_boxes.append(decoded_boxes)
-            all_scores.append(filtered_scores)
-            all_kps.append(decoded_kps)
+            all_scores.append(self._output_rows(outputs, score_name, idx, 1).reshape(-1))
 
         if len(all_boxes) == 0:
             return np.empty((0, 4)), np.empty(0), np.empty((0, 10))
@@ -846,6 +2034,13 @@ class HailoFaceApp:
         all_scores = np.concatenate(all_scores, axis=0)
         all_kps = np.concatenate(all_kps, axis=0)
 
+        # Top-k before NMS bounds the IoU matrix
+        if all_scores.size > self.PRE_NMS_TOPK:
+            top = np.argpartition(-all_scores, self.PRE_NMS_TOPK - 1)[:self.PRE_NMS_TOPK]
+            all_boxes = all_boxes[top]
+            all_scores = all_scores[top]
+            all_kps = all_kps[top]
+
         # NMS
         keep = self._nms(all_boxes, all_scores, self.nms_threshold)
         boxes = all_boxes[keep]
@@ -866,67 +2061,83 @@ class HailoFaceApp:
         return boxes, scores, kps
 
     def _nms(self, boxes, scores, iou_threshold):
-        """Non-maximum suppression."""
+        """Greedy non-maximum suppression over one batched IoU matrix.
+
+        Returns:
+            Indices of the kept boxes, highest score first
+        """
         if boxes.shape[0] == 0:
-            return []
+            return np.empty(0, dtype=np.intp)
 
-        idxs = scores.argsort()[::-1]
-        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        order = np.argsort(-scores, kind='stable')
+        x1, y1, x2, y2 = (boxes[order, k] for k in range(4))
         area = (x2 - x1) * (y2 - y1)
-        keep = []
 
-        while idxs.size > 0:
-            i = idxs[0]
-            keep.append(i)
-            if idxs.size == 1:
-                break
+        inter_w = np.maximum(0.0, np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]))
+        inter_h = np.maximum(0.0, np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]))
+        intersection = inter_w * inter_h
+        with np.errstate(divide='ignore', invalid='ignore'):
+            suppresses = intersection / (area[:, None] + area[None, :] - intersection) > iou_threshold
 
-            xx1 = np.maximum(x1[i], x1[idxs[1:]])
-            yy1 = np.maximum(y1[i], y1[idxs[1:]])
-            xx2 = np.minimum(x2[i], x2[idxs[1:]])
-            yy2 = np.minimum(y2[i], y2[idxs[1:]])
-            w = np.maximum(0.0, xx2 - xx1)
-            h = np.maximum(0.0, yy2 - yy1)
-            intersection = w * h
-            union = area[i] + area[idxs[1:]] - intersection
-            iou = intersection / union
-            remaining = np.where(iou <= iou_threshold)[0]
-            idxs = idxs[remaining + 1]
-
-        return keep
+        removed = np.zeros(order.size, dtype=bool)
+        keep = []
+        for i in range(order.size):
+            if removed[i]:
+                continue
+            keep.append(i)
+            removed |= suppresses[i]
+        return order[keep]
 
     # ------------------------------------------------------------------
     # Recognition: align → preprocess → infer → dequantize → normalize
     # ------------------------------------------------------------------
-    def _extract_embedding(self, image, kps):
-        """Align face and extract 512-dim L2-normalized embedding."""
-        if kps is not None:
-            logger.debug(f"Landmarks for alignment: {kps.tolist()}")
-
-        # Align face using 5-point landmarks
-        aligned = self._align_face(image, kps)
-
-        # Preprocess for recognition model
-        preprocessed = self._preprocess_recognition(aligned)
-
-        # Run ArcFace inference — output is auto-dequantized FLOAT32 by HailoRT
-        output_buffers = {
-            info.name: np.empty(info.shape, dtype=np.float32)
-            for info in self.rec_infer_model.outputs
-        }
-        bindings = self.rec_configured.create_bindings(output_buffers=output_buffers)
-        bindings.input().set_buffer(np.ascontiguousarray(preprocessed.astype(np.uint8)))
-        job = self.rec_configured.run_async([bindings], lambda *args, **kwargs: None)
-        job.wait(10000)
+    def _extract_embeddings(self, image, matrices):
+        """Align faces and extract 512-dim L2-normalized embeddings.
 
-        # Output is already dequantized by HailoRT (FormatType.FLOAT32)
-        output_name = list(output_buffers.keys())[0]
-        raw = output_buffers[output_name]
+        Faces are processed in waves of up to rec_bindings.size: each face is
+        warped straight into its slot's bound input and submitted, then the
+        wave is awaited, so ArcFace jobs queue back to back on the device.
 
-        logger.debug(f"ArcFace output: {output_name}, shape={raw.shape}, dtype={raw.dtype}, mean={raw.mean():.4f}, std={raw.std():.4f}")
+        Args:
+            image: RGB frame
+            matrices: (F, 2, 3) alignment transforms from umeyama_similarity()
 
-        embedding = raw.astype(np.float32).flatten()
+        Returns:
+            List of F (embedding, pre_norm) tuples
+        """
+        pool = self.rec_bindings
+        results = []
+        with self._rec_batch_lock:
+            for start in range(0, len(matrices), pool.size):
+                with ExitStack() as stack:
+                    pending = []
+                    try:
+                        for M in matrices[start:start + pool.size]:
+                            slot = stack.enter_context(pool.slot())
+                            # Align face straight into the bound UINT8 input
+                            self._align_face(image, M, out=slot.input)
+                            pending.append((slot, pool.submit(slot)))
+
+                        for slot, job in pending:
+                            # Output is already dequantized by HailoRT (FormatType.FLOAT32)
+                            output_buffers = pool.wait(slot, job)
+                            output_name = next(iter(output_buffers))
+                            raw = output_buffers[output_name]
+                            logger.debug(f"ArcFace output: {output_name}, shape={raw.shape}, dtype={raw.dtype}, mean={raw.mean():.4f}, std={raw.std():.4f}")
+                            # Copy out of the slot before it is reused
+                            results.append(self._normalize_embedding(raw.astype(np.float32).flatten()))
+                    except Exception:
+                        # Wait out the rest of the wave before its slots are released
+                        pool.discard([(slot, job) for slot, job in pending if slot.in_flight])
+                        raise
+        return results
+
+    def _normalize_embedding(self, embedding):
+        """Pad/truncate an ArcFace output to 512 and L2-normalize it.
 
+        Returns:
+            (embedding, pre_norm)
+        """
         # Pad or truncate to 512
         if len(embedding) != 512:
             logger.warning(f"ArcFace embedding size {len(embedding)} != 512, adjusting")
@@ -944,42 +2155,29 @@ class HailoFaceApp:
 
         return embedding.astype(np.float32), pre_norm
 
-    def _align_face(self, image, kps):
-        """Align face using 5-point landmarks with SimilarityTransform."""
-        if kps is None or kps.shape != (5, 2):
+    def _align_face(self, image, M, out=None):
+        """Warp a face to the recognition input with its similarity transform.
+
+        Args:
+            image: RGB frame
+            M: (2, 3) transform from umeyama_similarity(), or None / NaN
+               (degenerate landmarks) for a centre crop
+            out: Optional (model_h, model_w, 3) uint8 buffer written in place
+
+        Returns:
+            The aligned (model_h, model_w, 3) face (out when given)
+        """
+        model_h, model_w = self.rec_input_shape[0], self.rec_input_shape[1]
+        if M is None or not np.all(np.isfinite(M)):
             # Fallback: just crop center
             h, w = image.shape[:2]
             size = min(h, w)
             y0 = (h - size) // 2
             x0 = (w - size) // 2
             crop = image[y0:y0+size, x0:x0+size]
-            return cv2.resize(crop, (self.rec_input_shape[1], self.rec_input_shape[0]))
+            return cv2.resize(crop, (model_w, model_h), dst=out)
 
-        tform = SimilarityTransform()
-        tform.estimate(kps, self.DEST_LANDMARKS)
-        M = tform.params[0:2, :]
-
-        model_h, model_w = self.rec_input_shape[0], self.rec_input_shape[1]
-        aligned = cv2.warpAffine(image, M, (model_w, model_h), borderValue=0.0)
-        return aligned
-
-    def _preprocess_recognition(self, face_image):
-        """Resize/pad face to recognition model input size."""
-        model_h, model_w, _ = self.rec_input_shape
-        h, w = face_image.shape[:2]
-
-        if h == model_h and w == model_w:
-            return face_image
-
-        scale = min(model_w / w, model_h / h)
-        new_w, new_h = int(w * scale), int(h * scale)
-        resized = cv2.resize(face_image, (new_w, new_h))
-
-        padded = np.zeros((model_h, model_w, 3), dtype=np.uint8)
-        top = (model_h - new_h) // 2
-        left = (model_w - new_w) // 2
-        padded[top:top + new_h, left:left + new_w] = resized
-        return padded
+        return cv2.warpAffine(image, M, (model_w, model_h), dst=out, borderValue=0.0)
 
 
 # ---------------------------------------------------------------------------
@@ -1003,7 +2201,7 @@ class FaceRecognition(FaceRecognitionBase):
         super().__init__(face_app, active_members, match_handler, cam_queue)
         # UC8 session state is managed by HailoUC8App if available
         self.yolo_app = getattr(face_app, 'yolo_app', None)
-        self.uc8_app = face_app if isinstance(face_app, HailoUC8App) else None
+        self.uc8_app = face_app if isinstance(face_app, (HailoUC8App, HailoShardedApp)) else None
 
     def process_frame(self, raw_img, cam_info, detected, age):
         """Run UC8 person detection + UC1/3/4/5 face recognition on a frame.
@@ -1023,7 +2221,7 @@ class FaceRecognition(FaceRecognitionBase):
         if self.uc8_app:
             faces, person_count, max_simultaneous = self.uc8_app.get(raw_img, cam_ip=cam_ip)
         else:
-            faces = self.face_app.get(raw_img)
+            faces = self.face_app.get(raw_img, cam_ip=cam_ip)
         duration = time.time() - current_time
 
         if detected == 1:
@@ -1048,31 +2246,37 @@ class FaceRecognition(FaceRecognitionBase):
         unmatched_faces = []  # UC3: Track unknown faces
 
         # Pre-norm threshold: skip low-quality embeddings (face too far/small)
-        # Auto-select based on model: 10.0 for arcface_r50, 6.0 for arcface_mobilefacenet
-        rec_hef = os.environ.get('HAILO_REC_HEF', '')
-        if 'mobilefacenet' in rec_hef:
-            pre_norm_threshold = float(os.environ.get('HAILO_PRE_NORM_THRESHOLD_MOBILEFACENET', '6.0'))
-        else:
-            pre_norm_threshold = float(os.environ.get('HAILO_PRE_NORM_THRESHOLD_R50', '10.0'))
-
+        # Selected by the loaded ArcFace model (ModelDescriptor), so it follows
+        # swap_models(): 10.0 for arcface_r50, 6.0 for mobilefacenet/w600k_mbf
+        config = runtime_config.current().for_camera(cam_ip)
+        pre_norm_threshold = self.face_app.model.pre_norm_threshold(config)
+        threshold = config.face_threshold_hailo
+
+        # Skip faces with low pre_norm (too far from camera)
+        candidates = []
         for face in faces:
-            # Skip faces with low pre_norm (too far from camera)
             if pre_norm_threshold > 0 and face.pre_norm < pre_norm_threshold:
                 logger.info(f"{cam_ip} detected: {detected} age: {age:.3f} pre_norm: {face.pre_norm:.2f} "
                             f"< {pre_norm_threshold:.1f} (skipped - too far)")
                 unmatched_faces.append((face, 'skipped_low_pre_norm', 0.0))
-                continue
-
-            threshold = float(os.environ['FACE_THRESHOLD_HAILO'], 0.25)
+            else:
+                candidates.append(face)
 
+        # Match all remaining faces of the frame in one BLAS call
+        matches = []
+        if candidates:
+            matching_started_at = time.time()
+            embeddings = np.stack([face.embedding.ravel() for face in candidates])
             if self.has_any_members():
                 # Multi-category priority matching (BLOCKLIST > ACTIVE > INACTIVE > STAFF)
-                member, sim, best_name, category = self.find_match_with_category(face.embedding, threshold)
+                matches = self.find_matches_with_category(embeddings, threshold)
             else:
-                # Fallback: ACTIVE-only matching via base find_match
-                member, sim, best_name = self.find_match(face.embedding, threshold)
-                category = 'ACTIVE' if member is not None else None
+                # Fallback: ACTIVE-only matching via base find_matches
+                matches = [(member, sim, best_name, 'ACTIVE' if member is not None else None)
+                           for member, sim, best_name in self.find_matches(embeddings, threshold)]
+            latency_metrics.record(latency_metrics.STAGE_MATCHING, time.time() - matching_started_at, cam_ip)
 
+        for face, (member, sim, best_name, category) in zip(candidates, matches):
             if member is None:
                 logger.info(f"{cam_ip} detected: {detected} age: {age:.3f} pre_norm: {face.pre_norm:.2f} "
                             f"best_match: {best_name} best_sim: {sim:.4f} (no match)")
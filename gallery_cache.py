@@ -0,0 +1,240 @@
+# gallery_cache.py
+#
+# Versioned on-disk copy of the member gallery for fast restart.
+#
+# After a restart the detector can match as soon as this cache is loaded,
+# instead of waiting for fetch_members() to re-query DynamoDB and convert
+# every Decimal embedding. py_handler loads it in init_face_detector() and
+# reconciles with DynamoDB in the background; the reconciled members are
+# written back here.
+#
+# Layout under GALLERY_CACHE_PATH:
+#   gallery.json               format version, embedding space, fingerprint,
+#                              the MEMBER_FIELDS of each member and the name
+#                              of the embeddings file
+#   embeddings-<stamp>.npy     (T, 512) float32 raw templates; each member
+#                              owns 'templates' consecutive rows, the first
+#                              being its faceEmbedding
+#
+# Only the fields the match pipeline reads (keys, category, fullName for the
+# member_detected payload, keyNotified and the lock authorization) are
+# written; everything else stays in DynamoDB. The directory is created 0700
+# and the files 0600.
+#
+# gallery.json is replaced atomically (write temp + os.replace) after the
+# embeddings file it references is complete, so a crash mid-write leaves the
+# previous cache intact. Embeddings are read into memory with np.load; the
+# gallery copies them into its own matrix on sync.
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from member_gallery import member_templates
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+FORMAT_VERSION = 3
+META_FILE = 'gallery.json'
+EMBEDDING_DIM = 512
+MEMBER_FIELDS = ('reservationCode', 'memberNo', 'fullName', 'keyNotified', 'listingId', 'authorizedSpaces')
+DIR_MODE = 0o700
+FILE_MODE = 0o600
+
+
+# ---------------------------------------------------------------------------
+# JSON encoding of DynamoDB member fields (Decimal, set)
+# ---------------------------------------------------------------------------
+def _encode(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted(_encode(v) for v in value)}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if set(value) == {'__set__'}:
+            return set(value['__set__'])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _fingerprint(meta_members, embeddings):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(meta_members, sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(embeddings).tobytes())
+    return digest.hexdigest()
+
+
+def _open_private(path, mode):
+    """Open path for writing with FILE_MODE permissions, also if it already exists."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, FILE_MODE)
+    os.fchmod(fd, FILE_MODE)
+    return os.fdopen(fd, mode)
+
+
+def _read_meta(cache_dir):
+    meta_path = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+def save(cache_dir, members_by_category, embedding_space):
+    """Persist members (with embeddings) if they differ from the cached copy.
+
+    Args:
+        cache_dir: GALLERY_CACHE_PATH directory ('' disables)
+        members_by_category: dict {category: [member dicts with faceEmbedding]}
+        embedding_space: Identifier of the model that produced the embeddings
+
+    Returns:
+        True if a new cache was written
+    """
+    if not cache_dir:
+        return False
+
+    try:
+        meta_members = []
+        rows = []
+        for category, members in (members_by_category or {}).items():
+            for member in members or []:
+                templates = member_templates(member, EMBEDDING_DIM)
+                if templates is None:
+                    continue
+                fields = {k: member[k] for k in MEMBER_FIELDS if k in member}
+                fields['category'] = category
+                fields['templates'] = templates.shape[0]
+                meta_members.append(_encode(fields))
+                rows.append(templates)
+
+        embeddings = (np.concatenate(rows).astype(np.float32) if rows
+                      else np.zeros((0, EMBEDDING_DIM), dtype=np.float32))
+        fingerprint = _fingerprint(meta_members, embeddings)
+
+        previous = _read_meta(cache_dir) if os.path.isdir(cache_dir) else None
+        if (previous and previous.get('fingerprint') == fingerprint
+                and previous.get('embedding_space') == embedding_space):
+            logger.debug(f"gallery_cache.save: unchanged ({len(meta_members)} members), skipping")
+            return False
+
+        os.makedirs(cache_dir, mode=DIR_MODE, exist_ok=True)
+        os.chmod(cache_dir, DIR_MODE)
+        stamp = f"{time.time_ns()}"
+        emb_file = f'embeddings-{stamp}.npy'
+        emb_path = os.path.join(cache_dir, emb_file)
+        with _open_private(emb_path + '.tmp', 'wb') as f:
+            np.save(f, embeddings)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(emb_path + '.tmp', emb_path)
+
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'embedding_space': embedding_space,
+            'dim': EMBEDDING_DIM,
+            'count': len(meta_members),
+            'rows': embeddings.shape[0],
+            'saved_at': time.time(),
+            'fingerprint': fingerprint,
+            'embeddings_file': emb_file,
+            'members': meta_members,
+        }
+        meta_path = os.path.join(cache_dir, META_FILE)
+        with _open_private(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(meta_path + '.tmp', meta_path)
+
+        # Drop embeddings files no longer referenced
+        for path in glob.glob(os.path.join(cache_dir, 'embeddings-*.npy')):
+            if os.path.basename(path) != emb_file:
+                os.remove(path)
+
+        logger.info(f"gallery_cache.save: {len(meta_members)} members written to {cache_dir} ({embedding_space})")
+        return True
+    except Exception as e:
+        logger.error(f"gallery_cache.save: failed to write {cache_dir}: {e}")
+        return False
+
+
+def load(cache_dir, embedding_space):
+    """Load the cached members if the cache matches this format and model.
+
+    Args:
+        cache_dir: GALLERY_CACHE_PATH directory ('' disables)
+        embedding_space: Identifier of the model in use; a cache built by a
+                         different model is ignored
+
+    Returns:
+        dict {category: [member dicts]} with 'faceEmbedding' rows viewing
+        one loaded array, or None if there is no usable cache
+    """
+    if not cache_dir:
+        return None
+
+    started_at = time.time()
+    try:
+        meta = _read_meta(cache_dir)
+        if meta is None:
+            logger.info(f"gallery_cache.load: no cache in {cache_dir}")
+            return None
+        if meta.get('format_version') != FORMAT_VERSION or meta.get('dim') != EMBEDDING_DIM:
+            logger.warning(f"gallery_cache.load: format {meta.get('format_version')} / dim {meta.get('dim')} "
+                           f"not supported, ignoring cache")
+            return None
+        if meta.get('embedding_space') != embedding_space:
+            logger.warning(f"gallery_cache.load: cache built for {meta.get('embedding_space')}, "
+                           f"running {embedding_space}, ignoring cache")
+            return None
+
+        embeddings = np.load(os.path.join(cache_dir, meta['embeddings_file']))
+        if embeddings.shape != (meta['rows'], EMBEDDING_DIM):
+            logger.error(f"gallery_cache.load: embeddings shape {embeddings.shape} does not match "
+                         f"{meta['rows']} template rows, ignoring cache")
+            return None
+
+        members_by_category = {}
+        row = 0
+        for fields in meta['members']:
+            member = _decode(fields)
+            count = member.pop('templates')
+            member['faceEmbedding'] = embeddings[row]
+            if count > 1:
+                member['faceEmbeddings'] = embeddings[row + 1:row + count]
+            row += count
+            members_by_category.setdefault(member['category'], []).append(member)
+
+        logger.info(f"gallery_cache.load: {meta['count']} members from {cache_dir} "
+                    f"(saved {time.time() - meta['saved_at']:.0f}s ago) in {1000 * (time.time() - started_at):.0f}ms")
+        return members_by_category
+    except Exception as e:
+        logger.error(f"gallery_cache.load: failed to read {cache_dir}: {e}")
+        return None
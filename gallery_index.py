@@ -0,0 +1,261 @@
+# gallery_index.py
+#
+# Search indexes over a MemberGallery.
+#
+# FlatIndex scores every template row (exact). IVFIndex is an inverted-file
+# index in pure numpy: template rows are assigned to the nearest of ~sqrt(T)
+# spherical k-means centroids, a query probes its GALLERY_ANN_NPROBE closest
+# lists and the candidates are re-ranked exactly against the stored rows and
+# pooled per member. Categories smaller than GALLERY_ANN_MIN_SIZE are always
+# scanned exactly, so BLOCKLIST and ACTIVE keep exact scores while a large
+# INACTIVE set is searched approximately.
+#
+# Match decisions are identical to FlatIndex. Each list stores its radius (the
+# largest angle of a row from its centroid), which bounds the similarity of
+# any row in a list that was not scored: cos(max(0, angle(face, centroid) -
+# radius)). Given the match threshold, a face is re-scored exactly unless its
+# winning category (CATEGORY_PRIORITY code) has no approximately scanned
+# category ahead of it and, when it is approximate itself, the bound of every
+# unscored list stays below the winner's score. Faces without a match are
+# always re-scored.
+#
+# GalleryIndex picks between the two by gallery size and is refreshed by the
+# FaceRecognitionBase member setters after each gallery sync. Only the row
+# snapshot is taken under gallery.lock; k-means training and list assignment
+# run outside it and the finished IVFIndex is swapped in.
+
+import logging
+import os
+import sys
+
+import numpy as np
+
+import runtime_config
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+BOUND_SLACK = 1e-4               # float32 rounding margin on the unscored-list bound
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLES_PER_LIST = 64     # training sample cap = nlist * this
+RETRAIN_GROWTH = 2.0             # retrain centroids when size changes by this factor
+
+
+class FlatIndex:
+    """Exact brute-force search over all gallery rows."""
+
+    kind = 'flat'
+
+    def refresh(self, gallery):
+        pass
+
+    def search(self, gallery, unit_faces, pooling='max'):
+        """Return (F, N) exact similarities."""
+        return gallery.scores(unit_faces, pooling=pooling)
+
+
+class IVFIndex:
+    """Inverted-file approximate index with exact re-ranking of candidates."""
+
+    kind = 'ivf'
+
+    def __init__(self, seed=0, previous=None):
+        self.rng = np.random.default_rng(seed)
+        self.centroids = None          # (nlist, dim) unit rows
+        self.trained_size = 0
+        self.list_order = None         # template rows sorted by list
+        self.list_offsets = None       # (nlist + 1,) CSR offsets into list_order
+        self.list_radius = None        # (nlist,) largest row angle from the centroid, -1 if empty
+        self.exact_rows = None         # template rows of small categories, always scored
+        self.approx_codes = None       # category codes searched through the lists
+        self.version = -1              # gallery.version the assignment belongs to
+        if previous is not None:
+            # Centroids carry over between rebuilds until the size drifts
+            self.rng = previous.rng
+            self.centroids = previous.centroids
+            self.trained_size = previous.trained_size
+
+    def _train(self, unit_rows):
+        size = unit_rows.shape[0]
+        nlist = max(1, int(round(np.sqrt(size))))
+        sample_size = min(size, nlist * KMEANS_SAMPLES_PER_LIST)
+        sample = unit_rows[self.rng.choice(size, sample_size, replace=False)]
+        centroids = sample[self.rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.dot(sample, centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            filled = norms > 0
+            # Empty lists keep their previous centroid
+            centroids[filled] = sums[filled] / norms[filled, None]
+
+        self.centroids = centroids
+        self.trained_size = size
+        logger.info(f"IVFIndex trained: {size} rows, {nlist} lists, sample={sample_size}")
+
+    def build(self, unit_rows, template_codes, version, min_size):
+        """Assign template rows to lists (and retrain centroids if the size drifted).
+
+        Works on a snapshot of the gallery, so no gallery lock is needed.
+
+        Args:
+            unit_rows: (T, dim) float32 unit template rows
+            template_codes: (T,) category code of each template's member
+            version: gallery.version the snapshot was taken at
+            min_size: Categories with fewer templates are always scored exactly
+        """
+        size = unit_rows.shape[0]
+        if (self.centroids is None or size > self.trained_size * RETRAIN_GROWTH
+                or size * RETRAIN_GROWTH < self.trained_size):
+            self._train(unit_rows)
+
+        nlist = self.centroids.shape[0]
+        centroid_sims = np.dot(unit_rows, self.centroids.T)
+        assign = centroid_sims.argmax(axis=1)
+        self.list_order = np.argsort(assign, kind='stable')
+        self.list_offsets = np.searchsorted(assign[self.list_order], np.arange(nlist + 1))
+
+        min_cos = np.full(nlist, 2.0)
+        np.minimum.at(min_cos, assign, centroid_sims[np.arange(size), assign])
+        self.list_radius = np.where(min_cos <= 1.0, np.arccos(np.clip(min_cos, -1.0, 1.0)), -1.0)
+
+        counts = np.bincount(template_codes.astype(np.int64), minlength=1)
+        small_codes = np.flatnonzero(counts < min_size)
+        self.exact_rows = np.flatnonzero(np.isin(template_codes, small_codes))
+        self.approx_codes = np.flatnonzero(counts >= min_size)
+        self.version = version
+
+    def search(self, gallery, unit_faces, nprobe, pooling='max'):
+        """Score the rows of the probed lists.
+
+        Returns:
+            Tuple of (similarities, bounds): (F, N) similarities, -inf for
+            members with no template in the probed lists, and (F,) upper
+            bounds on the similarity of any row left unscored (-inf if none)
+        """
+        nlist = self.centroids.shape[0]
+        nprobe = min(nprobe, nlist)
+        centroid_sims = np.dot(unit_faces, self.centroids.T)
+        probed = np.argpartition(-centroid_sims, nprobe - 1, axis=1)[:, :nprobe]
+
+        lists = np.unique(probed)
+        candidates = [self.list_order[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists]
+        candidates.append(self.exact_rows)
+        rows = np.unique(np.concatenate(candidates))
+        if pooling == 'mean':
+            # A mean is only exact over all of a member's templates
+            rows = np.flatnonzero(np.isin(gallery.owners, np.unique(gallery.owners[rows])))
+        similarities = gallery.scores(unit_faces, rows=rows, pooling=pooling)
+
+        unscored = np.ones(nlist, dtype=bool)
+        unscored[lists] = False
+        unscored &= self.list_radius >= 0
+        if not unscored.any():
+            return similarities, np.full(unit_faces.shape[0], -np.inf)
+        angles = np.arccos(np.clip(centroid_sims[:, unscored], -1.0, 1.0)) - self.list_radius[unscored]
+        bounds = np.cos(np.maximum(angles, 0.0)).max(axis=1) + BOUND_SLACK
+        return similarities, bounds
+
+
+class GalleryIndex:
+    """Switches between FlatIndex and IVFIndex by gallery size.
+
+    Callers serialize refresh() calls and must not hold gallery.lock across
+    them; search() is called with gallery.lock held.
+    """
+
+    def __init__(self, name=''):
+        self.name = name
+        self._flat = FlatIndex()
+        self._ivf = None
+
+    def refresh(self, gallery):
+        """Pick the index for the current gallery size and rebuild its lists.
+
+        The rows are copied under gallery.lock; training and assignment run
+        on the copy and the new IVFIndex replaces the old one when done.
+        Until then search() sees a version mismatch and scans exactly.
+        """
+        min_size = runtime_config.current().gallery_ann_min_size
+        with gallery.lock:
+            size = gallery.template_count
+            use_ivf = min_size > 0 and size >= min_size
+            if use_ivf:
+                version = gallery.version
+                unit_rows = np.array(gallery.embeddings, dtype=np.float32)
+                template_codes = gallery.codes[gallery.owners]
+        if not use_ivf:
+            if self._ivf is not None:
+                logger.info(f"GalleryIndex[{self.name}] {size} templates < {min_size}: exact search")
+            self._ivf = None
+            return
+
+        if self._ivf is None:
+            logger.info(f"GalleryIndex[{self.name}] {size} templates >= {min_size}: IVF search")
+        ivf = IVFIndex(previous=self._ivf)
+        ivf.build(unit_rows, template_codes, version, min_size)
+        self._ivf = ivf
+
+    def search(self, gallery, unit_faces, threshold=None):
+        """Return (F, N) per-member similarities for unit-normalized faces.
+
+        Args:
+            gallery: MemberGallery the index was refreshed from
+            unit_faces: (F, dim) float32, rows L2-normalized
+            threshold: Match threshold; IVF results of faces whose decision
+                       could differ from an exact scan are replaced by exact
+                       scores. None returns the raw IVF scores.
+        """
+        config = runtime_config.current()
+        ivf = self._ivf
+        if ivf is None:
+            return self._flat.search(gallery, unit_faces, config.gallery_pooling)
+        if ivf.version != gallery.version:
+            logger.debug(f"GalleryIndex[{self.name}] stale IVF lists, using exact search")
+            return self._flat.search(gallery, unit_faces, config.gallery_pooling)
+
+        similarities, bounds = ivf.search(gallery, unit_faces, config.gallery_ann_nprobe, config.gallery_pooling)
+        if threshold is not None:
+            recheck = self._inexact_faces(similarities, bounds, gallery.codes, ivf.approx_codes, threshold)
+            if recheck.size:
+                similarities[recheck] = self._flat.search(gallery, unit_faces[recheck], config.gallery_pooling)
+        return similarities
+
+    @staticmethod
+    def _inexact_faces(similarities, bounds, codes, approx_codes, threshold):
+        """Faces whose match decision from IVF scores could differ from an exact scan.
+
+        The winning category is the lowest code with a score >= threshold.
+        The decision is exact when no approximately scanned category ranks
+        ahead of it and, if it is approximate itself, no unscored row can
+        reach the winner's score.
+
+        Args:
+            similarities: (F, N) IVF similarities
+            bounds: (F,) upper bound on any unscored row's similarity
+            codes: (N,) category code of each member
+            approx_codes: Category codes searched through the IVF lists
+            threshold: Match threshold
+
+        Returns:
+            Indices of the faces to re-score exactly
+        """
+        if approx_codes.size == 0:
+            return np.empty(0, dtype=np.int64)
+        codes = codes.astype(np.int64)
+        no_match = np.iinfo(np.int64).max
+        win_code = np.where(similarities >= threshold, codes[None, :], no_match).min(axis=1)
+        top_approx = int(approx_codes.min())
+
+        inexact = win_code > top_approx    # no match, or an approximate category outranks the winner
+        at_top = win_code == top_approx
+        if at_top.any():
+            win_score = np.where(codes[None, :] == top_approx, similarities, -np.inf).max(axis=1)
+            inexact |= at_top & (bounds >= win_score)
+        return np.flatnonzero(inexact)
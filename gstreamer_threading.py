@@ -26,6 +26,9 @@ import traceback
 
 from typing import Dict
 
+import runtime_config
+import latency_metrics
+
 ext = ".mp4"
 
 # Setup logging to stdout
@@ -99,8 +102,9 @@ class StreamCapture(threading.Thread):
 
         pipeline_str_decode = ''
         # Calculate max fps for detection: source framerate * detecting rate percent
-        self.detecting_max_fps = round(int(self.framerate) * float(os.environ['DETECTING_RATE_PERCENT']))
-        logger.info(f"{self.cam_ip} detecting_max_fps={self.detecting_max_fps} (framerate={self.framerate}, DETECTING_RATE_PERCENT={os.environ['DETECTING_RATE_PERCENT']})")
+        detecting_rate_percent = runtime_config.current().for_camera(self.cam_ip).detecting_rate_percent
+        self.detecting_max_fps = round(int(self.framerate) * detecting_rate_percent)
+        logger.info(f"{self.cam_ip} detecting_max_fps={self.detecting_max_fps} (framerate={self.framerate}, DETECTING_RATE_PERCENT={detecting_rate_percent})")
 
         if self.codec == 'h264':
             pipeline_str_decode = f"""appsrc name=m_appsrc emit-signals=true is-live=true format=time
@@ -189,7 +193,8 @@ class StreamCapture(threading.Thread):
 
             # Only discard frames if not recording
             if not self.is_recording:
-                while self.recording_buffer and current_time - self.recording_buffer[0][0] > float(os.environ['PRE_RECORDING_SEC']):
+                pre_recording_sec = runtime_config.current().for_camera(self.cam_ip).pre_recording_sec
+                while self.recording_buffer and current_time - self.recording_buffer[0][0] > pre_recording_sec:
                     self.recording_buffer.popleft()
 
     def get_all_frames(self):
@@ -254,7 +259,8 @@ class StreamCapture(threading.Thread):
             self.detecting_buffer.append((current_time, sample))
 
             # discard frames
-            while self.detecting_buffer and current_time - self.detecting_buffer[0][0] > float(os.environ['PRE_DETECTING_SEC']):
+            pre_detecting_sec = runtime_config.current().for_camera(self.cam_ip).pre_detecting_sec
+            while self.detecting_buffer and current_time - self.detecting_buffer[0][0] > pre_detecting_sec:
                 self.detecting_buffer.popleft()
     
     def edit_sample_caption(self, sample, current_time):
@@ -379,11 +385,14 @@ class StreamCapture(threading.Thread):
             if not self.cam_queue.full():
                 if frame_time is not None:
                     self.decoding_count += 1
+                    enqueued_at = time.time()
+                    latency_metrics.record(latency_metrics.STAGE_CAPTURE_DECODE, enqueued_at - frame_time, self.cam_ip)
                     self.cam_queue.put((StreamCommands.FRAME, arr, {
                         "cam_ip": self.cam_ip,
                         "cam_uuid": self.cam_uuid,
                         "cam_name": self.cam_name,
                         "frame_time": frame_time,
+                        "enqueued_at": enqueued_at,
                         "detecting_txn": self.detecting_txn,
                         "locks": self.locks,
                     }), block=False)
@@ -756,7 +765,8 @@ class StreamCapture(threading.Thread):
         if self.detecting_txn is not None:
             self.cam_queue.put((StreamCommands.SESSION_END, None, {
                 "cam_ip": self.cam_ip,
-                "detecting_txn": self.detecting_txn
+                "detecting_txn": self.detecting_txn,
+                "locks": self.locks,
             }), block=False)
 
         # Check if the timer exists before trying to cancel
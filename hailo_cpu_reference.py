@@ -0,0 +1,484 @@
+# hailo_cpu_reference.py
+#
+# CPU stand-in for the parts of hailo_platform used by face_recognition_hailo.
+#
+# With HAILO_CPU_REFERENCE=true, face_recognition_hailo imports VDevice,
+# FormatType and HailoSchedulingAlgorithm from here, so HailoUC8App,
+# HailoFaceApp, BindingPool and FaceRecognition.process_frame run unchanged
+# on any Linux/x86 box (profiling, benchmarks, CI). Only the inference itself
+# is replaced; pre/post-processing, alignment and matching are the real code.
+#
+# Each HEF path is served by the first available source, looked up by the
+# HEF file stem in HAILO_CPU_REFERENCE_DIR (default: the HEF's directory):
+#   <stem>.npz    replay of recorded output tensors: one array per output
+#                 name with a leading frame axis, cycled job by job, plus
+#                 an optional '__input_shape__' (see save_replay())
+#   <stem>.onnx   the equivalent ONNX model run with onnxruntime (optional
+#                 dependency); InsightFace SCRFD / ArcFace and Ultralytics
+#                 YOLOv8 exports are adapted to the HEF output layouts
+#   (neither)     synthetic outputs: one centred person and face, and an
+#                 ArcFace embedding that is a fixed random projection of
+#                 the aligned crop (stable per face, different across faces)
+#
+# The model family (yolo / scrfd / arcface) is taken from the HEF file name.
+# Jobs run one at a time on a worker thread per physical device of the
+# VDevice, like jobs queued on the NPU scheduler; run_async() callbacks and
+# wait() timeouts behave like HailoRT's. Device.scan() reports
+# HAILO_CPU_REFERENCE_DEVICES (default 1) devices, so HAILO_DEVICE_MODE
+# vdevice/shard can be exercised too.
+
+import enum
+import logging
+import os
+import queue
+import sys
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FormatType(enum.Enum):
+    AUTO = 0
+    UINT8 = 1
+    UINT16 = 2
+    FLOAT32 = 3
+
+
+class HailoSchedulingAlgorithm(enum.Enum):
+    NONE = 0
+    ROUND_ROBIN = 1
+
+
+class HailoRTTimeoutException(TimeoutError):
+    """Raised by AsyncJob.wait() like HailoRT's timeout exception."""
+
+
+# ---------------------------------------------------------------------------
+# Model layouts (HEF-compatible input/output shapes)
+# ---------------------------------------------------------------------------
+SCRFD_INPUT_SHAPE = (640, 640, 3)
+SCRFD_STRIDES = (8, 16, 32)
+SCRFD_NUM_ANCHORS = 2
+SCRFD_LAYER_NAMES = {   # stride -> (score, bbox, kps) named as in scrfd_10g.hef
+    8: ('conv41', 'conv42', 'conv43'),
+    16: ('conv49', 'conv50', 'conv51'),
+    32: ('conv56', 'conv57', 'conv58'),
+}
+ARCFACE_INPUT_SHAPE = (112, 112, 3)
+ARCFACE_DIM = 512
+YOLO_INPUT_SHAPE = (640, 640, 3)
+YOLO_NUM_CLASSES = 80
+YOLO_MAX_BOXES = 100        # per class, as compiled into the HEF NMS
+YOLO_NMS_IOU = 0.7
+YOLO_SCORE_THRESHOLD = 0.2
+
+# ArcFace destination landmarks (112x112), used to draw the synthetic face
+ARCFACE_LANDMARKS = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041],
+], dtype=np.float32)
+
+SYNTHETIC_FACE_SIZE = 160   # px in the SCRFD input
+SYNTHETIC_PERSON_BOX = (0.15, 0.35, 0.95, 0.65)   # y1, x1, y2, x2 normalized
+SYNTHETIC_PRE_NORM = 20.0   # embedding magnitude, above the pre_norm thresholds
+
+
+def _model_kind(hef_path):
+    name = os.path.basename(hef_path).lower()
+    if 'yolo' in name:
+        return 'yolo'
+    if 'scrfd' in name or 'det' in name:
+        return 'scrfd'
+    return 'arcface'
+
+
+def _output_layout(kind, input_shape):
+    """[(name, shape, (qp_scale, qp_zp))] of a model family's outputs."""
+    if kind == 'scrfd':
+        layout = []
+        h, w = input_shape[:2]
+        for stride in SCRFD_STRIDES:
+            fh, fw = h // stride, w // stride
+            score, bbox, kps = SCRFD_LAYER_NAMES[stride]
+            layout.append((f'scrfd/{score}', (fh, fw, SCRFD_NUM_ANCHORS), (1 / 255, 0)))
+            layout.append((f'scrfd/{bbox}', (fh, fw, SCRFD_NUM_ANCHORS * 4), (0.1, 0)))
+            layout.append((f'scrfd/{kps}', (fh, fw, SCRFD_NUM_ANCHORS * 10), (0.1, 128)))
+        return layout
+    if kind == 'yolo':
+        return [('yolov8n/yolov8_nms_postprocess', (YOLO_NUM_CLASSES * (1 + 5 * YOLO_MAX_BOXES),), (1 / 255, 0))]
+    return [('arcface/fc1', (ARCFACE_DIM,), (0.05, 128))]
+
+
+def _default_input_shape(kind):
+    return {'scrfd': SCRFD_INPUT_SHAPE, 'yolo': YOLO_INPUT_SHAPE}.get(kind, ARCFACE_INPUT_SHAPE)
+
+
+# ---------------------------------------------------------------------------
+# Output sources
+# ---------------------------------------------------------------------------
+class ReplaySource:
+    """Cycles through recorded output tensors (<stem>.npz)."""
+
+    def __init__(self, path, kind):
+        data = np.load(path)
+        self.outputs = {name: data[name] for name in data.files if not name.startswith('__')}
+        self.input_shape = (tuple(int(d) for d in data['__input_shape__']) if '__input_shape__' in data.files
+                            else _default_input_shape(kind))
+        self.frames = min(array.shape[0] for array in self.outputs.values())
+        self.layout = [(name, array.shape[1:], (1.0, 0)) for name, array in self.outputs.items()]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def run(self, image):
+        with self._lock:
+            index = self._next
+            self._next = (index + 1) % self.frames
+        return {name: array[index] for name, array in self.outputs.items()}
+
+
+class OnnxSource:
+    """Runs the equivalent ONNX model and converts its outputs to the HEF layout."""
+
+    def __init__(self, path, kind):
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is not installed")
+        self.kind = kind
+        self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        _, _, h, w = self.session.get_inputs()[0].shape
+        default = _default_input_shape(kind)
+        self.input_shape = (h if isinstance(h, int) else default[0], w if isinstance(w, int) else default[1], 3)
+        self.layout = _output_layout(kind, self.input_shape)
+
+    def run(self, image):
+        blob = image.astype(np.float32).transpose(2, 0, 1)[None]
+        if self.kind == 'yolo':
+            blob /= 255.0
+        else:
+            # InsightFace exports take (x - 127.5) / 128 (SCRFD) or / 127.5 (ArcFace)
+            blob = (blob - 127.5) / (128.0 if self.kind == 'scrfd' else 127.5)
+        outputs = self.session.run(None, {self.input_name: blob})
+        if self.kind == 'scrfd':
+            return self._scrfd(outputs)
+        if self.kind == 'yolo':
+            return self._yolo(outputs[0])
+        return {self.layout[0][0]: outputs[0].reshape(-1)}
+
+    def _scrfd(self, outputs):
+        # InsightFace order: scores, bboxes, kps, each for strides 8, 16, 32
+        count = len(SCRFD_STRIDES)
+        result = {}
+        for i, (name, shape, _) in enumerate(self.layout):
+            stride_index, part = divmod(i, 3)
+            result[name] = outputs[part * count + stride_index].reshape(shape)
+        return result
+
+    def _yolo(self, raw):
+        # (1, 4 + classes, anchors): cx, cy, w, h in input pixels, then class scores
+        predictions = raw[0].T
+        h, w = self.input_shape[:2]
+        boxes = np.stack([
+            (predictions[:, 1] - predictions[:, 3] / 2) / h,
+            (predictions[:, 0] - predictions[:, 2] / 2) / w,
+            (predictions[:, 1] + predictions[:, 3] / 2) / h,
+            (predictions[:, 0] + predictions[:, 2] / 2) / w,
+        ], axis=1)
+        scores = predictions[:, 4:]
+        per_class = []
+        for class_id in range(YOLO_NUM_CLASSES):
+            candidates = np.flatnonzero(scores[:, class_id] >= YOLO_SCORE_THRESHOLD)
+            keep = _nms(boxes[candidates], scores[candidates, class_id], YOLO_NMS_IOU)[:YOLO_MAX_BOXES]
+            per_class.append(np.column_stack([boxes[candidates[keep]], scores[candidates[keep], class_id]]))
+        return {self.layout[0][0]: _pack_nms_by_class(per_class, self.layout[0][1])}
+
+
+class SyntheticSource:
+    """Deterministic outputs: one centred person/face, projection embeddings."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.input_shape = _default_input_shape(kind)
+        self.layout = _output_layout(kind, self.input_shape)
+        if kind == 'arcface':
+            rng = np.random.default_rng(0)
+            self.projection = rng.standard_normal((28 * 28 * 3, ARCFACE_DIM)).astype(np.float32)
+        else:
+            self.fixed = self._fixed_outputs()
+
+    def _fixed_outputs(self):
+        outputs = {name: np.zeros(shape, dtype=np.float32) for name, shape, _ in self.layout}
+        if self.kind == 'yolo':
+            name, shape, _ = self.layout[0]
+            boxes = [np.array([[*SYNTHETIC_PERSON_BOX, 0.9]], dtype=np.float32)]
+            outputs[name] = _pack_nms_by_class(boxes + [np.empty((0, 5))] * (YOLO_NUM_CLASSES - 1), shape)
+            return outputs
+
+        # Face centred on one stride-16 anchor, sized SYNTHETIC_FACE_SIZE
+        stride = 16
+        score, bbox, kps = (f'scrfd/{n}' for n in SCRFD_LAYER_NAMES[stride])
+        fh, fw = outputs[score].shape[:2]
+        row, col = fh // 2, fw // 2
+        half = SYNTHETIC_FACE_SIZE / 2 / stride
+        outputs[score][row, col, 0] = 0.9
+        outputs[bbox][row, col, 0:4] = half
+        landmarks = (ARCFACE_LANDMARKS - 56.0) * (SYNTHETIC_FACE_SIZE / 112.0) / stride
+        outputs[kps][row, col, 0:10] = landmarks.reshape(-1)
+        return outputs
+
+    def run(self, image):
+        if self.kind != 'arcface':
+            return self.fixed
+        small = image[::4, ::4].astype(np.float32).reshape(-1) / 255.0
+        embedding = (small - small.mean()) @ self.projection
+        norm = np.linalg.norm(embedding)
+        if norm > 0:
+            embedding *= SYNTHETIC_PRE_NORM / norm
+        return {self.layout[0][0]: embedding}
+
+
+def _nms(boxes, scores, iou_threshold):
+    """Greedy NMS over (y1, x1, y2, x2) boxes; returns kept indices, best first."""
+    order = np.argsort(-scores)
+    keep = []
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        yy1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        xx1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        yy2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        xx2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.maximum(0.0, yy2 - yy1) * np.maximum(0.0, xx2 - xx1)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def _pack_nms_by_class(per_class, shape):
+    """HailoRT NMS-by-class FLOAT32 buffer: [count, (y1, x1, y2, x2, score) * count] per class."""
+    buffer = np.zeros(shape, dtype=np.float32).reshape(-1)
+    offset = 0
+    for boxes in per_class:
+        buffer[offset] = len(boxes)
+        values = np.asarray(boxes, dtype=np.float32).reshape(-1)
+        buffer[offset + 1:offset + 1 + values.size] = values
+        offset += 1 + values.size
+    return buffer.reshape(shape)
+
+
+def _open_source(hef_path):
+    kind = _model_kind(hef_path)
+    directory = os.environ.get('HAILO_CPU_REFERENCE_DIR') or os.path.dirname(hef_path)
+    stem = os.path.splitext(os.path.basename(hef_path))[0]
+
+    replay_path = os.path.join(directory, f'{stem}.npz')
+    if os.path.exists(replay_path):
+        logger.info(f"hailo_cpu_reference: {stem} replays {replay_path}")
+        return ReplaySource(replay_path, kind)
+
+    onnx_path = os.path.join(directory, f'{stem}.onnx')
+    if os.path.exists(onnx_path):
+        try:
+            source = OnnxSource(onnx_path, kind)
+            logger.info(f"hailo_cpu_reference: {stem} runs {onnx_path} on onnxruntime")
+            return source
+        except Exception as e:
+            logger.warning(f"hailo_cpu_reference: cannot run {onnx_path} ({e}), using synthetic outputs")
+
+    logger.info(f"hailo_cpu_reference: {stem} ({kind}) uses synthetic outputs")
+    return SyntheticSource(kind)
+
+
+def save_replay(path, outputs, input_shape=None):
+    """Write recorded outputs for ReplaySource.
+
+    Args:
+        path: Destination <hef stem>.npz
+        outputs: List of {output name: array} dicts, one per job (e.g. copies
+                 of BindingSlot.outputs captured on the device, FLOAT32)
+        input_shape: Model input (H, W, C), if not the family default
+    """
+    arrays = {name: np.stack([np.asarray(frame[name], dtype=np.float32) for frame in outputs])
+              for name in outputs[0]}
+    if input_shape is not None:
+        arrays['__input_shape__'] = np.asarray(input_shape)
+    np.savez(path, **arrays)
+
+
+# ---------------------------------------------------------------------------
+# hailo_platform API stand-ins
+# ---------------------------------------------------------------------------
+class _Stream:
+    """InferModel input/output stream: name, shape and format type."""
+
+    def __init__(self, name, shape, quant=(1.0, 0)):
+        self.name = name
+        self.shape = tuple(shape)
+        self.format_type = FormatType.FLOAT32
+        self.quant_info = SimpleNamespace(qp_scale=quant[0], qp_zp=quant[1])
+
+    def set_format_type(self, format_type):
+        self.format_type = format_type
+
+
+class _Hef:
+    def __init__(self, outputs):
+        self._outputs = outputs
+
+    def get_output_vstream_infos(self):
+        return list(self._outputs)
+
+
+class InferModel:
+    def __init__(self, vdevice, hef_path):
+        self.vdevice = vdevice
+        self.hef_path = hef_path
+        self.source = _open_source(hef_path)
+        stem = os.path.splitext(os.path.basename(hef_path))[0]
+        self.inputs = [_Stream(f'{stem}/input_layer1', self.source.input_shape)]
+        self.inputs[0].set_format_type(FormatType.UINT8)
+        self.outputs = [_Stream(name, shape, quant) for name, shape, quant in self.source.layout]
+        self.hef = _Hef(self.outputs)
+
+    def input(self, name=None):
+        return self.inputs[0]
+
+    def output(self, name=None):
+        if name is None:
+            return self.outputs[0]
+        return next(stream for stream in self.outputs if stream.name == name)
+
+    def configure(self):
+        return ConfiguredInferModel(self)
+
+
+class _Buffer:
+    def __init__(self, buffer=None):
+        self.buffer = buffer
+
+    def set_buffer(self, buffer):
+        self.buffer = buffer
+
+    def get_buffer(self):
+        return self.buffer
+
+
+class Bindings:
+    def __init__(self, infer_model, output_buffers):
+        self._input = _Buffer()
+        self._outputs = {stream.name: _Buffer((output_buffers or {}).get(stream.name))
+                         for stream in infer_model.outputs}
+
+    def input(self, name=None):
+        return self._input
+
+    def output(self, name=None):
+        if name is None:
+            return next(iter(self._outputs.values()))
+        return self._outputs[name]
+
+
+class AsyncJob:
+    def __init__(self):
+        self._done = threading.Event()
+        self.exception = None
+
+    def wait(self, timeout_ms):
+        if not self._done.wait(timeout_ms / 1000.0):
+            raise HailoRTTimeoutException(f"job did not complete within {timeout_ms}ms")
+        if self.exception is not None:
+            raise self.exception
+
+
+class ConfiguredInferModel:
+    def __init__(self, infer_model):
+        self.infer_model = infer_model
+
+    def create_bindings(self, output_buffers=None):
+        return Bindings(self.infer_model, output_buffers)
+
+    def run_async(self, bindings, callback):
+        job = AsyncJob()
+        self.infer_model.vdevice._jobs.put((self, bindings, callback, job))
+        return job
+
+    def run_bindings(self, bindings):
+        """Run one job synchronously (worker thread)."""
+        outputs = self.infer_model.source.run(bindings.input().get_buffer())
+        for stream in self.infer_model.outputs:
+            out = bindings.output(stream.name).get_buffer()
+            value = np.asarray(outputs[stream.name], dtype=np.float32).reshape(out.shape)
+            if stream.format_type in (FormatType.UINT8, FormatType.UINT16):
+                info = np.iinfo(out.dtype)
+                value = np.clip(np.rint(value / stream.quant_info.qp_scale + stream.quant_info.qp_zp),
+                                info.min, info.max)
+            out[...] = value
+
+
+class Device:
+    """Physical device enumeration."""
+
+    @staticmethod
+    def scan():
+        count = int(os.environ.get('HAILO_CPU_REFERENCE_DEVICES', '1'))
+        return [f'cpu-reference:{index}' for index in range(count)]
+
+
+class VDevice:
+    """One worker thread per 'device', each running jobs in submission order."""
+
+    @staticmethod
+    def create_params():
+        return SimpleNamespace(scheduling_algorithm=HailoSchedulingAlgorithm.ROUND_ROBIN, device_count=1)
+
+    def __init__(self, params=None, device_ids=None):
+        self.params = params or self.create_params()
+        self.device_ids = list(device_ids) if device_ids else Device.scan()[:self.params.device_count]
+        self._jobs = queue.Queue()
+        self._workers = [threading.Thread(target=self._run, name=f"Thread-HailoCpuReference-{index}", daemon=True)
+                         for index in range(len(self.device_ids))]
+        for worker in self._workers:
+            worker.start()
+        logger.info(f"hailo_cpu_reference: VDevice created on {', '.join(self.device_ids)} (CPU stand-in)")
+
+    def _run(self):
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            configured, bindings, callback, job = item
+            try:
+                for binding in bindings:
+                    configured.run_bindings(binding)
+            except Exception as e:
+                job.exception = e
+            job._done.set()
+            try:
+                callback(SimpleNamespace(exception=job.exception))
+            except Exception as e:
+                logger.error(f"hailo_cpu_reference: job callback failed: {e}")
+
+    def create_infer_model(self, hef_path):
+        return InferModel(self, hef_path)
+
+    def get_physical_devices(self):
+        return []
+
+    def release(self):
+        for _ in self._workers:
+            self._jobs.put(None)
@@ -0,0 +1,301 @@
+# hailo_telemetry.py
+#
+# Hailo-8 inference telemetry: per-model job counts, latency percentiles,
+# wait timeouts and errors, recorded by BindingPool around every run_async
+# job, plus VDevice-level stats.
+#
+# Job latency runs from run_async submission to the HailoRT completion
+# callback, so it includes scheduler queueing behind other models' jobs;
+# 'in_flight' counts submitted jobs not completed yet. Device busy time is
+# the wall time with at least one job in flight on the VDevice (a host-side
+# estimate of NPU utilization; HAILO_MONITOR=1 additionally feeds
+# `hailortcli monitor` with HailoRT's own figures).
+#
+# Watchdog recoveries (VDevice re-initialization) and the frames dropped
+# while one is running are counted here too.
+#
+# With HAILO_DEVICE_MODE=shard every physical device has its own VDevice and
+# model set; their pools are named '<label>_<model>' (e.g. dev1_scrfd) and a
+# recovery only writes off the jobs of its own device.
+#
+# Stats are exported as the 'hailo' gauge group on GET /metrics and
+# summarized in a log line every HAILO_TELEMETRY_LOG_SEC seconds.
+
+import logging
+import os
+import sys
+import threading
+import time
+
+import runtime_config
+from latency_metrics import LatencyHistogram
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ModelStats:
+    """Counters and latency histogram of one model's jobs (one BindingPool name)."""
+
+    __slots__ = ('submitted', 'completed', 'errors', 'timeouts', 'in_flight', 'max_in_flight', 'latency',
+                 'reset_at')
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.latency = LatencyHistogram()
+        self.reset_at = 0.0   # jobs submitted before this died with a re-initialized VDevice
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+_lock = threading.Lock()
+_models = {}             # model name -> ModelStats
+_vdevices = {}           # device label -> VDevice ('' outside shard mode)
+_started_at = time.monotonic()
+_in_flight = 0           # jobs in flight across all models
+_busy_since = None       # monotonic time the device last went from idle to busy
+_busy_s = 0.0            # accumulated busy time since start
+_window_started_at = _started_at
+_window_busy_s = 0.0
+_window_completed = {}   # model name -> completed count at window start
+_recovering = 0          # devices being re-initialized
+_recoveries = 0
+_last_recovery_s = 0.0
+_frames_dropped = 0      # frames dropped while recovering
+
+
+def set_vdevice(vdevice, label=''):
+    """Register the VDevice whose physical devices are reported in stats().
+
+    Args:
+        vdevice: VDevice, or None to unregister
+        label: Device label of the VDevice in shard mode
+    """
+    with _lock:
+        if vdevice is None:
+            _vdevices.pop(label, None)
+        else:
+            _vdevices[label] = vdevice
+
+
+def _on_device(name, label):
+    """True if pool `name` runs on the VDevice with `label` ('' matches every pool)."""
+    return not label or name.startswith(label + '_')
+
+
+def _model(name):
+    stats = _models.get(name)
+    if stats is None:
+        stats = _models[name] = ModelStats()
+    return stats
+
+
+def _leave_busy(now):
+    """Account one job leaving the device (caller holds _lock)."""
+    global _in_flight, _busy_since, _busy_s, _window_busy_s
+    _in_flight -= 1
+    if _in_flight == 0 and _busy_since is not None:
+        busy = now - max(_busy_since, _window_started_at)
+        _busy_s += now - _busy_since
+        _window_busy_s += max(busy, 0.0)
+        _busy_since = None
+
+
+def job_submitted(name):
+    """Record a job submission.
+
+    Returns:
+        Submission timestamp to pass to job_completed()
+    """
+    global _in_flight, _busy_since
+    now = time.monotonic()
+    with _lock:
+        stats = _model(name)
+        stats.submitted += 1
+        stats.in_flight += 1
+        if stats.in_flight > stats.max_in_flight:
+            stats.max_in_flight = stats.in_flight
+        if _in_flight == 0:
+            _busy_since = now
+        _in_flight += 1
+    return now
+
+
+def job_completed(name, submitted_at, error=None):
+    """Record a job completion (HailoRT callback) or a failed submission.
+
+    Args:
+        name: Model name
+        submitted_at: Timestamp returned by job_submitted()
+        error: Exception reported for the job, if any
+    """
+    now = time.monotonic()
+    with _lock:
+        stats = _model(name)
+        if submitted_at < stats.reset_at:
+            return   # late callback of a job on a VDevice that was re-initialized
+        stats.in_flight -= 1
+        if error is None:
+            stats.completed += 1
+            stats.latency.record((now - submitted_at) * 1e6)
+        else:
+            stats.errors += 1
+        _leave_busy(now)
+    if error is not None:
+        logger.error(f"Hailo {name} job failed: {error}")
+    _maybe_log(now)
+
+
+def job_timeout(name):
+    """Record a wait() that gave up before the job completed."""
+    with _lock:
+        _model(name).timeouts += 1
+
+
+def frame_dropped():
+    """Record a frame dropped because the device is being re-initialized or a job failed."""
+    global _frames_dropped
+    with _lock:
+        _frames_dropped += 1
+
+
+def recovery_started():
+    global _recovering
+    with _lock:
+        _recovering += 1
+
+
+def recovery_finished(seconds, label=''):
+    """Record a completed VDevice re-initialization that took `seconds`.
+
+    Jobs of the device still counted in flight were lost with the old
+    VDevice and are written off.
+
+    Args:
+        seconds: Duration of the re-initialization
+        label: Device label of the VDevice in shard mode
+    """
+    global _recovering, _recoveries, _last_recovery_s, _in_flight
+    now = time.monotonic()
+    with _lock:
+        _recovering = max(_recovering - 1, 0)
+        _recoveries += 1
+        _last_recovery_s = seconds
+        written_off = 0
+        for name, model in _models.items():
+            if _on_device(name, label):
+                written_off += model.in_flight
+                model.in_flight = 0
+                model.reset_at = now
+        if written_off > 0 and _in_flight > 0:
+            _in_flight = max(_in_flight - written_off, 0) + 1
+            _leave_busy(now)
+
+
+def _device_stats():
+    """Chip temperature per physical device of the registered VDevices."""
+    stats = {}
+    with _lock:
+        vdevices = [vdevice for _, vdevice in sorted(_vdevices.items())]
+    if not vdevices:
+        return stats
+    devices = []
+    for vdevice in vdevices:
+        try:
+            devices.extend(vdevice.get_physical_devices())
+        except Exception as e:
+            logger.debug(f"hailo_telemetry: get_physical_devices failed: {e}")
+    stats['devices'] = len(devices)
+    for index, device in enumerate(devices):
+        try:
+            temperature = device.control.get_chip_temperature()
+            stats[f'device{index}_temperature_c'] = round(max(temperature.ts0_temperature,
+                                                               temperature.ts1_temperature), 1)
+        except Exception as e:
+            logger.debug(f"hailo_telemetry: temperature of device {index} unavailable: {e}")
+    return stats
+
+
+def stats():
+    """Flat {key: number} snapshot for latency_metrics.register_gauges()."""
+    now = time.monotonic()
+    with _lock:
+        busy_s = _busy_s + (now - _busy_since if _busy_since is not None else 0.0)
+        result = {
+            'uptime_seconds': round(now - _started_at, 3),
+            'busy_seconds': round(busy_s, 3),
+            'in_flight': _in_flight,
+            'recovering': _recovering,
+            'recoveries': _recoveries,
+            'last_recovery_seconds': round(_last_recovery_s, 3),
+            'frames_dropped': _frames_dropped,
+        }
+        for name, model in sorted(_models.items()):
+            key = name.replace('-', '_')
+            result[f'{key}_submitted'] = model.submitted
+            result[f'{key}_completed'] = model.completed
+            result[f'{key}_errors'] = model.errors
+            result[f'{key}_timeouts'] = model.timeouts
+            result[f'{key}_in_flight'] = model.in_flight
+            result[f'{key}_max_in_flight'] = model.max_in_flight
+            summary = model.latency.summary()
+            for field in ('mean_ms', 'p50_ms', 'p99_ms', 'max_ms'):
+                if field in summary:
+                    result[f'{key}_{field}'] = summary[field]
+    result.update(_device_stats())
+    return result
+
+
+def _maybe_log(now):
+    """Log a summary line once per HAILO_TELEMETRY_LOG_SEC window."""
+    global _window_started_at, _window_busy_s, _window_completed
+    interval = runtime_config.current().hailo_telemetry_log_sec
+    if interval <= 0 or now - _window_started_at < interval:
+        return
+
+    with _lock:
+        if now - _window_started_at < interval:
+            return   # another thread logged this window
+        elapsed = now - _window_started_at
+        busy = _window_busy_s + (now - max(_busy_since, _window_started_at) if _busy_since is not None else 0.0)
+        parts = []
+        for name, model in sorted(_models.items()):
+            jobs = model.completed - _window_completed.get(name, 0)
+            parts.append(f"{name} jobs={jobs} ({jobs / elapsed:.1f}/s) "
+                         f"p50={model.latency.percentile(50.0) / 1000.0:.1f}ms "
+                         f"p99={model.latency.percentile(99.0) / 1000.0:.1f}ms "
+                         f"timeouts={model.timeouts} errors={model.errors} max_in_flight={model.max_in_flight}")
+        _window_completed = {name: model.completed for name, model in _models.items()}
+        _window_started_at = now
+        _window_busy_s = 0.0
+
+    device = _device_stats()
+    temperatures = ' '.join(f"{k}={v}" for k, v in device.items() if k.endswith('_temperature_c'))
+    logger.info(f"Hailo telemetry {elapsed:.0f}s: busy={100 * busy / elapsed:.0f}% "
+                f"recoveries={_recoveries} dropped={_frames_dropped} | " + ' | '.join(parts)
+                + (f" | {temperatures}" if temperatures else ''))
+
+
+def reset():
+    """Drop all recorded stats."""
+    global _started_at, _in_flight, _busy_since, _busy_s, _window_started_at, _window_busy_s, _window_completed
+    global _recoveries, _last_recovery_s, _frames_dropped
+    with _lock:
+        _models.clear()
+        _started_at = _window_started_at = time.monotonic()
+        _in_flight = 0
+        _busy_since = None
+        _busy_s = _window_busy_s = 0.0
+        _window_completed = {}
+        _recoveries = 0
+        _last_recovery_s = 0.0
+        _frames_dropped = 0
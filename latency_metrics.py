@@ -0,0 +1,246 @@
+# latency_metrics.py
+#
+# Low-overhead per-camera, per-stage latency histograms.
+#
+# Each (cam_ip, stage) pair owns a log-linear histogram in the style of
+# HdrHistogram: values are recorded in microseconds into 32 sub-buckets per
+# power of two, so recording is a couple of integer ops and percentiles are
+# accurate to ~3% at any magnitude. Snapshots are served by py_handler on
+# GET /metrics as JSON or Prometheus text.
+
+import logging
+import math
+import os
+import sys
+import threading
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+STAGE_CAPTURE_DECODE = 'capture_decode'    # Pipeline 1 frame_time → decoded BGR frame
+STAGE_QUEUE_WAIT = 'queue_wait'            # cam_queue put → detector get
+STAGE_PREPROCESS = 'preprocess'            # colour convert + letterbox
+STAGE_DETECTION = 'detection'              # face detection inference + decode
+STAGE_RECOGNITION = 'recognition'          # alignment + embedding for all faces
+STAGE_MATCHING = 'matching'                # gallery search for all faces
+STAGE_HANDLER = 'handler'                  # match_handler on_match / on_no_match
+STAGE_PUBLISH = 'publish'                  # IoT publish
+STAGE_UPLOAD = 'upload'                    # S3 put_object
+STAGE_TRIGGER_TO_IDENTIFIED = 'trigger_to_identified'
+
+STAGES = (
+    STAGE_CAPTURE_DECODE,
+    STAGE_QUEUE_WAIT,
+    STAGE_PREPROCESS,
+    STAGE_DETECTION,
+    STAGE_RECOGNITION,
+    STAGE_MATCHING,
+    STAGE_HANDLER,
+    STAGE_PUBLISH,
+    STAGE_UPLOAD,
+    STAGE_TRIGGER_TO_IDENTIFIED,
+)
+
+# Label used when a measurement is not tied to a camera (e.g. /recognise)
+NO_CAMERA = '-'
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+METRIC_PREFIX = 'gocheckin'
+
+
+# ---------------------------------------------------------------------------
+# Histogram
+# ---------------------------------------------------------------------------
+SUB_BUCKET_BITS = 5
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS        # 32
+HALF_SUB_BUCKET_COUNT = SUB_BUCKET_COUNT // 2  # 16
+MAX_VALUE_US = (1 << 36) - 1                   # ~19 hours
+BUCKET_COUNT = (MAX_VALUE_US.bit_length() - SUB_BUCKET_BITS + 1) * HALF_SUB_BUCKET_COUNT + HALF_SUB_BUCKET_COUNT
+
+
+def _bucket_index(value_us):
+    """Map a value in microseconds to its log-linear bucket index."""
+    if value_us < SUB_BUCKET_COUNT:
+        return value_us
+    shift = value_us.bit_length() - SUB_BUCKET_BITS
+    # value_us >> shift lies in [16, 31]
+    return shift * HALF_SUB_BUCKET_COUNT + (value_us >> shift)
+
+
+def _bucket_bounds(index):
+    """Return (lower, upper) microsecond bounds of a bucket, upper exclusive."""
+    if index < SUB_BUCKET_COUNT:
+        return index, index + 1
+    shift = index // HALF_SUB_BUCKET_COUNT - 1
+    lower = (index - shift * HALF_SUB_BUCKET_COUNT) << shift
+    return lower, lower + (1 << shift)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram with fixed memory and O(1) record.
+
+    Not thread-safe on its own; the module-level registry serializes access.
+    """
+
+    __slots__ = ('counts', 'count', 'total_us', 'min_us', 'max_us')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total_us = 0
+        self.min_us = MAX_VALUE_US
+        self.max_us = 0
+
+    def record(self, value_us):
+        value_us = min(max(int(value_us), 0), MAX_VALUE_US)
+        self.counts[_bucket_index(value_us)] += 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def percentile(self, pct):
+        """Return the value (microseconds) at the given percentile.
+
+        The midpoint of the bucket holding the target rank is returned,
+        clamped to the recorded min/max.
+        """
+        if self.count == 0:
+            return 0
+        target = max(1, int(math.ceil(self.count * pct / 100.0)))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count == 0:
+                continue
+            seen += bucket_count
+            if seen >= target:
+                lower, upper = _bucket_bounds(index)
+                return min(max((lower + upper - 1) // 2, self.min_us), self.max_us)
+        return self.max_us
+
+    def summary(self):
+        """Return count, sum and percentile summary in milliseconds."""
+        if self.count == 0:
+            return {'count': 0}
+        result = {
+            'count': self.count,
+            'sum_ms': round(self.total_us / 1000.0, 3),
+            'min_ms': round(self.min_us / 1000.0, 3),
+            'mean_ms': round(self.total_us / self.count / 1000.0, 3),
+            'max_ms': round(self.max_us / 1000.0, 3),
+        }
+        for pct in PERCENTILES:
+            result[f'p{pct:g}_ms'] = round(self.percentile(pct) / 1000.0, 3)
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+_lock = threading.Lock()
+_histograms = {}       # (cam_ip, stage) -> LatencyHistogram
+_gauge_providers = {}  # name -> callable returning {key: number}
+
+
+def record(stage, seconds, cam_ip=None):
+    """Record one latency sample.
+
+    Args:
+        stage: One of STAGES
+        seconds: Duration in seconds (as returned by time.time() deltas)
+        cam_ip: Camera IP, or None for measurements not tied to a camera
+    """
+    if seconds is None or seconds < 0:
+        return
+    key = (cam_ip or NO_CAMERA, stage)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        histogram.record(seconds * 1e6)
+
+
+def register_gauges(name, provider):
+    """Register a callable whose {key: number} result is exported with the metrics.
+
+    Args:
+        name: Gauge group name, used as the metric name prefix
+        provider: Zero-argument callable returning a flat dict of numbers
+    """
+    with _lock:
+        _gauge_providers[name] = provider
+
+
+def reset():
+    """Drop all recorded samples."""
+    with _lock:
+        _histograms.clear()
+
+
+def _collect_gauges():
+    with _lock:
+        providers = list(_gauge_providers.items())
+    gauges = {}
+    for name, provider in providers:
+        try:
+            gauges[name] = dict(provider())
+        except Exception as e:
+            logger.error(f"latency_metrics gauge provider {name} failed: {e}")
+    return gauges
+
+
+def snapshot():
+    """Return all histograms as {'latency': {cam_ip: {stage: summary}}, 'gauges': {...}}."""
+    with _lock:
+        summaries = {key: histogram.summary() for key, histogram in _histograms.items()}
+
+    latency = {}
+    for (cam_ip, stage), summary in sorted(summaries.items()):
+        latency.setdefault(cam_ip, {})[stage] = summary
+    return {'latency': latency, 'gauges': _collect_gauges()}
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """Render histograms as Prometheus summaries and gauges in text format 0.0.4."""
+    with _lock:
+        rows = sorted(
+            (key, histogram.count, histogram.total_us,
+             [(pct, histogram.percentile(pct)) for pct in PERCENTILES])
+            for key, histogram in _histograms.items()
+        )
+
+    name = f'{METRIC_PREFIX}_stage_latency_seconds'
+    lines = [
+        f'# HELP {name} Per-camera processing stage latency.',
+        f'# TYPE {name} summary',
+    ]
+    for (cam_ip, stage), count, total_us, quantiles in rows:
+        labels = f'cam_ip="{_escape_label(cam_ip)}",stage="{_escape_label(stage)}"'
+        for pct, value_us in quantiles:
+            lines.append(f'{name}{{{labels},quantile="{pct / 100.0:g}"}} {value_us / 1e6:.6f}')
+        lines.append(f'{name}_sum{{{labels}}} {total_us / 1e6:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {count}')
+
+    for group, values in sorted(_collect_gauges().items()):
+        for key, value in sorted(values.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f'{METRIC_PREFIX}_{group}_{key}'
+            lines.append(f'# TYPE {metric} gauge')
+            lines.append(f'{metric} {value}')
+
+    return '\n'.join(lines) + '\n'
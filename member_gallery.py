@@ -0,0 +1,508 @@
+# member_gallery.py
+#
+# Keyed face-embedding gallery with incremental updates (Bug #7 follow-up).
+#
+# Members are keyed by (reservationCode, memberNo). Rows live in one
+# contiguous float32 matrix that is grown by doubling and compacted when it
+# drops below a quarter full; removal swaps the last row into the hole, so
+# add, remove and replace are all O(1) per member. sync() diffs a freshly
+# fetched member list against the gallery using a digest of the full
+# embedding and applies only the delta.
+#
+# A member may carry several face templates: 'faceEmbedding' plus an
+# optional 'faceEmbeddings' list of additional templates (e.g. registration
+# photos under different lighting). Templates of all members share one
+# ragged matrix; an owner array maps each template row to its member row,
+# and per-member max or mean pooling (GALLERY_POOLING) is a segmented
+# reduceat over the score matrix, so extra templates cost BLAS work only.
+#
+# Templates are stored L2-normalized, so a match is a plain dot product with
+# the normalized face. Storage precision is float32, float16 or int8 with a
+# per-row scale (GALLERY_DTYPE). numpy has no float16/int8 GEMM, so the
+# reduced-precision kernel upcasts the gallery in fixed-size row blocks and
+# runs float32 BLAS on each block: memory is halved/quartered and the
+# temporary stays bounded regardless of gallery size.
+
+import hashlib
+import itertools
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+EMBEDDING_DIM = 512
+MIN_CAPACITY = 16
+
+STORAGE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+POOLING_MODES = ('max', 'mean')
+
+# Gallery versions are unique across instances, so an index built for one
+# gallery never looks current for another
+_versions = itertools.count(1)
+
+# Rows upcast per block by the reduced-precision kernel (4096 x 512 x 4 B = 8 MB)
+SCORE_BLOCK_ROWS = 4096
+
+# Category match priority, highest first. A row's category code is its rank here.
+CATEGORY_PRIORITY = ('BLOCKLIST', 'ACTIVE', 'INACTIVE', 'STAFF')
+CATEGORY_CODES = {category: rank for rank, category in enumerate(CATEGORY_PRIORITY)}
+
+
+def member_key(member):
+    """Return the gallery key (reservationCode, memberNo) of a member dict."""
+    return (member.get('reservationCode'), member.get('memberNo'))
+
+
+def category_member_key(member):
+    """Return the combined-gallery key (category, reservationCode, memberNo)."""
+    return (member.get('category'),) + member_key(member)
+
+
+def category_code(member):
+    """Return the priority rank of a member's stamped 'category'."""
+    return CATEGORY_CODES[member['category']]
+
+
+def _as_embedding(value, dim):
+    emb = np.asarray(value, dtype=np.float32).ravel()
+    if emb.shape[0] != dim:
+        return None
+    return emb
+
+
+def member_templates(member, dim=EMBEDDING_DIM):
+    """Return a member's (K, dim) float32 templates, or None without a usable faceEmbedding.
+
+    Row 0 is 'faceEmbedding'; rows 1.. are the optional 'faceEmbeddings'
+    list. Extra templates of the wrong dimension are dropped.
+    """
+    primary = _as_embedding(member.get('faceEmbedding', []), dim)
+    if primary is None:
+        return None
+    extras = member.get('faceEmbeddings')
+    if extras is None or len(extras) == 0:
+        return primary[None, :]
+    rows = [primary] + [emb for emb in (_as_embedding(e, dim) for e in extras) if emb is not None]
+    return np.vstack(rows)
+
+
+def _digest(emb):
+    return hashlib.blake2b(emb.tobytes(), digest_size=16).digest()
+
+
+def normalize_rows(embeddings):
+    """Return (unit rows, norms) for an (F, D) float32 matrix; zero rows stay zero."""
+    norms = np.linalg.norm(embeddings, axis=1)
+    safe = np.where(norms > 0, norms, 1.0).astype(np.float32)
+    return embeddings / safe[:, None], norms
+
+
+@dataclass
+class GalleryDelta:
+    """Result of MemberGallery.sync()."""
+    added: list = field(default_factory=list)      # keys
+    removed: list = field(default_factory=list)    # keys
+    updated: list = field(default_factory=list)    # keys whose embedding changed
+    unchanged: int = 0
+    skipped: int = 0                                # members without a usable embedding
+
+    @property
+    def changed(self):
+        return bool(self.added or self.removed or self.updated)
+
+    def __str__(self):
+        return (f"+{len(self.added)} added, -{len(self.removed)} removed, "
+                f"{len(self.updated)} updated, {self.unchanged} unchanged"
+                + (f", {self.skipped} skipped" if self.skipped else ""))
+
+
+class MemberGallery:
+    """Ragged template matrix with a parallel member list.
+
+    Column i of ``scores()`` and row i of ``norms`` / ``codes`` belong to
+    ``members[i]``; template row t of ``embeddings`` belongs to member
+    ``owners[t]``. Readers that index rows after a matmul must hold ``lock``
+    across both, since removals move the last row into the freed slot.
+
+    Args:
+        dim: Embedding dimension
+        name: Label used in log lines
+        key_fn: member dict -> hashable key (default (reservationCode, memberNo))
+        code_fn: member dict -> small int stored per row (default 0)
+        dtype: Row storage, 'float32', 'float16' or 'int8' (per-row scaled)
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM, name='', key_fn=member_key, code_fn=None, dtype='float32'):
+        if dtype not in STORAGE_DTYPES:
+            logger.error(f"MemberGallery[{name}] unknown dtype {dtype!r}, using float32")
+            dtype = 'float32'
+        self.dim = dim
+        self.name = name
+        self.key_fn = key_fn
+        self.code_fn = code_fn
+        self.dtype = dtype
+        self.lock = threading.RLock()
+        self.version = next(_versions)   # changes on every row change (index staleness check)
+        self._allocate_members(MIN_CAPACITY)
+        self._allocate_templates(MIN_CAPACITY)
+        self._template_count = 0
+        self._members = []         # row -> member dict
+        self._keys = []            # row -> key
+        self._rows = {}            # key -> row
+        self._digests = {}         # key -> digest of all templates
+        self._template_rows = []   # row -> list of template rows
+        self._pool_plan = None     # (version, order, starts) for pooling all templates
+
+    def __len__(self):
+        return len(self._members)
+
+    @property
+    def template_count(self):
+        return self._template_count
+
+    @property
+    def embeddings(self):
+        """(T, dim) float32 unit template rows (dequantized copy unless stored as float32)."""
+        size = self._template_count
+        if self.dtype == 'float32':
+            return self._matrix[:size]
+        return self._matrix[:size].astype(np.float32) * self._scales[:size, None]
+
+    @property
+    def owners(self):
+        """(T,) member row of each template row."""
+        return self._owners[:self._template_count]
+
+    @property
+    def norms(self):
+        """(N,) norms of each member's faceEmbedding as supplied (before normalization)."""
+        return self._norms[:len(self._members)]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the live template rows."""
+        return self._matrix[:self._template_count].nbytes
+
+    def template_scores(self, unit_faces, rows=None):
+        """Cosine similarity of L2-normalized faces against template rows.
+
+        Args:
+            unit_faces: (F, dim) float32, rows L2-normalized
+            rows: Optional (M,) template rows to score instead of all rows
+
+        Returns:
+            (F, T) float32 similarities, or (F, M) when rows is given
+        """
+        if rows is not None:
+            block = self._matrix[rows].astype(np.float32)
+            out = np.dot(unit_faces, block.T)
+            if self.dtype == 'int8':
+                out *= self._scales[rows]
+            return out
+
+        size = self._template_count
+        if self.dtype == 'float32':
+            return np.dot(unit_faces, self._matrix[:size].T)
+
+        # (T, F) so each block writes a contiguous slab
+        unit_faces_t = np.ascontiguousarray(unit_faces.T, dtype=np.float32)
+        out = np.empty((size, unit_faces.shape[0]), dtype=np.float32)
+        for start in range(0, size, SCORE_BLOCK_ROWS):
+            stop = min(start + SCORE_BLOCK_ROWS, size)
+            block = self._matrix[start:stop].astype(np.float32)
+            np.dot(block, unit_faces_t, out=out[start:stop])
+            if self.dtype == 'int8':
+                out[start:stop] *= self._scales[start:stop, None]
+        return out.T
+
+    def scores(self, unit_faces, rows=None, pooling='max'):
+        """Per-member similarity of L2-normalized faces, pooled over templates.
+
+        Args:
+            unit_faces: (F, dim) float32, rows L2-normalized
+            rows: Optional (M,) template rows to score; members with no
+                  scored template get -inf
+            pooling: 'max' (best template) or 'mean' (average over the
+                     scored templates)
+
+        Returns:
+            (F, N) float32 similarities
+        """
+        similarities = self.template_scores(unit_faces, rows)
+        if rows is None:
+            order, starts = self._full_pool_plan()
+            return self._pool(similarities, order, starts, pooling)
+
+        owners = self._owners[rows]
+        order = np.argsort(owners, kind='stable')
+        sorted_owners = owners[order]
+        starts = _segment_starts(sorted_owners)
+        out = np.full((unit_faces.shape[0], len(self._members)), -np.inf, dtype=np.float32)
+        if starts.size:
+            out[:, sorted_owners[starts]] = self._pool(similarities, order, starts, pooling)
+        return out
+
+    @staticmethod
+    def _pool(similarities, order, starts, pooling):
+        """Reduce (F, M) template scores to one column per segment of owner-sorted templates."""
+        grouped = similarities[:, order]
+        if starts.size == order.size:
+            return grouped    # one template per member
+        if pooling == 'mean':
+            counts = np.diff(np.append(starts, order.size)).astype(np.float32)
+            return np.add.reduceat(grouped, starts, axis=1) / counts
+        return np.maximum.reduceat(grouped, starts, axis=1)
+
+    def _full_pool_plan(self):
+        plan = self._pool_plan
+        if plan is None or plan[0] != self.version:
+            order = np.argsort(self.owners, kind='stable')
+            starts = _segment_starts(self.owners[order])
+            plan = self._pool_plan = (self.version, order, starts)
+        return plan[1], plan[2]
+
+    @property
+    def codes(self):
+        """(N,) view of the live row codes (category rank for the combined gallery)."""
+        return self._codes[:len(self._members)]
+
+    @property
+    def members(self):
+        """Row-aligned member dicts (order is not the insertion order)."""
+        return self._members
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    # ------------------------------------------------------------------
+    # Single-member operations
+    # ------------------------------------------------------------------
+    def add(self, member, templates=None):
+        """Add a member, or replace it (and all its templates) if the key is already present.
+
+        Args:
+            member: Member dict
+            templates: Optional (K, dim) templates; taken from the member's
+                       faceEmbedding / faceEmbeddings when omitted
+
+        Returns:
+            True if the member was stored, False if its embedding is unusable
+        """
+        if templates is None:
+            templates = member_templates(member, self.dim)
+            if templates is None:
+                return False
+        templates = np.asarray(templates, dtype=np.float32).reshape(-1, self.dim)
+
+        key = self.key_fn(member)
+        with self.lock:
+            row = self._rows.get(key)
+            if row is None:
+                row = len(self._members)
+                self._reserve_members(row + 1)
+                self._members.append(member)
+                self._keys.append(key)
+                self._rows[key] = row
+                self._template_rows.append([])
+            else:
+                self._members[row] = member
+                self._drop_templates(row)
+            self._append_templates(row, templates)
+            self._norms[row] = np.linalg.norm(templates[0])
+            self._codes[row] = self.code_fn(member) if self.code_fn else 0
+            self._digests[key] = _digest(templates)
+            self.version = next(_versions)
+        return True
+
+    def replace(self, member, templates=None):
+        """Replace an existing member's dict and templates (alias of add)."""
+        return self.add(member, templates)
+
+    def remove(self, key):
+        """Remove a member by key. Returns True if it was present."""
+        with self.lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return False
+            self._digests.pop(key, None)
+            self._drop_templates(row)
+
+            last = len(self._members) - 1
+            if row != last:
+                # Move the last member into the hole to keep rows contiguous
+                last_key = self._keys[last]
+                self._norms[row] = self._norms[last]
+                self._codes[row] = self._codes[last]
+                self._members[row] = self._members[last]
+                self._keys[row] = last_key
+                self._rows[last_key] = row
+                self._template_rows[row] = self._template_rows[last]
+                self._owners[self._template_rows[row]] = row
+            self._members.pop()
+            self._keys.pop()
+            self._template_rows.pop()
+            self._compact()
+            self.version = next(_versions)
+        return True
+
+    def clear(self):
+        with self.lock:
+            self._allocate_members(MIN_CAPACITY)
+            self._allocate_templates(MIN_CAPACITY)
+            self._template_count = 0
+            self.version = next(_versions)
+            self._members = []
+            self._keys = []
+            self._rows = {}
+            self._digests = {}
+            self._template_rows = []
+
+    # ------------------------------------------------------------------
+    # Bulk diff
+    # ------------------------------------------------------------------
+    def sync(self, members):
+        """Make the gallery match ``members`` by applying only the delta.
+
+        Members whose template digest is unchanged keep their rows; only the
+        dict reference is refreshed so fields such as keyNotified or
+        authorizedSpaces stay current.
+
+        Args:
+            members: Iterable of member dicts with a 'faceEmbedding' field and
+                     optionally a 'faceEmbeddings' list of extra templates
+
+        Returns:
+            GalleryDelta describing what changed
+        """
+        delta = GalleryDelta()
+        incoming = {}
+        for member in members or []:
+            templates = member_templates(member, self.dim)
+            if templates is None:
+                delta.skipped += 1
+                logger.warning(f"MemberGallery[{self.name}] {self.key_fn(member)} skipped: "
+                               f"embedding is not {self.dim}-d")
+                continue
+            incoming[self.key_fn(member)] = (member, templates)
+
+        with self.lock:
+            for key in [k for k in self._keys if k not in incoming]:
+                self.remove(key)
+                delta.removed.append(key)
+
+            for key, (member, templates) in incoming.items():
+                row = self._rows.get(key)
+                if row is None:
+                    self.add(member, templates)
+                    delta.added.append(key)
+                elif self._digests.get(key) != _digest(templates):
+                    self.add(member, templates)
+                    delta.updated.append(key)
+                else:
+                    self._members[row] = member
+                    delta.unchanged += 1
+
+        return delta
+
+    # ------------------------------------------------------------------
+    # Storage management
+    # ------------------------------------------------------------------
+    def _allocate_members(self, capacity):
+        self._norms = np.zeros(capacity, dtype=np.float32)
+        self._codes = np.zeros(capacity, dtype=np.int8)
+
+    def _allocate_templates(self, capacity):
+        self._matrix = np.zeros((capacity, self.dim), dtype=STORAGE_DTYPES[self.dtype])
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._owners = np.zeros(capacity, dtype=np.int32)
+
+    def _append_templates(self, row, templates):
+        """Normalize templates and append them as rows owned by member row."""
+        start = self._template_count
+        stop = start + templates.shape[0]
+        self._reserve_templates(stop)
+        unit, _ = normalize_rows(templates)
+        if self.dtype == 'int8':
+            scales = np.abs(unit).max(axis=1) / 127.0
+            scales[scales == 0.0] = 1.0
+            self._matrix[start:stop] = np.clip(np.rint(unit / scales[:, None]), -127, 127)
+            self._scales[start:stop] = scales
+        else:
+            self._matrix[start:stop] = unit
+            self._scales[start:stop] = 1.0
+        self._owners[start:stop] = row
+        self._template_rows[row] = list(range(start, stop))
+        self._template_count = stop
+
+    def _drop_templates(self, row):
+        """Remove all template rows of member row, filling holes from the end."""
+        # Highest first, so the last template row never belongs to this member
+        for template_row in sorted(self._template_rows[row], reverse=True):
+            last = self._template_count - 1
+            if template_row != last:
+                owner = self._owners[last]
+                self._matrix[template_row] = self._matrix[last]
+                self._scales[template_row] = self._scales[last]
+                self._owners[template_row] = owner
+                owner_rows = self._template_rows[owner]
+                owner_rows[owner_rows.index(last)] = template_row
+            self._template_count -= 1
+        self._template_rows[row] = []
+
+    def _reserve_members(self, size):
+        capacity = _grown(self._norms.shape[0], size)
+        if capacity is not None:
+            self._resize_members(capacity)
+
+    def _reserve_templates(self, size):
+        capacity = _grown(self._matrix.shape[0], size)
+        if capacity is not None:
+            self._resize_templates(capacity)
+
+    def _compact(self):
+        capacity = self._norms.shape[0]
+        if capacity > MIN_CAPACITY and len(self._members) < capacity // 4:
+            self._resize_members(max(MIN_CAPACITY, capacity // 2))
+        capacity = self._matrix.shape[0]
+        if capacity > MIN_CAPACITY and self._template_count < capacity // 4:
+            self._resize_templates(max(MIN_CAPACITY, capacity // 2))
+
+    def _resize_members(self, capacity):
+        size = len(self._members)
+        old = (self._norms, self._codes)
+        self._allocate_members(capacity)
+        for new_array, old_array in zip((self._norms, self._codes), old):
+            new_array[:size] = old_array[:size]
+
+    def _resize_templates(self, capacity):
+        size = self._template_count
+        old = (self._matrix, self._scales, self._owners)
+        self._allocate_templates(capacity)
+        for new_array, old_array in zip((self._matrix, self._scales, self._owners), old):
+            new_array[:size] = old_array[:size]
+
+
+def _grown(capacity, size):
+    """Return the doubled capacity that fits size, or None if capacity already does."""
+    if size <= capacity:
+        return None
+    while capacity < size:
+        capacity *= 2
+    return capacity
+
+
+def _segment_starts(sorted_owners):
+    """Start offsets of each run of equal owners in an owner-sorted array."""
+    if sorted_owners.size == 0:
+        return np.zeros(0, dtype=np.intp)
+    return np.flatnonzero(np.concatenate(([True], sorted_owners[1:] != sorted_owners[:-1])))
@@ -0,0 +1,198 @@
+# ort_session.py
+#
+# ONNX Runtime session tuning and warm-up for the InsightFace backend.
+#
+# insightface's model_zoo only forwards providers/provider_options to
+# onnxruntime.InferenceSession, so FaceAnalysis models always start with
+# default SessionOptions. tune_face_app() recreates each model's session
+# with the ORT_* settings from runtime_config:
+#   ORT_INTRA_OP_THREADS / ORT_INTER_OP_THREADS   thread pools (0 = ORT
+#       default); inter-op threads > 1 switch to ORT_PARALLEL execution
+#   ORT_GRAPH_OPTIMIZATION   disable / basic / extended / all
+#   ORT_ENABLE_CPU_MEM_ARENA / ORT_ENABLE_MEM_PATTERN   allocator settings
+#   ORT_OPTIMIZED_MODEL_CACHE   directory of graph-optimized models
+#
+# Optimized-model cache: the first start saves each optimized graph as
+#   <model stem>-<size>-<mtime>-ort<version>-<level>.onnx
+# and later starts load it with optimization disabled, skipping the graph
+# transforms. The key changes with the model file, the ORT version and the
+# optimization level, so a stale file is never picked up; a file that fails
+# to load is rebuilt.
+#
+# warm_up() then runs INSIGHTFACE_WARMUP_RUNS synthetic inferences through
+# every model, so allocator growth and first-run kernel setup happen at
+# startup instead of inside the first real unlock session.
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+import runtime_config
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    'disable': 'ORT_DISABLE_ALL',
+    'basic': 'ORT_ENABLE_BASIC',
+    'extended': 'ORT_ENABLE_EXTENDED',
+    'all': 'ORT_ENABLE_ALL',
+}
+
+
+# ---------------------------------------------------------------------------
+# Session creation
+# ---------------------------------------------------------------------------
+def session_options(config=None):
+    """onnxruntime.SessionOptions from the ORT_* settings.
+
+    Args:
+        config: RuntimeConfig (default: runtime_config.current())
+
+    Returns:
+        SessionOptions (optimized_model_filepath not set)
+    """
+    config = config or runtime_config.current()
+    options = onnxruntime.SessionOptions()
+    if config.ort_intra_op_threads > 0:
+        options.intra_op_num_threads = config.ort_intra_op_threads
+    if config.ort_inter_op_threads > 0:
+        options.inter_op_num_threads = config.ort_inter_op_threads
+        if config.ort_inter_op_threads > 1:
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+    options.graph_optimization_level = getattr(onnxruntime.GraphOptimizationLevel,
+                                               GRAPH_OPTIMIZATION_LEVELS[config.ort_graph_optimization])
+    options.enable_cpu_mem_arena = config.ort_enable_cpu_mem_arena
+    options.enable_mem_pattern = config.ort_enable_mem_pattern
+    return options
+
+
+def _cached_model_path(cache_dir, model_file, level):
+    stat = os.stat(model_file)
+    stem = os.path.splitext(os.path.basename(model_file))[0]
+    return os.path.join(cache_dir, f"{stem}-{stat.st_size}-{int(stat.st_mtime)}-ort{onnxruntime.__version__}-{level}.onnx")
+
+
+def create_session(model_file, providers, config=None):
+    """InferenceSession for model_file with the ORT_* settings and optimized-model cache.
+
+    Args:
+        model_file: Path to the ONNX model
+        providers: Execution providers
+        config: RuntimeConfig (default: runtime_config.current())
+
+    Returns:
+        onnxruntime.InferenceSession
+    """
+    config = config or runtime_config.current()
+    cache_dir = config.ort_optimized_model_cache
+    level = config.ort_graph_optimization
+    cached = _cached_model_path(cache_dir, model_file, level) if cache_dir and level != 'disable' else None
+
+    if cached and os.path.exists(cached):
+        options = session_options(config)
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            session = onnxruntime.InferenceSession(cached, sess_options=options, providers=providers)
+            logger.info(f"ORT session {os.path.basename(model_file)}: loaded optimized model {cached}")
+            return session
+        except Exception as e:
+            logger.warning(f"ORT session {os.path.basename(model_file)}: cached model {cached} unusable, rebuilding: {e}")
+            try:
+                os.remove(cached)
+            except OSError:
+                pass
+
+    options = session_options(config)
+    if cached:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            options.optimized_model_filepath = cached
+        except OSError as e:
+            logger.warning(f"ORT optimized model cache {cache_dir} unavailable: {e}")
+    started_at = time.time()
+    session = onnxruntime.InferenceSession(model_file, sess_options=options, providers=providers)
+    logger.info(f"ORT session {os.path.basename(model_file)}: created in {1000 * (time.time() - started_at):.0f}ms "
+                f"(optimization={level}{', saved ' + cached if options.optimized_model_filepath else ''})")
+    return session
+
+
+def tune_face_app(face_app, config=None):
+    """Recreate the sessions of a prepared insightface FaceAnalysis with the ORT_* settings.
+
+    Args:
+        face_app: insightface FaceAnalysis (after prepare())
+        config: RuntimeConfig (default: runtime_config.current())
+    """
+    if onnxruntime is None:
+        logger.warning("onnxruntime not available, keeping default InsightFace sessions")
+        return
+    config = config or runtime_config.current()
+    for taskname, model in face_app.models.items():
+        try:
+            model.session = create_session(model.model_file, model.session.get_providers(), config)
+        except Exception as e:
+            logger.error(f"ORT session tuning failed for {taskname} ({model.model_file}), keeping default session: {e}")
+
+    logger.info(f"ORT sessions tuned: intra_op={config.ort_intra_op_threads or 'default'}, "
+                f"inter_op={config.ort_inter_op_threads or 'default'}, optimization={config.ort_graph_optimization}, "
+                f"cpu_mem_arena={config.ort_enable_cpu_mem_arena}, mem_pattern={config.ort_enable_mem_pattern}")
+
+
+# ---------------------------------------------------------------------------
+# Warm-up
+# ---------------------------------------------------------------------------
+def warm_up(face_app, det_size=(640, 640), runs=None):
+    """Run synthetic inferences through every model of face_app.
+
+    Detection runs through face_app.get() on a noise frame of det_size;
+    models that only see face crops (recognition) run get_feat() on a
+    crop of their input size, since a noise frame yields no faces.
+
+    Args:
+        face_app: insightface FaceAnalysis (FaceAnalysisChild)
+        det_size: Detection input size used by the detector thread
+        runs: Number of passes (default: INSIGHTFACE_WARMUP_RUNS)
+
+    Returns:
+        List of per-pass durations in seconds
+    """
+    runs = runtime_config.current().insightface_warmup_runs if runs is None else runs
+    if runs <= 0:
+        return []
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(det_size[1], det_size[0], 3), dtype=np.uint8)
+    crops = {}
+    for taskname, model in face_app.models.items():
+        if taskname != 'detection' and hasattr(model, 'get_feat'):
+            width, height = model.input_size
+            crops[taskname] = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    durations = []
+    for _ in range(runs):
+        started_at = time.time()
+        try:
+            face_app.get(frame, det_size=det_size)
+            for taskname, crop in crops.items():
+                face_app.models[taskname].get_feat(crop)
+        except Exception as e:
+            logger.error(f"InsightFace warm-up failed: {e}")
+            return durations
+        durations.append(time.time() - started_at)
+
+    logger.info(f"InsightFace warm-up ({', '.join(face_app.models)}): "
+                + ', '.join(f"{1000 * d:.0f}ms" for d in durations))
+    return durations
@@ -14,11 +14,13 @@ import traceback
 
 import http.server
 import socketserver
+import urllib.parse
 
 import socket
 
 import threading
 import time
+from decimal import Decimal
 
 import gc
 
@@ -34,12 +36,19 @@ import s3_uploader as uploader
 
 import gstreamer_threading as gst
 
+import runtime_config
+import latency_metrics
+import gallery_cache
+import hailo_telemetry
+
 # Face recognition backend selection
 # FACE_BACKEND is set by detect_face_backend() at module load
 FACE_BACKEND = 'insightface'  # Default, will be updated by detect_face_backend()
 
 from match_handler import SecurityHandlerChain
 
+from detection_scheduler import DetectionQueue
+
 # Active face detection module - set by detect_face_backend()
 # Backend modules (face_recognition / face_recognition_hailo) are imported
 # lazily in detect_face_backend() to avoid loading unused runtimes.
@@ -86,6 +95,11 @@ scanner_local_ip = get_local_ip()
 # Initialize the active_members and the last_fetch_time
 last_fetch_time = None
 active_members = None
+all_category_members = None  # Hailo: {category: [members]}
+
+# Member embeddings re-encoded by the last Hailo model swap, valid in reencoded_space
+reencoded_space = None
+reencoded_embeddings = {}   # (reservationCode, memberNo) -> embedding
 
 # Initialize the face_app, uploader_app
 face_app = None
@@ -129,7 +143,9 @@ def _get_uc_toggles_for_cam(cam_ip: str) -> dict:
     return {}
 
 match_handler = SecurityHandlerChain(scanner_output_queue, get_uc_toggles_fn=_get_uc_toggles_for_cam)
-cam_queue = Queue(maxsize=500)
+# Priority-ordered: P2 unlock sessions first, P1 surveillance frames shed under load
+cam_queue = DetectionQueue(maxsize=500)
+latency_metrics.register_gauges('detection_queue', cam_queue.stats)
 # motion_detection_queue = Queue(maxsize=500)
 
 # Initialize the DynamoDB resource
@@ -175,16 +191,21 @@ def function_handler(event, context):
         if 'cam_ip' in event:
             trigger_face_detection(event['cam_ip'], 'force')
     elif topic == f"gocheckin/{os.environ['AWS_IOT_THING_NAME']}/change_var":
-        logger.info(f"function_handler change_var event: ${event}")
-        for key, value in event.items():
-            os.environ[key] = value
-            logger.info(f"change_var: ${key}: ${value}")
-            if key == "TIMER_CAM_RENEW" or key == "ONVIF_EXPIRATION":
-                init_cameras()
-                break
-            elif key == "TIMER_INIT_ENV_VAR":
-                init_env_var()
-                break
+        logger.info(f"function_handler change_var event: {event}")
+        result = runtime_config.reload(event)
+        logger.info(f"change_var: changed={sorted(result.changed)}, reinit={sorted(result.reinit)}")
+
+        if runtime_config.SUBSYSTEM_CAMERAS in result.reinit:
+            init_cameras()
+        if runtime_config.SUBSYSTEM_ENV_VAR in result.reinit:
+            init_env_var()
+        if runtime_config.SUBSYSTEM_GALLERY in result.reinit and thread_detector is not None:
+            thread_detector.rebuild_galleries()
+        if runtime_config.SUBSYSTEM_HAILO_MODELS in result.reinit:
+            swap_hailo_models(result.changed)
+        for subsystem in result.reinit - {runtime_config.SUBSYSTEM_CAMERAS, runtime_config.SUBSYSTEM_ENV_VAR,
+                                          runtime_config.SUBSYSTEM_GALLERY, runtime_config.SUBSYSTEM_HAILO_MODELS}:
+            logger.warning(f"change_var: {subsystem} must be re-initialized for the change to take effect")
     elif topic == "gocheckin/trigger_detection":
         logger.info('function_handler trigger_detection event: %s', json.dumps(event))
         cam_ip = event.get('cam_ip')
@@ -300,11 +321,21 @@ def init_face_detector():
         logger.info('init_face_detector out, face_app is None')
         return
 
-    fetch_members()
+    # Start matching from the on-disk gallery and reconcile with DynamoDB in the background
+    reconcile_in_background = load_cached_members()
+    if not reconcile_in_background:
+        fetch_members()
 
     thread_detector = fdm.FaceRecognition(face_app, active_members, match_handler, cam_queue, fdm_backend=fdm)
+    if all_category_members is not None:
+        thread_detector.all_members_by_category = all_category_members
     thread_detector.start()
 
+    if reconcile_in_background:
+        timer = threading.Timer(0.1, fetch_members, kwargs={'forced': True})
+        timer.name = "Thread-FetchMembers"
+        timer.start()
+
     if thread_detector is not None:
         if thread_detector.is_alive():
 
@@ -337,6 +368,8 @@ def monitor_detector():
     thread_monitor_detector = None
 
     thread_detector = fdm.FaceRecognition(face_app, active_members, match_handler, cam_queue, fdm_backend=fdm)
+    if all_category_members is not None:
+        thread_detector.all_members_by_category = all_category_members
     thread_detector.start()
 
     if thread_detector is not None:
@@ -348,6 +381,7 @@ def monitor_detector():
 
 def init_insightface_app(model=None):
     from insightface.app import FaceAnalysis
+    import ort_session
 
     class FaceAnalysisChild(FaceAnalysis):
         def get(self, img, max_num=0, det_size=(640, 640)):
@@ -360,30 +394,36 @@ def init_insightface_app(model=None):
 
     if face_app is None:
         if model is None:
-            model = os.environ.get('INSIGHTFACE_MODEL', 'buffalo_sc')
+            model = runtime_config.current().insightface_model
         logger.info(f"Initializing InsightFace face_app with Model: {model}")
         face_app = FaceAnalysisChild(name=model, allowed_modules=['detection', 'recognition'], providers=['CPUExecutionProvider'], root=os.environ['INSIGHTFACE_LOCATION'])
         face_app.prepare(ctx_id=0, det_size=(640, 640))
 
+        # Tuned sessions (threads, optimization level, optimized-model cache) and a
+        # synthetic warm-up, so the first real frame runs at steady-state latency
+        ort_session.tune_face_app(face_app)
+        ort_session.warm_up(face_app, det_size=(640, 640))
+
 
 def init_hailo_app():
     """Initialize Hailo-8 accelerated face recognition backend with UC8 support."""
     global face_app, fdm
     if face_app is None and FACE_BACKEND == 'hailo':
-        from face_recognition_hailo import HailoUC8App
         import face_recognition_hailo
 
-        # HEF model paths from environment or defaults
-        yolo_hef = os.environ.get('HAILO_YOLO_HEF')
-        det_hef = os.environ.get('HAILO_DET_HEF')
-        rec_hef = os.environ.get('HAILO_REC_HEF')
+        config = runtime_config.current()
+
+        # HEF model paths from config or defaults
+        yolo_hef = config.hailo_yolo_hef or None
+        det_hef = config.hailo_det_hef or None
+        rec_hef = config.hailo_rec_hef or None
 
         # UC8 configuration
-        yolo_threshold = float(os.environ.get('YOLO_DETECT_THRESHOLD', '0.5'))
-        face_threshold = float(os.environ.get('FACE_RECOG_THRESHOLD', '0.45'))
+        yolo_threshold = config.yolo_detect_threshold
+        face_threshold = config.hailo_det_score_threshold
 
         logger.info(f"Initializing HailoUC8App with yolo={yolo_hef}, det={det_hef}, rec={rec_hef}")
-        face_app = HailoUC8App(
+        face_app = face_recognition_hailo.create_hailo_app(
             yolo_hef_path=yolo_hef,
             det_hef_path=det_hef,
             rec_hef_path=rec_hef,
@@ -391,6 +431,9 @@ def init_hailo_app():
             face_threshold=face_threshold
         )
         fdm = face_recognition_hailo
+        latency_metrics.register_gauges('hailo', hailo_telemetry.stats)
+        if isinstance(face_app, face_recognition_hailo.HailoShardedApp):
+            latency_metrics.register_gauges('hailo_shards', face_app.shard_stats)
 
 def init_cameras():
     logger.info(f"init_cameras in")
@@ -432,7 +475,7 @@ def init_cameras():
                 traceback.print_exc()
             pass
 
-    timer = threading.Timer(int(os.environ['TIMER_CAM_RENEW']), init_cameras)
+    timer = threading.Timer(runtime_config.current().timer_cam_renew, init_cameras)
     timer.name = name
     timer.start()
 
@@ -509,6 +552,41 @@ def start_http_server():
         def log_message(self, format, *args):
             # Override this method to suppress logging
             return
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if url.path != '/metrics':
+                return super().do_GET()
+
+            try:
+                # ?format=prometheus|json, otherwise negotiate on the Accept header
+                query = urllib.parse.parse_qs(url.query)
+                output_format = query.get('format', [''])[0].lower()
+                if not output_format:
+                    accept = self.headers.get('Accept', '')
+                    output_format = 'prometheus' if 'text/plain' in accept or 'openmetrics' in accept else 'json'
+
+                if output_format == 'prometheus':
+                    body = latency_metrics.render_prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                else:
+                    body = json.dumps(latency_metrics.snapshot()).encode()
+                    content_type = 'application/json'
+
+                self.send_response(200)
+                self.send_header('Content-type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except BrokenPipeError:
+                logger.error("Client disconnected before the response could be sent.")
+            except Exception as e:
+                logger.error(f"Error handling GET /metrics: {e}")
+                traceback.print_exc()
+
+                self.send_response(500)
+                self.end_headers()
+                self.wfile.write(b'Internal Server Error')
         
         def do_POST(self):
             # global thread_detector
@@ -979,7 +1057,8 @@ def get_members_for_reservations(reservations, category):
         return []
 
     tbl_member = os.environ['TBL_MEMBER']
-    attributes_to_get = ['reservationCode', 'memberNo', 'faceEmbedding', 'fullName', 'keyNotified']
+    attributes_to_get = ['reservationCode', 'memberNo', 'faceEmbedding', 'faceEmbeddings', 'reencodedFaceEmbedding',
+                         'fullName', 'keyNotified', os.environ.get('COL_FACE_IMG_URL', 'faceImgUrl')]
 
     results = []
     for reservation in reservations:
@@ -999,6 +1078,8 @@ def get_members_for_reservations(reservations, category):
     for item in results:
         if 'faceEmbedding' in item:
             item['faceEmbedding'] = np.array([float(v) for v in item['faceEmbedding']])
+            if 'faceEmbeddings' in item:
+                item['faceEmbeddings'] = [np.array([float(v) for v in emb]) for emb in item['faceEmbeddings']]
             item['category'] = category
             filtered.append(item)
         else:
@@ -1067,7 +1148,8 @@ def get_active_members():
     active_reservations = get_active_reservations()
 
     # Define the list of attributes to retrieve
-    attributes_to_get = ['reservationCode', 'memberNo', 'faceEmbedding', 'fullName', 'keyNotified']
+    attributes_to_get = ['reservationCode', 'memberNo', 'faceEmbedding', 'faceEmbeddings', 'fullName', 'keyNotified',
+                         os.environ.get('COL_FACE_IMG_URL', 'faceImgUrl')]
 
     # Initialize an empty list to store the results
     results = []
@@ -1098,6 +1180,8 @@ def get_active_members():
     for item in results:
         if 'faceEmbedding' in item:
             item['faceEmbedding'] = np.array([float(value) for value in item['faceEmbedding']])
+            if 'faceEmbeddings' in item:
+                item['faceEmbeddings'] = [np.array([float(value) for value in emb]) for emb in item['faceEmbeddings']]
             filtered_results.append(item)
         else:
             logger.debug(f"get_active_members, member {item['reservationCode']}-{item['memberNo']} filtered out with no faceEmbedding")
@@ -1109,11 +1193,41 @@ def get_active_members():
 
     return results
 
+def get_embedding_space():
+    """Identify the model producing embeddings, so a cached gallery from another model is not reused."""
+    config = runtime_config.current()
+    if FACE_BACKEND == 'hailo':
+        if face_app is not None:
+            return face_app.model.embedding_space
+        return f"hailo:{os.path.basename(config.hailo_rec_hef)}"
+    return f"insightface:{config.insightface_model}"
+
+
+def load_cached_members():
+    """Populate active_members / all_category_members from the gallery cache.
+
+    Returns:
+        True if cached members were loaded (DynamoDB reconcile still needed)
+    """
+    global active_members
+    global all_category_members
+
+    cached = gallery_cache.load(runtime_config.current().gallery_cache_path, get_embedding_space())
+    if not cached:
+        return False
+
+    active_members = cached.get('ACTIVE', [])
+    if FACE_BACKEND == 'hailo':
+        all_category_members = {category: cached.get(category, []) for category in ('ACTIVE', 'INACTIVE', 'STAFF', 'BLOCKLIST')}
+    return True
+
+
 def fetch_members(forced=False):
     logger.debug('fetch_members in')
 
     global last_fetch_time
     global active_members
+    global all_category_members
 
     current_date = datetime.now().date()
 
@@ -1121,8 +1235,9 @@ def fetch_members(forced=False):
 
     if needs_fetch:
         if FACE_BACKEND == 'hailo':
-            all_members = get_all_category_members()
+            all_members = use_current_embedding_space(get_all_category_members())
             active_members = all_members.get('ACTIVE', [])
+            all_category_members = all_members
             last_fetch_time = current_date
             if thread_detector is not None:
                 logger.debug("fetch_members: setting active_members + all_members_by_category on detector")
@@ -1130,11 +1245,178 @@ def fetch_members(forced=False):
                 thread_detector.all_members_by_category = all_members
         else:
             active_members = get_active_members()
+            all_members = {'ACTIVE': active_members}
             last_fetch_time = current_date
             if thread_detector is not None:
                 logger.debug("fetch_members: setting active_members on detector")
                 thread_detector.active_members = active_members
 
+        gallery_cache.save(runtime_config.current().gallery_cache_path, all_members, get_embedding_space())
+
+
+def swap_hailo_models(changed):
+    """Hot-swap the SCRFD/ArcFace HEFs after a change_var touching the Hailo model set.
+
+    Args:
+        changed: env names changed by the reload
+    """
+    if FACE_BACKEND != 'hailo' or face_app is None:
+        logger.warning("swap_hailo_models: Hailo backend not running, change applies on next start")
+        return
+    if 'HAILO_YOLO_HEF' in changed:
+        logger.warning("swap_hailo_models: HAILO_YOLO_HEF is only loaded at startup, restart to apply")
+
+    config = runtime_config.current()
+    face_app.swap_models(det_hef_path=config.hailo_det_hef or None,
+                         rec_hef_path=config.hailo_rec_hef or None,
+                         prepare=reencode_gallery)
+
+
+def encode_face_image(app, url):
+    """Embedding of the first face in the image at url, or None."""
+    try:
+        image_bgr, _ = web_img.read_picture_from_url(url)
+        faces = app.get(image_bgr)
+    except Exception as e:
+        logger.error(f"encode_face_image: {url}: {e}")
+        return None
+    if len(faces) == 0:
+        logger.warning(f"encode_face_image: no face detected in {url}")
+        return None
+    return faces[0].embedding
+
+
+def update_member_embedding(reservationCode, memberNo, embedding, embedding_space):
+    """Store a re-encoded embedding with its embedding space in TBL_MEMBER.
+
+    The registered faceEmbedding / faceEmbeddings are left as they are; the
+    vector goes to reencodedFaceEmbedding {'space', 'embedding'}.
+    """
+    table = dynamodb.Table(os.environ['TBL_MEMBER'])
+    table.update_item(
+        Key={'reservationCode': reservationCode, 'memberNo': memberNo},
+        UpdateExpression='SET #re = :re',
+        ExpressionAttributeNames={'#re': 'reencodedFaceEmbedding'},
+        ExpressionAttributeValues={':re': {
+            'space': embedding_space,
+            'embedding': [Decimal(str(v)) for v in np.asarray(embedding, dtype=np.float32).tolist()],
+        }}
+    )
+
+
+def use_current_embedding_space(members_by_category):
+    """Give members fetched from TBL_MEMBER the embedding of the running model where one exists.
+
+    The embedding comes from the last model swap of this process
+    (reencoded_embeddings) or from the member's reencodedFaceEmbedding when
+    its space matches. Other members keep their registered embedding; if
+    some members were re-encoded, those are reported.
+
+    Args:
+        members_by_category: dict {category: [member dicts]}, updated in place
+
+    Returns:
+        members_by_category
+    """
+    space = get_embedding_space()
+    overlay = reencoded_embeddings if reencoded_space == space else {}
+    replaced = 0
+    missing = set()
+    for members in members_by_category.values():
+        for member in members:
+            key = (member['reservationCode'], member['memberNo'])
+            stored = member.pop('reencodedFaceEmbedding', None)
+            embedding = overlay.get(key)
+            if embedding is None and stored and stored.get('space') == space:
+                embedding = np.array([float(v) for v in stored['embedding']])
+            if embedding is None:
+                missing.add(key)
+                continue
+            member['faceEmbedding'] = embedding
+            member.pop('faceEmbeddings', None)
+            replaced += 1
+
+    if missing and (replaced or overlay):
+        logger.warning(f"use_current_embedding_space: {len(missing)} member(s) have no {space} embedding, "
+                       f"matching with the registered one: " + ', '.join(f"{c}-{n}" for c, n in sorted(missing)))
+    return members_by_category
+
+
+def reencode_gallery(old_model, new_app):
+    """swap_models() prepare hook: re-encode members when the embedding space changes.
+
+    Each member's faceImgUrl is run through the new models before the
+    switch. The result only lives in memory and the gallery cache until the
+    switch succeeds; TBL_MEMBER is written afterwards and only with
+    HAILO_REENCODE_PERSIST. Extra templates (faceEmbeddings) cannot be
+    re-encoded and are left out of the in-memory gallery. Members without a
+    faceImgUrl or a detectable face keep their old embedding and are
+    reported.
+
+    Returns:
+        Callable installing the re-encoded gallery once the new models serve
+        frames, or None if the embedding space is unchanged
+    """
+    old_space, new_space = old_model.embedding_space, new_app.model.embedding_space
+    if old_space == new_space:
+        return None
+
+    col_face_img_url = os.environ.get('COL_FACE_IMG_URL', 'faceImgUrl')
+    members_by_category = all_category_members if all_category_members is not None else {'ACTIVE': active_members}
+    logger.info(f"reencode_gallery: {old_space} -> {new_space}")
+    started_at = time.time()
+
+    encoded = {}
+    reencoded = {}
+    for category, members in members_by_category.items():
+        reencoded[category] = []
+        for member in members or []:
+            key = (member['reservationCode'], member['memberNo'])
+            if key not in encoded:
+                url = member.get(col_face_img_url)
+                encoded[key] = encode_face_image(new_app, url) if url else None
+            if encoded[key] is None:
+                reencoded[category].append(member)
+                continue
+            member = {k: v for k, v in member.items() if k != 'faceEmbeddings'}
+            member['faceEmbedding'] = encoded[key]
+            reencoded[category].append(member)
+
+    embeddings = {key: embedding for key, embedding in encoded.items() if embedding is not None}
+    failed = sorted(key for key, embedding in encoded.items() if embedding is None)
+    logger.info(f"reencode_gallery: {len(embeddings)}/{len(encoded)} members re-encoded in {time.time() - started_at:.1f}s")
+    if failed:
+        logger.warning(f"reencode_gallery: {len(failed)} member(s) without faceImgUrl or detectable face "
+                       f"keep their {old_space} embedding: " + ', '.join(f"{c}-{n}" for c, n in failed))
+
+    def install():
+        global active_members
+        global all_category_members
+        global reencoded_space
+        global reencoded_embeddings
+
+        reencoded_space, reencoded_embeddings = new_space, embeddings
+        active_members = reencoded.get('ACTIVE', [])
+        if all_category_members is not None:
+            all_category_members = reencoded
+        if thread_detector is not None:
+            thread_detector.active_members = active_members
+            if all_category_members is not None:
+                thread_detector.all_members_by_category = reencoded
+        gallery_cache.save(runtime_config.current().gallery_cache_path, reencoded, new_space)
+
+        if runtime_config.current().hailo_reencode_persist:
+            stored = 0
+            for key, embedding in embeddings.items():
+                try:
+                    update_member_embedding(*key, embedding, new_space)
+                    stored += 1
+                except Exception as e:
+                    logger.error(f"reencode_gallery: update {key[0]}-{key[1]} failed: {e}")
+            logger.info(f"reencode_gallery: {stored}/{len(embeddings)} embeddings stored in TBL_MEMBER ({new_space})")
+
+    return install
+
 
 def init_env_var():
     logger.debug('init_env_var in')
@@ -1168,7 +1450,7 @@ def init_env_var():
         logger.error(f"init_env_var error: {e}", exc_info=True)
     finally:
         # Reschedule the initialization function
-        timer = threading.Timer(int(os.environ['TIMER_INIT_ENV_VAR']), init_env_var)
+        timer = threading.Timer(runtime_config.current().timer_init_env_var, init_env_var)
         timer.name = name
         timer.start()
     
@@ -1221,7 +1503,7 @@ def detect_face_backend():
     """
     global FACE_BACKEND, fdm
 
-    requested = os.environ.get('INFERENCE_BACKEND', 'auto').lower()
+    requested = runtime_config.current().inference_backend
     logger.info(f"detect_face_backend: INFERENCE_BACKEND={requested}")
 
     # If explicitly insightface, use insightface without importing hailo
@@ -1246,8 +1528,8 @@ def detect_face_backend():
 
     try:
         # Try to create a VDevice to probe for actual Hailo hardware
-        from hailo_platform import VDevice
-        vdevice = VDevice()
+        # (or the CPU stand-in when HAILO_CPU_REFERENCE is set)
+        vdevice = hailo_backend.VDevice()
         vdevice.release()
 
         FACE_BACKEND = 'hailo'
@@ -1265,6 +1547,11 @@ def detect_face_backend():
 
 
 def fetch_scanner_output_queue():
+    def publish(cam_ip, topic, payload):
+        publish_started_at = time.time()
+        iotClient.publish(topic=topic, payload=payload)
+        latency_metrics.record(latency_metrics.STAGE_PUBLISH, time.time() - publish_started_at, cam_ip)
+
     def upload_video_clip(message):
         if uploader_app is not None:
 
@@ -1274,7 +1561,9 @@ def fetch_scanner_output_queue():
 
             logger.debug(f"fetch_scanner_output_queue, video_clipped received: {local_file_path}")
 
+            upload_started_at = time.time()
             file_size = uploader_app.put_object(object_key=object_key, local_file_path=local_file_path)
+            latency_metrics.record(latency_metrics.STAGE_UPLOAD, time.time() - upload_started_at, message['payload']['cam_ip'])
 
             # Keep milliseconds for unique DynamoDB keys (avoids collision when multiple cameras record at same second)
             record_start = message['payload']['start_datetime']
@@ -1301,7 +1590,8 @@ def fetch_scanner_output_queue():
 
             logger.debug(f"fetch_scanner_output_queue, video_clipped with IoT Publish payload: {payload}")
 
-            iotClient.publish(
+            publish(
+                message['payload']['cam_ip'],
                 topic=f"gocheckin/{os.environ['AWS_IOT_THING_NAME']}/video_clipped",
                 payload=json.dumps(payload)
             )
@@ -1353,6 +1643,8 @@ def fetch_scanner_output_queue():
                         trigger_to_first_frame = (first_frame_at - trigger_started_at) * 1000 if trigger_started_at > 0 and first_frame_at > 0 else 0
                         first_frame_to_identified = (identified_at - first_frame_at) * 1000 if first_frame_at > 0 else 0
                         trigger_to_identified = (identified_at - trigger_started_at) * 1000 if trigger_started_at > 0 else 0
+                        if trigger_started_at > 0:
+                            latency_metrics.record(latency_metrics.STAGE_TRIGGER_TO_IDENTIFIED, identified_at - trigger_started_at, cam_ip)
 
                         logger.info(f"MEMBER DETECTED, WANT TO STOP FEEDING NOW - "
                                     f"trigger_to_first_frame: {trigger_to_first_frame:.0f}ms, "
@@ -1366,7 +1658,9 @@ def fetch_scanner_output_queue():
                         property_object_key = message['property_object_key']
                         snapshot_payload = message['snapshot_payload']
 
+                        upload_started_at = time.time()
                         file_size = uploader_app.put_object(object_key=property_object_key, local_file_path=local_file_path)
+                        latency_metrics.record(latency_metrics.STAGE_UPLOAD, time.time() - upload_started_at, cam_ip)
 
                         # Add fileSize to snapshot_payload
                         if file_size is not None:
@@ -1374,7 +1668,8 @@ def fetch_scanner_output_queue():
 
                         logger.debug(f"fetch_scanner_output_queue, member_detected with IoT Publish snapshot_payload: {snapshot_payload}")
 
-                        iotClient.publish(
+                        publish(
+                            cam_ip,
                             topic=f"gocheckin/{os.environ['AWS_IOT_THING_NAME']}/video_clipped",
                             payload=json.dumps(snapshot_payload)
                         )
@@ -1409,12 +1704,14 @@ def fetch_scanner_output_queue():
                             timer.name = "Thread-FetchMembers"
                             timer.start()
 
-                            iotClient.publish(
+                            publish(
+                                cam_ip,
                                 topic=f"gocheckin/{os.environ['AWS_IOT_THING_NAME']}/member_detected",
                                 payload=json.dumps(member_payload)
                             )
 
-                        iotClient.publish(
+                        publish(
+                            cam_ip,
                             topic=f"gocheckin/member_detected",
                             payload=json.dumps(member_payload)
                         )
@@ -1707,7 +2004,7 @@ def handle_notification(cam_ip, utc_time=datetime.now(timezone.utc).strftime("%Y
     # record
     if camera_item['isRecording']:
         if thread_gstreamer.start_recording(utc_time):
-            set_recording_time(cam_ip, int(os.environ['TIMER_RECORD']), utc_time)
+            set_recording_time(cam_ip, runtime_config.current().for_camera(cam_ip).timer_record, utc_time)
 
     # detect - ONVIF motion triggers detection with lock_asset_id=None
     # The selective unlock logic is handled by trigger_face_detection() and TypeScript
@@ -1787,7 +2084,7 @@ def trigger_face_detection(cam_ip, lock_asset_id=None):
     if thread_gstreamer.is_feeding:
         if lock_asset_id is not None and lock_asset_id != 'force':
             # Occupancy trigger (keypad sensor) - extend timer
-            thread_gstreamer.extend_timer(int(os.environ['TIMER_DETECT']))
+            thread_gstreamer.extend_timer(runtime_config.current().for_camera(cam_ip).timer_detect)
             logger.debug('trigger_face_detection - occupancy trigger, timer extended for camera: %s', cam_ip)
 
             # Update context snapshot with new lock
@@ -1799,6 +2096,7 @@ def trigger_face_detection(cam_ip, lock_asset_id=None):
                     'specific_locks': set(context.get('specific_locks', set())),
                     'trigger_started_at': existing_trigger_started_at,
                 }
+                cam_queue.set_session_priority(cam_ip, detecting_txn, context['specific_locks'], existing_trigger_started_at)
                 logger.debug(f'trigger_face_detection - updated context snapshot for {snapshot_key}')
         else:
             # ONVIF (P1 or P2) or force - do NOT extend timer
@@ -1822,8 +2120,9 @@ def trigger_face_detection(cam_ip, lock_asset_id=None):
         uc8_enabled = uc_toggles['uc8_standalone_enabled'] or uc_toggles['uc4_uc8_enabled']
 
         if uc8_enabled and hasattr(face_app, 'gate_check'):
-            gate_frames = int(os.environ.get('YOLO_GATE_FRAMES', '10'))
-            gate_min_detections = int(os.environ.get('YOLO_GATE_MIN_DETECTIONS', '3'))
+            config = runtime_config.current().for_camera(cam_ip)
+            gate_frames = config.yolo_gate_frames
+            gate_min_detections = config.yolo_gate_min_detections
 
             # Capture BGR frames from recording buffer
             bgr_frames = thread_gstreamer.get_bgr_frames_for_gate_check(gate_frames)
@@ -1843,7 +2142,7 @@ def trigger_face_detection(cam_ip, lock_asset_id=None):
         elif not uc8_enabled:
             logger.info(f'trigger_face_detection - UC8 toggle disabled for {cam_ip}, skipping gate check')
 
-        thread_gstreamer.feed_detecting(int(os.environ['TIMER_DETECT']))
+        thread_gstreamer.feed_detecting(runtime_config.current().for_camera(cam_ip).timer_detect)
 
         # Store context snapshot keyed by detecting_txn
         detecting_txn = thread_gstreamer.detecting_txn
@@ -1853,6 +2152,8 @@ def trigger_face_detection(cam_ip, lock_asset_id=None):
                 'specific_locks': set(context.get('specific_locks', set())),
                 'trigger_started_at': time.time(),  # T0: when detection was triggered
             }
+            cam_queue.set_session_priority(cam_ip, detecting_txn, context['specific_locks'],
+                                           context_snapshots[snapshot_key]['trigger_started_at'])
             logger.debug(f'trigger_face_detection - stored context snapshot for {snapshot_key}')
 
         logger.info('trigger_face_detection - started for camera: %s', cam_ip)
@@ -1893,6 +2194,7 @@ def handle_occupancy_false(cam_ip, lock_asset_id):
                         'specific_locks': set(context.get('specific_locks', set())),
                         'trigger_started_at': existing_trigger_started_at,
                     }
+                    cam_queue.set_session_priority(cam_ip, detecting_txn, context['specific_locks'], existing_trigger_started_at)
                     logger.info('handle_occupancy_false - updated context snapshot: %s', context_snapshots[snapshot_key])
 
     # Check if should stop detection early
@@ -1939,9 +2241,10 @@ def handle_timer_expiry(cam_ip):
     uc8_enabled = uc_toggles.get('uc8_standalone_enabled', False) or uc_toggles.get('uc4_uc8_enabled', False)
 
     # Configuration
-    extend_lookback = int(os.environ.get('YOLO_EXTEND_LOOKBACK', '10'))
-    extend_min_detections = int(os.environ.get('YOLO_EXTEND_MIN_DETECTIONS', '3'))
-    motion_recency_sec = int(os.environ.get('MOTION_RECENCY_SEC', '5'))
+    config = runtime_config.current().for_camera(cam_ip)
+    extend_lookback = config.yolo_extend_lookback
+    extend_min_detections = config.yolo_extend_min_detections
+    motion_recency_sec = config.motion_recency_sec
 
     # Check 1: UC8 person detection history (only if UC8 is enabled)
     person_check_passed = False
@@ -1990,7 +2293,7 @@ def handle_timer_expiry(cam_ip):
         # Extend the timer
         thread_gstreamer = thread_gstreamers.get(cam_ip)
         if thread_gstreamer:
-            extend_seconds = int(os.environ.get('TIMER_DETECT', '10'))
+            extend_seconds = config.timer_detect
             thread_gstreamer.extend_timer(extend_seconds)
             logger.info(f"{cam_ip} handle_timer_expiry - EXTENDED session by {extend_seconds}s")
     else:
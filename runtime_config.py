@@ -0,0 +1,360 @@
+# runtime_config.py
+#
+# Typed, cached view of the environment-driven runtime configuration.
+#
+# Hot loops (detector thread, GStreamer sample callbacks, Hailo process_frame)
+# read attributes off the current RuntimeConfig snapshot instead of parsing
+# os.environ strings on every frame. The snapshot is immutable; reload()
+# builds a new one and swaps it in atomically, which is what the change_var
+# IoT topic handler calls after updating the environment.
+#
+# Per-camera overrides come from CAMERA_CONFIG_OVERRIDES, a JSON object keyed
+# by camera IP, e.g. {"192.168.11.62": {"AGE_DETECTING_SEC": "2.0"}}. Only
+# fields marked per_camera can be overridden.
+
+import json
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+if 'LOG_LEVEL' in os.environ:
+    logging.basicConfig(stream=sys.stdout, level=os.environ['LOG_LEVEL'])
+else:
+    logging.basicConfig(stream=sys.stdout, level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# Subsystems that must re-initialize when one of their variables changes
+# ---------------------------------------------------------------------------
+SUBSYSTEM_CAMERAS = 'cameras'            # init_cameras() (ONVIF renew timer / subscription)
+SUBSYSTEM_ENV_VAR = 'env_var'            # init_env_var() timer
+SUBSYSTEM_GSTREAMER = 'gstreamer'        # decode pipeline (framerate caps built at init)
+SUBSYSTEM_FACE_BACKEND = 'face_backend'  # backend selection / InsightFace model (restart)
+SUBSYSTEM_HAILO_MODELS = 'hailo_models'  # Hailo HEF set (SCRFD/ArcFace hot-swapped)
+SUBSYSTEM_GALLERY = 'gallery'            # member gallery storage (re-encoded in place)
+
+
+def _parse_bool(value: str) -> bool:
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _positive(value) -> bool:
+    return value > 0
+
+
+def _non_negative(value) -> bool:
+    return value >= 0
+
+
+def _unit_interval(value) -> bool:
+    return 0.0 <= value <= 1.0
+
+
+def _parse_roi(value: str):
+    """Parse 'x1,y1,x2,y2' frame fractions; empty means no ROI (None)."""
+    value = str(value).strip()
+    if not value:
+        return None
+    roi = tuple(float(v) for v in value.split(','))
+    if len(roi) != 4:
+        raise ValueError("expected x1,y1,x2,y2")
+    return roi
+
+
+def _parse_list(value: str) -> Tuple[str, ...]:
+    """Parse a comma-separated list; empty means an empty tuple."""
+    return tuple(item.strip() for item in str(value).split(',') if item.strip())
+
+
+def _valid_roi(roi) -> bool:
+    if roi is None:
+        return True
+    x1, y1, x2, y2 = roi
+    return 0.0 <= x1 < x2 <= 1.0 and 0.0 <= y1 < y2 <= 1.0
+
+
+@dataclass(frozen=True)
+class ConfigField:
+    """Spec for one environment variable exposed on RuntimeConfig."""
+    env: str
+    attr: str
+    parse: Callable[[str], Any]
+    default: str
+    validate: Optional[Callable[[Any], bool]] = None
+    subsystems: Tuple[str, ...] = ()
+    per_camera: bool = False
+
+
+FIELDS: Tuple[ConfigField, ...] = (
+    # Detector thread
+    ConfigField('AGE_DETECTING_SEC', 'age_detecting_sec', float, '4.0', _positive, per_camera=True),
+    ConfigField('DETECTING_SLEEP_SEC', 'detecting_sleep_sec', float, '0.1', _non_negative),
+    ConfigField('FACE_RECOG_THRESHOLD', 'face_recog_threshold', float, '0.35', _unit_interval, per_camera=True),
+    ConfigField('FACE_THRESHOLD_HAILO', 'face_threshold_hailo', float, '0.25', _unit_interval, per_camera=True),
+    ConfigField('HAILO_PRE_NORM_THRESHOLD_R50', 'hailo_pre_norm_threshold_r50', float, '10.0', _non_negative, per_camera=True),
+    ConfigField('HAILO_PRE_NORM_THRESHOLD_MOBILEFACENET', 'hailo_pre_norm_threshold_mobilefacenet', float, '6.0', _non_negative, per_camera=True),
+    ConfigField('DETECTION_QUEUE_SHED_DEPTH', 'detection_queue_shed_depth', int, '50', _non_negative),
+
+    # Member gallery
+    ConfigField('GALLERY_DTYPE', 'gallery_dtype', str.lower, 'float32',
+                lambda v: v in ('float32', 'float16', 'int8'), subsystems=(SUBSYSTEM_GALLERY,)),
+    ConfigField('GALLERY_ANN_MIN_SIZE', 'gallery_ann_min_size', int, '10000', _non_negative,
+                subsystems=(SUBSYSTEM_GALLERY,)),
+    ConfigField('GALLERY_ANN_NPROBE', 'gallery_ann_nprobe', int, '8', _positive),
+    ConfigField('GALLERY_POOLING', 'gallery_pooling', str.lower, 'max', lambda v: v in ('max', 'mean')),
+    ConfigField('GALLERY_CACHE_PATH', 'gallery_cache_path', str, '/etc/insightface/gallery_cache'),
+
+    # GStreamer buffers
+    ConfigField('PRE_RECORDING_SEC', 'pre_recording_sec', float, '1.0', _non_negative, per_camera=True),
+    ConfigField('PRE_DETECTING_SEC', 'pre_detecting_sec', float, '0.0', _non_negative, per_camera=True),
+    ConfigField('DETECTING_RATE_PERCENT', 'detecting_rate_percent', float, '1.0', _unit_interval,
+                subsystems=(SUBSYSTEM_GSTREAMER,), per_camera=True),
+
+    # Session timers
+    ConfigField('TIMER_DETECT', 'timer_detect', int, '10', _positive, per_camera=True),
+    ConfigField('TIMER_RECORD', 'timer_record', int, '10', _positive, per_camera=True),
+    ConfigField('TIMER_CAM_RENEW', 'timer_cam_renew', int, '600', _positive, subsystems=(SUBSYSTEM_CAMERAS,)),
+    ConfigField('ONVIF_EXPIRATION', 'onvif_expiration', str, 'PT1H', subsystems=(SUBSYSTEM_CAMERAS,)),
+    ConfigField('TIMER_INIT_ENV_VAR', 'timer_init_env_var', int, '1800', _positive, subsystems=(SUBSYSTEM_ENV_VAR,)),
+
+    # UC8 (YOLOv8n)
+    ConfigField('YOLO_DETECT_THRESHOLD', 'yolo_detect_threshold', float, '0.5', _unit_interval,
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('YOLO_GATE_FRAMES', 'yolo_gate_frames', int, '10', _positive, per_camera=True),
+    ConfigField('YOLO_GATE_MIN_DETECTIONS', 'yolo_gate_min_detections', int, '3', _non_negative, per_camera=True),
+    ConfigField('YOLO_EXTEND_LOOKBACK', 'yolo_extend_lookback', int, '10', _positive, per_camera=True),
+    ConfigField('YOLO_EXTEND_MIN_DETECTIONS', 'yolo_extend_min_detections', int, '3', _non_negative, per_camera=True),
+    ConfigField('MOTION_RECENCY_SEC', 'motion_recency_sec', int, '5', _non_negative, per_camera=True),
+    ConfigField('HAILO_FACE_CASCADE', 'hailo_face_cascade', str.lower, 'off',
+                lambda v: v in ('off', 'person', 'roi'), per_camera=True),
+    ConfigField('HAILO_CASCADE_KEEPALIVE_FRAMES', 'hailo_cascade_keepalive_frames', int, '10', _non_negative,
+                per_camera=True),
+    ConfigField('DOOR_ROI', 'door_roi', _parse_roi, '', _valid_roi, per_camera=True),
+    ConfigField('HAILO_FACE_ZOOM', 'hailo_face_zoom', _parse_bool, 'false', per_camera=True),
+    ConfigField('HAILO_ZOOM_MAX_CROPS', 'hailo_zoom_max_crops', int, '4', _positive, per_camera=True),
+
+    # Backend / models
+    ConfigField('INFERENCE_BACKEND', 'inference_backend', str.lower, 'auto',
+                lambda v: v in ('auto', 'hailo', 'insightface'), subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('INSIGHTFACE_MODEL', 'insightface_model', str, 'buffalo_sc', subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('INSIGHTFACE_WARMUP_RUNS', 'insightface_warmup_runs', int, '3', _non_negative,
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_INTRA_OP_THREADS', 'ort_intra_op_threads', int, '0', _non_negative,
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_INTER_OP_THREADS', 'ort_inter_op_threads', int, '0', _non_negative,
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_GRAPH_OPTIMIZATION', 'ort_graph_optimization', str.lower, 'all',
+                lambda v: v in ('disable', 'basic', 'extended', 'all'), subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_ENABLE_CPU_MEM_ARENA', 'ort_enable_cpu_mem_arena', _parse_bool, 'true',
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_ENABLE_MEM_PATTERN', 'ort_enable_mem_pattern', _parse_bool, 'true',
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('ORT_OPTIMIZED_MODEL_CACHE', 'ort_optimized_model_cache', str, '/etc/insightface/ort_cache',
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('HAILO_DET_HEF', 'hailo_det_hef', str, '', subsystems=(SUBSYSTEM_HAILO_MODELS,)),
+    ConfigField('HAILO_REC_HEF', 'hailo_rec_hef', str, '', subsystems=(SUBSYSTEM_HAILO_MODELS,)),
+    ConfigField('HAILO_YOLO_HEF', 'hailo_yolo_hef', str, '', subsystems=(SUBSYSTEM_HAILO_MODELS,)),
+    ConfigField('HAILO_DET_QUANTIZED_OUTPUTS', 'hailo_det_quantized_outputs', _parse_bool, 'false',
+                subsystems=(SUBSYSTEM_HAILO_MODELS,)),
+    ConfigField('HAILO_DET_SCORE_THRESHOLD', 'hailo_det_score_threshold', float, '0.45', _unit_interval,
+                subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('HAILO_REENCODE_PERSIST', 'hailo_reencode_persist', _parse_bool, 'false'),
+    ConfigField('HAILO_TELEMETRY_LOG_SEC', 'hailo_telemetry_log_sec', float, '300', _non_negative),
+    ConfigField('HAILO_WATCHDOG_MAX_FAILURES', 'hailo_watchdog_max_failures', int, '3', _non_negative),
+    ConfigField('HAILO_DEVICE_MODE', 'hailo_device_mode', str.lower, 'single',
+                lambda v: v in ('single', 'vdevice', 'shard'), subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+    ConfigField('HAILO_DEVICE_IDS', 'hailo_device_ids', _parse_list, '', subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+
+    # Testing overrides
+    ConfigField('UC8_ALWAYS_ENABLED', 'uc8_always_enabled', _parse_bool, 'false'),
+    ConfigField('HAILO_CPU_REFERENCE', 'hailo_cpu_reference', _parse_bool, 'false', subsystems=(SUBSYSTEM_FACE_BACKEND,)),
+)
+
+_FIELDS_BY_ENV: Dict[str, ConfigField] = {f.env: f for f in FIELDS}
+
+CAMERA_OVERRIDES_ENV = 'CAMERA_CONFIG_OVERRIDES'
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Immutable, typed snapshot of the runtime configuration.
+
+    Read attributes directly in hot loops; call for_camera(cam_ip) to get the
+    snapshot with that camera's overrides applied (precomputed, no parsing).
+    """
+    age_detecting_sec: float
+    detecting_sleep_sec: float
+    face_recog_threshold: float
+    face_threshold_hailo: float
+    hailo_pre_norm_threshold_r50: float
+    hailo_pre_norm_threshold_mobilefacenet: float
+    detection_queue_shed_depth: int
+    gallery_dtype: str
+    gallery_ann_min_size: int
+    gallery_ann_nprobe: int
+    gallery_pooling: str
+    gallery_cache_path: str
+    pre_recording_sec: float
+    pre_detecting_sec: float
+    detecting_rate_percent: float
+    timer_detect: int
+    timer_record: int
+    timer_cam_renew: int
+    onvif_expiration: str
+    timer_init_env_var: int
+    yolo_detect_threshold: float
+    yolo_gate_frames: int
+    yolo_gate_min_detections: int
+    yolo_extend_lookback: int
+    yolo_extend_min_detections: int
+    motion_recency_sec: int
+    hailo_face_cascade: str
+    hailo_cascade_keepalive_frames: int
+    door_roi: Optional[Tuple[float, float, float, float]]
+    hailo_face_zoom: bool
+    hailo_zoom_max_crops: int
+    inference_backend: str
+    insightface_model: str
+    insightface_warmup_runs: int
+    ort_intra_op_threads: int
+    ort_inter_op_threads: int
+    ort_graph_optimization: str
+    ort_enable_cpu_mem_arena: bool
+    ort_enable_mem_pattern: bool
+    ort_optimized_model_cache: str
+    hailo_det_hef: str
+    hailo_rec_hef: str
+    hailo_yolo_hef: str
+    hailo_det_quantized_outputs: bool
+    hailo_det_score_threshold: float
+    hailo_reencode_persist: bool
+    hailo_telemetry_log_sec: float
+    hailo_watchdog_max_failures: int
+    hailo_device_mode: str
+    hailo_device_ids: Tuple[str, ...]
+    uc8_always_enabled: bool
+    hailo_cpu_reference: bool
+
+    # cam_ip -> RuntimeConfig with overrides applied
+    camera_configs: Dict[str, 'RuntimeConfig'] = field(default_factory=dict, compare=False, repr=False)
+
+    def for_camera(self, cam_ip):
+        """Return the snapshot for a camera (self if it has no overrides)."""
+        return self.camera_configs.get(cam_ip, self)
+
+
+@dataclass(frozen=True)
+class ReloadResult:
+    """Outcome of reload(): the new snapshot and what changed."""
+    config: RuntimeConfig
+    changed: Set[str]   # env names whose effective value changed
+    reinit: Set[str]    # subsystems that must re-initialize
+
+
+def _parse_field(spec, raw, fallback):
+    """Parse and validate one value; log and return fallback if invalid."""
+    try:
+        value = spec.parse(raw)
+    except (TypeError, ValueError) as e:
+        logger.error(f"runtime_config: invalid {spec.env}={raw!r} ({e}), keeping {fallback!r}")
+        return fallback
+    if spec.validate is not None and not spec.validate(value):
+        logger.error(f"runtime_config: out of range {spec.env}={raw!r}, keeping {fallback!r}")
+        return fallback
+    return value
+
+
+def _build(environ, previous):
+    """Build a new RuntimeConfig from environ, falling back to previous values on error."""
+    values = {}
+    for spec in FIELDS:
+        if previous is not None:
+            fallback = getattr(previous, spec.attr)
+        else:
+            fallback = spec.parse(spec.default)
+        values[spec.attr] = _parse_field(spec, environ.get(spec.env, spec.default), fallback)
+    base_values = values
+
+    camera_configs = {}
+    raw_overrides = environ.get(CAMERA_OVERRIDES_ENV, '')
+    if raw_overrides:
+        try:
+            overrides = json.loads(raw_overrides)
+            if not isinstance(overrides, dict):
+                raise ValueError("expected a JSON object keyed by cam_ip")
+        except ValueError as e:
+            logger.error(f"runtime_config: invalid {CAMERA_OVERRIDES_ENV} ({e}), ignoring camera overrides")
+            overrides = {}
+
+        for cam_ip, cam_vars in overrides.items():
+            if not isinstance(cam_vars, dict):
+                logger.error(f"runtime_config: overrides for {cam_ip} must be an object, ignoring")
+                continue
+            cam_values = dict(base_values)
+            for env_name, raw in cam_vars.items():
+                spec = _FIELDS_BY_ENV.get(env_name)
+                if spec is None or not spec.per_camera:
+                    logger.warning(f"runtime_config: {env_name} cannot be overridden per camera, ignoring for {cam_ip}")
+                    continue
+                cam_values[spec.attr] = _parse_field(spec, str(raw), base_values[spec.attr])
+            camera_configs[cam_ip] = RuntimeConfig(**cam_values)
+
+    return RuntimeConfig(**base_values, camera_configs=camera_configs)
+
+
+def _diff(old, new):
+    """Return (changed env names, subsystems to re-initialize) between two snapshots."""
+    cam_ips = set(old.camera_configs) | set(new.camera_configs)
+    pairs = [(old, new)] + [(old.for_camera(ip), new.for_camera(ip)) for ip in cam_ips]
+
+    changed = set()
+    reinit = set()
+    for spec in FIELDS:
+        if any(getattr(o, spec.attr) != getattr(n, spec.attr) for o, n in pairs):
+            changed.add(spec.env)
+            reinit.update(spec.subsystems)
+    return changed, reinit
+
+
+_lock = threading.Lock()
+_current: RuntimeConfig = _build(os.environ, None)
+
+
+def current():
+    """Return the current RuntimeConfig snapshot (cheap, lock-free read)."""
+    return _current
+
+
+def reload(updates=None):
+    """Apply environment updates and atomically swap in a new snapshot.
+
+    Args:
+        updates: Optional dict of env name -> value to write to os.environ first
+                 (the change_var event payload)
+
+    Returns:
+        ReloadResult with the new config, changed variables and subsystems
+        that must re-initialize.
+    """
+    global _current
+
+    with _lock:
+        if updates:
+            for key, value in updates.items():
+                os.environ[key] = str(value)
+
+        old = _current
+        new = _build(os.environ, old)
+        changed, reinit = _diff(old, new)
+        _current = new
+
+    if changed:
+        logger.info(f"runtime_config reloaded: changed={sorted(changed)}, reinit={sorted(reinit)}")
+    else:
+        logger.debug("runtime_config reloaded: no effective change")
+
+    return ReloadResult(config=new, changed=changed, reinit=reinit)
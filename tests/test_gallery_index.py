@@ -0,0 +1,117 @@
+# tests/test_gallery_index.py
+#
+# GalleryIndex with IVF enabled must reach the same match decisions as an
+# exact FlatIndex scan, including faces whose true member sits in a list that
+# nprobe=1 does not probe.
+#
+# Usage (from the repo root):
+#   python -m pytest -q tests
+
+import dataclasses
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import runtime_config  # noqa: E402
+from gallery_index import FlatIndex, GalleryIndex  # noqa: E402
+from member_gallery import (MemberGallery, CATEGORY_CODES, category_code,  # noqa: E402
+                            category_member_key, normalize_rows)
+
+DIM = 512
+THRESHOLD = 0.35
+
+
+@pytest.fixture
+def ivf_config(monkeypatch):
+    config = dataclasses.replace(runtime_config.current(), gallery_ann_min_size=1000,
+                                 gallery_ann_nprobe=1, gallery_pooling='max')
+    monkeypatch.setattr(runtime_config, '_current', config)
+    return config
+
+
+def unit(rows):
+    return normalize_rows(np.asarray(rows, dtype=np.float32))[0]
+
+
+def noisy(rng, rows, noise):
+    return unit(rows + noise * rng.standard_normal(rows.shape).astype(np.float32) / np.sqrt(DIM))
+
+
+def decisions(similarities, codes):
+    """Per face: (category code, member row) of the match, or (None, best row)."""
+    out = []
+    for row in similarities:
+        hits = row >= THRESHOLD
+        if not hits.any():
+            out.append((None, int(row.argmax())))
+            continue
+        code = int(codes[hits].min())
+        in_code = np.where(codes == code, row, -np.inf)
+        out.append((code, int(in_code.argmax())))
+    return out
+
+
+def missed_by_probe(index, gallery, faces, rows):
+    """Faces whose true member row is not scored by a raw IVF search of that face alone."""
+    with gallery.lock:
+        return np.array([np.isneginf(index._ivf.search(gallery, face[None, :], 1)[0][0, row])
+                         for face, row in zip(faces, rows)])
+
+
+def search_each(index, gallery, faces):
+    """Thresholded search of one face at a time, so only its own lists are probed."""
+    with gallery.lock:
+        return np.vstack([index.search(gallery, face[None, :], THRESHOLD) for face in faces])
+
+
+def test_ivf_decisions_match_flat(ivf_config):
+    rng = np.random.default_rng(7)
+    embeddings = unit(rng.standard_normal((3000, DIM)))
+    gallery = MemberGallery(name='test')
+    gallery.sync([{'reservationCode': f'R{i}', 'memberNo': 0, 'faceEmbedding': embeddings[i]}
+                  for i in range(len(embeddings))])
+    index = GalleryIndex(name='test')
+    index.refresh(gallery)
+    assert index._ivf is not None
+
+    truth = rng.choice(len(embeddings), 300, replace=False)
+    faces = noisy(rng, embeddings[truth], 1.2)
+    rows = np.array([gallery._rows[(f'R{i}', 0)] for i in truth])
+    assert missed_by_probe(index, gallery, faces, rows).any()
+
+    with gallery.lock:
+        exact = FlatIndex().search(gallery, faces)
+    assert decisions(search_each(index, gallery, faces), gallery.codes) == decisions(exact, gallery.codes)
+
+
+def test_ivf_missed_inactive_member_outranks_staff(ivf_config):
+    rng = np.random.default_rng(11)
+    inactive = unit(rng.standard_normal((3000, DIM)))
+    members = [{'category': 'INACTIVE', 'reservationCode': f'I{i}', 'memberNo': 0, 'faceEmbedding': inactive[i]}
+               for i in range(len(inactive))]
+    gallery = MemberGallery(name='test', key_fn=category_member_key, code_fn=category_code)
+    gallery.sync(members)
+    index = GalleryIndex(name='test')
+    index.refresh(gallery)
+
+    # Probes whose INACTIVE member is outside the probed list
+    faces = noisy(rng, inactive, 1.2)
+    rows = np.array([gallery._rows[('INACTIVE', f'I{i}', 0)] for i in range(len(inactive))])
+    missed = np.flatnonzero(missed_by_probe(index, gallery, faces, rows))[:20]
+    assert missed.size
+
+    # Small (exactly scanned) STAFF look-alikes that also clear the threshold
+    staff = noisy(rng, faces[missed], 1.0)
+    members += [{'category': 'STAFF', 'reservationCode': f'S{i}', 'memberNo': 0, 'faceEmbedding': staff[k]}
+                for k, i in enumerate(missed)]
+    gallery.sync(members)
+    index.refresh(gallery)
+
+    with gallery.lock:
+        expected = decisions(FlatIndex().search(gallery, faces[missed]), gallery.codes)
+    assert all(code == CATEGORY_CODES['INACTIVE'] for code, _ in expected)
+    assert decisions(search_each(index, gallery, faces[missed]), gallery.codes) == expected